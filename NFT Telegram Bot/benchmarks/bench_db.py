@@ -0,0 +1,65 @@
+"""
+Micro-benchmark for the tier-check hot path
+Measures queries/sec for DatabaseManager.get_user_tier through the reader
+pool, and for NFTBotMonetization.check_user_tier served from memory
+
+Usage: python benchmarks/bench_db.py [users] [queries] [concurrency]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.db_manager import DatabaseManager
+from monetization import NFTBotMonetization
+
+
+async def run(users, queries, concurrency):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(path=os.path.join(tmp, 'bench.db'))
+        db.start()
+
+        # Seed users in batched writes; every 10th user is premium
+        started = time.perf_counter()
+        for user_id in range(users):
+            if user_id % 10 == 0:
+                db.set_user_tier(user_id, 'premium')
+            else:
+                db.touch_user(user_id)
+        await db.flush()
+        elapsed = time.perf_counter() - started
+        print(f"writes:            {users / elapsed:>12,.0f} rows/sec ({db.batches} batches)")
+
+        ids = [random.randrange(users) for _ in range(queries)]
+
+        async def worker(chunk):
+            for user_id in chunk:
+                await db.get_user_tier(user_id)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(ids[i::concurrency]) for i in range(concurrency)])
+        elapsed = time.perf_counter() - started
+        print(f"db tier check:     {queries / elapsed:>12,.0f} queries/sec (concurrency {concurrency})")
+
+        monetization = NFTBotMonetization()
+        await monetization.attach_storage(db)
+
+        started = time.perf_counter()
+        for user_id in ids:
+            monetization.check_user_tier(user_id)
+        elapsed = time.perf_counter() - started
+        print(f"memory tier check: {queries / elapsed:>12,.0f} queries/sec")
+
+        db.close()
+
+
+if __name__ == '__main__':
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    asyncio.run(run(users, queries, concurrency))
@@ -0,0 +1,115 @@
+"""
+Event ingestion benchmark against the local fake OpenSea API
+Measures backlog catch-up in events/sec, then checks that an idle pass
+stores nothing, that new events are picked up incrementally and that an
+interrupted catch-up resumes from its persisted cursor after a restart
+
+Usage: python benchmarks/bench_events.py [events per collection] [collections]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+logging.disable(logging.INFO)
+
+from benchmarks.fake_opensea import FakeOpenSeaServer, make_events
+from utils.db_manager import DatabaseManager
+from utils.events import EventIngestor
+from utils.opensea_client import OpenSeaClient
+
+
+def serve_fake_opensea(ready, commands, done, slugs, events):
+    """Child process: run the fake API; `commands` delivers (slug, count) batches of new events"""
+    async def main():
+        fake = FakeOpenSeaServer()
+        await fake.start()
+        # Spread the backlog over most of the ingestor's one-day backfill window
+        spacing = 80000 / events
+        seq = 0
+        for slug in slugs:
+            fake.add_events(slug, make_events(events, seq, spacing=spacing))
+            seq += events
+        ready.put(fake.server.port)
+
+        loop = asyncio.get_running_loop()
+        while True:
+            slug, count = await loop.run_in_executor(None, commands.get)
+            fake.add_events(slug, make_events(count, seq, spacing=0))
+            seq += count
+            done.put(True)
+
+    asyncio.run(main())
+
+
+async def count_events(db):
+    return (await db.fetchone("SELECT COUNT(*) FROM events"))[0]
+
+
+async def main(events, collections):
+    slugs = [f"collection-{i}" for i in range(collections)]
+    context = multiprocessing.get_context("spawn")
+    ready, commands, done = context.Queue(), context.Queue(), context.Queue()
+    fake = context.Process(target=serve_fake_opensea, args=(ready, commands, done, slugs, events), daemon=True)
+    fake.start()
+    base_url = f"http://127.0.0.1:{ready.get()}/api/v2"
+
+    def publish(slug, count):
+        commands.put((slug, count))
+        done.get()
+
+    client = OpenSeaClient(base_url=base_url, rate_limit=100000, burst=100000)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(path=os.path.join(tmp, 'bench.db'))
+        db.start()
+
+        def ingestor(max_pages=100000):
+            return EventIngestor(client, db, lambda: slugs, max_pages=max_pages, concurrency=collections)
+
+        events_ingestor = ingestor()
+        total = events * collections
+        started = time.perf_counter()
+        stored = await events_ingestor.run_cycle()
+        elapsed = time.perf_counter() - started
+        print(f"{collections} collections x {events} events")
+        print(f"catch-up:    {stored / elapsed:>10,.0f} events/sec "
+              f"({stored} stored, {events_ingestor.pages} pages, {elapsed:.2f}s)")
+        assert stored == total, f"expected {total} events, stored {stored}"
+
+        stored = await events_ingestor.run_cycle()
+        print(f"idle pass:   {stored} stored, {events_ingestor.duplicates} overlap duplicates dropped")
+        assert stored == 0
+
+        publish(slugs[0], 500)
+        stored = await events_ingestor.run_cycle()
+        print(f"incremental: {stored} stored of 500 new")
+        assert stored == 500
+
+        # Interrupt a catch-up after a few pages, then restart from the persisted checkpoint
+        publish(slugs[0], 5000)
+        interrupted = ingestor(max_pages=5)
+        await interrupted.load()
+        partial = await interrupted.ingest(slugs[0])
+        restarted = ingestor()
+        await restarted.load()
+        rest = await restarted.ingest(slugs[0])
+        print(f"restart:     {partial} stored before, {rest} after resuming ({restarted.duplicates} duplicates)")
+        assert partial + rest == 5000
+
+        assert await count_events(db) == total + 5500
+        db.close()
+
+    await client.close()
+    fake.terminate()
+
+
+if __name__ == '__main__':
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    collections = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    asyncio.run(main(events, collections))
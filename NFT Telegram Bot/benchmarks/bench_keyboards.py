@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for the menu navigation hot path
+Compares building inline keyboards on every tap with the precomputed and
+memoized keyboards: CPU time and allocations per callback
+
+Usage: python benchmarks/bench_keyboards.py [callbacks]
+"""
+
+import os
+import sys
+import time
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# nft_bot validates these at import; the benchmark never talks to Telegram or OpenSea
+os.environ.setdefault('TELEGRAM_TOKEN', '123456:bench')
+os.environ.setdefault('OPENSEA_API_KEY', 'bench')
+
+import logging
+logging.disable(logging.INFO)
+
+import nft_bot
+
+
+def navigation(slugs, main, collections, options):
+    """One simulated tap: popular collections -> a collection -> back to main"""
+    def tap(slug):
+        collections()
+        options(slug)
+        main()
+    return [lambda slug=slug: tap(slug) for slug in slugs]
+
+
+def measure(taps):
+    started = time.perf_counter()
+    for tap in taps:
+        tap()
+    elapsed = time.perf_counter() - started
+
+    # Peak memory allocated while handling one tap (freed again afterwards)
+    sampled = taps[:1000]
+    transient = 0
+    tracemalloc.start()
+    for tap in sampled:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        tap()
+        transient += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return elapsed / len(taps) * 1e6, transient / len(sampled)
+
+
+def main(callbacks):
+    slugs = [random.choice(list(nft_bot.POPULAR_COLLECTIONS)) for _ in range(callbacks)]
+
+    rebuilt = navigation(
+        slugs,
+        nft_bot.build_main_keyboard,
+        nft_bot.build_collections_keyboard,
+        nft_bot.build_collection_options_keyboard
+    )
+    nft_bot.precompute_keyboards()
+    cached = navigation(
+        slugs,
+        nft_bot.create_main_keyboard,
+        nft_bot.create_collections_keyboard,
+        nft_bot.create_collection_options_keyboard
+    )
+
+    print(f"{callbacks} callbacks over {len(nft_bot.POPULAR_COLLECTIONS)} collections")
+    for name, taps in (("rebuilt", rebuilt), ("cached", cached)):
+        per_call_us, transient = measure(taps)
+        print(f"{name:8} {per_call_us:>9,.1f} us/callback  {transient / 1024:>8,.2f} KiB peak/callback")
+    print(nft_bot.keyboards.counters())
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
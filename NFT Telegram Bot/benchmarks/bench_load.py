@@ -0,0 +1,268 @@
+"""
+Load test of the bot's real handlers against local fake Telegram and OpenSea APIs
+Virtual users replay a realistic mix of commands and button taps through the
+bot's own Application (quotas, stats cache, single-flight, send queue and all)
+and the report gives p50/p95/p99 latency per action, throughput and upstream
+calls per action. Background jobs are not started, so every upstream call is
+caused by a user action. Telegram's and OpenSea's rate limits are lifted to
+measure the bot itself; set SEND_*/OPENSEA_* variables to apply real ones
+
+Set BENCH_SAVE=results.json to keep a run, and BENCH_BASELINE=results.json to
+compare against one: the exit status is 1 when p95 latency or throughput is
+more than BENCH_TOLERANCE (default 0.1) worse
+
+Usage: python benchmarks/bench_load.py [actions] [users] [opensea_latency_ms] [error_rate] [throttle_rate]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import tempfile
+import itertools
+import multiprocessing
+from collections import defaultdict
+
+import httpx
+import numpy as np
+from telegram import Update
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.bench_updates import TOKEN, start_fake_telegram
+from benchmarks.fake_opensea import FakeOpenSeaServer
+from benchmarks.fake_telegram import command_update, callback_update
+
+LONG_TAIL = [f"collection-{i}" for i in range(300)]
+MISSING = [f"no-such-collection-{i}" for i in range(50)]  # typos and delisted collections: 404 upstream
+SEARCH_TERMS = ["ape", "bored", "punk", "moon", "azuki", "doodle", "clone", "goblin", "mutant", "xyzzy", "pepe"]
+FREE_USERS = 0.2  # share of users on the free tier (10 queries a day, then the quota message)
+
+# action -> relative frequency, roughly what a menu-driven bot sees
+ACTION_MIX = {
+    "cmd:floor": 12,
+    "cmd:stats": 8,
+    "cmd:search": 10,
+    "cb:collections": 12,
+    "cb:collection": 16,
+    "cb:floor": 16,
+    "cb:stats": 12,
+    "cb:volume": 8,
+    "cb:sales": 6,
+}
+
+UNTHROTTLED = {
+    "SEND_GLOBAL_RATE": "100000",
+    "SEND_GLOBAL_BURST": "100000",
+    "SEND_CHAT_RATE": "1000",
+    "SEND_CHAT_BURST": "1000",
+    "OPENSEA_RATE_LIMIT": "100000",
+    "OPENSEA_BURST": "100000",
+}
+
+
+def serve_fake_opensea(ready, collections, latency, error_rate, throttle_rate):
+    """Child process: run the fake API; `collections` delivers the slugs to serve stats for"""
+    async def main():
+        random.seed(1)
+        fake = FakeOpenSeaServer(latency=latency, error_rate=error_rate, throttle_rate=throttle_rate)
+        await fake.start()
+        ready.put(fake.server.port)
+        fake.add_collections(await asyncio.get_running_loop().run_in_executor(None, collections.get))
+        ready.put(True)
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def start_fake_opensea(latency, error_rate, throttle_rate):
+    """Start the fake API; returns (process, root URL, function publishing the collections)"""
+    context = multiprocessing.get_context("spawn")
+    ready, collections = context.Queue(), context.Queue()
+    process = context.Process(
+        target=serve_fake_opensea, args=(ready, collections, latency, error_rate, throttle_rate), daemon=True
+    )
+    process.start()
+
+    def publish(slugs):
+        collections.put(list(slugs))
+        ready.get()
+
+    return process, f"http://127.0.0.1:{ready.get()}", publish
+
+
+async def fetch_calls(root):
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{root}/calls")).json()
+
+
+class Workload:
+    """Draws actions: collections by a Zipf-like popularity, commands sometimes naming unknown slugs"""
+
+    def __init__(self, popular, router):
+        self.router = router
+        self.slugs = [*popular, *LONG_TAIL]
+        self.slug_weights = [1 / (rank + 1) ** 1.1 for rank in range(len(self.slugs))]
+        self.actions = list(ACTION_MIX)
+        self.action_weights = list(ACTION_MIX.values())
+        self.update_ids = itertools.count(1)
+
+    def slug(self, rng, typo_rate=0.0):
+        if rng.random() < typo_rate:
+            return rng.choice(MISSING)
+        return rng.choices(self.slugs, self.slug_weights)[0]
+
+    def next(self, chat_id, rng):
+        """(action, update payload) for the next tap or command of a user"""
+        action = rng.choices(self.actions, self.action_weights)[0]
+        update_id = next(self.update_ids)
+        kind, name = action.split(":")
+        if kind == "cmd":
+            args = [rng.choice(SEARCH_TERMS)] if name == "search" else [self.slug(rng, typo_rate=0.05)]
+            return action, command_update(update_id, chat_id, name, args)
+        slug = None if name == "collections" else self.slug(rng)
+        # Every user taps buttons on their own menu message
+        return action, callback_update(update_id, chat_id, self.router.encode(name, slug), message_id=chat_id)
+
+
+def percentiles(samples):
+    return [float(value) * 1000 for value in np.percentile(samples, [50, 95, 99])]
+
+
+def compare_with_baseline(results, path, tolerance):
+    """Print deltas against a saved run; True when latency or throughput regressed"""
+    with open(path) as f:
+        baseline = json.load(f)
+
+    regressed = False
+    print(f"\nvs {path}:")
+    for name, old, new, higher_is_worse in (
+        ("p95 ms", baseline["all"]["p95_ms"], results["all"]["p95_ms"], True),
+        ("actions/sec", baseline["throughput"], results["throughput"], False),
+    ):
+        change = (new - old) / old if old else 0.0
+        worse = change > tolerance if higher_is_worse else change < -tolerance
+        regressed = regressed or worse
+        print(f"  {name:<12}{old:>10,.1f} -> {new:>10,.1f} ({change:+.1%}){'  REGRESSION' if worse else ''}")
+    return regressed
+
+
+async def main(actions, users, latency_ms, error_rate, throttle_rate):
+    telegram, telegram_url = start_fake_telegram()
+    telegram_root = telegram_url.removesuffix("/bot")
+    opensea, opensea_root, publish_collections = start_fake_opensea(latency_ms / 1000, error_rate, throttle_rate)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The bot reads its configuration at import time
+        os.environ.update({
+            "TELEGRAM_TOKEN": TOKEN,
+            "TELEGRAM_BASE_URL": telegram_url,
+            "OPENSEA_API_KEY": "bench",
+            "OPENSEA_API_URL": f"{opensea_root}/api/v2",
+            "DATABASE_PATH": os.path.join(tmp, "bench.db"),
+        })
+        for key, value in UNTHROTTLED.items():
+            os.environ.setdefault(key, value)
+        logging.disable(logging.WARNING)
+        import nft_bot
+        publish_collections([*nft_bot.POPULAR_COLLECTIONS, *LONG_TAIL])
+
+        app = nft_bot.build_application()
+        errors = []
+
+        async def on_error(update, context):
+            errors.append(context.error)
+        app.add_error_handler(on_error)
+
+        await app.initialize()
+        await nft_bot.init_storage(app)
+        chat_ids = list(range(10000, 10000 + users))
+        for chat_id in chat_ids[int(users * FREE_USERS):]:
+            nft_bot.monetization.set_user_tier(chat_id, "premium")
+
+        workload = Workload(nft_bot.POPULAR_COLLECTIONS, nft_bot.router)
+        latencies = defaultdict(list)
+        telegram_before = await fetch_calls(telegram_root)
+        opensea_before = await fetch_calls(opensea_root)
+
+        async def virtual_user(index, chat_id):
+            """One user: the next action as soon as the bot has answered the previous one"""
+            # Seeded per user, so every run replays the same actions whatever the interleaving
+            rng = random.Random(chat_id)
+            for _ in range(actions // users + (index < actions % users)):
+                action, payload = workload.next(chat_id, rng)
+                update = Update.de_json(payload, app.bot)
+                started = time.perf_counter()
+                await app.process_update(update)
+                latencies[action].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[virtual_user(index, chat_id) for index, chat_id in enumerate(chat_ids)])
+        elapsed = time.perf_counter() - started
+
+        telegram_calls = await fetch_calls(telegram_root)
+        opensea_calls = await fetch_calls(opensea_root)
+        stats_cache = nft_bot.stats_cache.counters()
+        client = nft_bot.opensea.counters()
+        quota_rejections = nft_bot.monetization.quota_rejections
+
+        await app.shutdown()
+        await nft_bot.shutdown_clients(app)
+
+    telegram.terminate()
+    opensea.terminate()
+
+    def delta(after, before, key):
+        return after.get(key, 0) - before.get(key, 0)
+
+    upstream = delta(opensea_calls, opensea_before, "stats")
+    telegram_total = sum(delta(telegram_calls, telegram_before, key) for key in telegram_calls)
+    results = {"actions": actions, "users": users, "throughput": actions / elapsed, "actions_by_kind": {}}
+
+    print(f"{actions} actions by {users} users ({FREE_USERS:.0%} free), OpenSea {latency_ms:g}ms, "
+          f"{error_rate:.1%} errors, {throttle_rate:.1%} 429s, {os.cpu_count()} CPUs")
+    print(f"{'action':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for action in [*ACTION_MIX, "all"]:
+        samples = [s for samples in latencies.values() for s in samples] if action == "all" else latencies[action]
+        if not samples:
+            continue
+        p50, p95, p99 = percentiles(samples)
+        row = {"count": len(samples), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+        if action == "all":
+            results["all"] = row
+        else:
+            results["actions_by_kind"][action] = row
+        print(f"{action:<16}{len(samples):>7}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+
+    results.update({
+        "opensea_per_action": upstream / actions,
+        "telegram_per_action": telegram_total / actions,
+        "handler_errors": len(errors),
+    })
+    print(f"throughput:      {results['throughput']:,.0f} actions/sec ({elapsed:.2f}s)")
+    print(f"OpenSea:         {upstream / actions:.3f} stats calls per action "
+          f"({upstream} served, {delta(opensea_calls, opensea_before, 'stats_500')} 500s, "
+          f"{delta(opensea_calls, opensea_before, 'stats_429')} 429s; client retried {client['retried']})")
+    print(f"Telegram:        {telegram_total / actions:.2f} calls per action "
+          f"({', '.join(f'{key} {delta(telegram_calls, telegram_before, key)}' for key in sorted(telegram_calls))})")
+    print(f"stats cache:     {stats_cache}")
+    print(f"quota rejected:  {quota_rejections}; handler errors: {len(errors)}")
+
+    if os.getenv("BENCH_SAVE"):
+        with open(os.getenv("BENCH_SAVE"), "w") as f:
+            json.dump(results, f, indent=2)
+    if os.getenv("BENCH_BASELINE"):
+        if compare_with_baseline(results, os.getenv("BENCH_BASELINE"), float(os.getenv("BENCH_TOLERANCE", "0.1"))):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    actions = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 80
+    error_rate = float(sys.argv[4]) if len(sys.argv) > 4 else 0.01
+    throttle_rate = float(sys.argv[5]) if len(sys.argv) > 5 else 0.02
+    asyncio.run(main(actions, users, latency_ms, error_rate, throttle_rate))
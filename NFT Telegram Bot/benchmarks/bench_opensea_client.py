@@ -0,0 +1,124 @@
+"""
+OpenSea client benchmark against the local fake OpenSea API
+Measures requests/sec through OpenSeaClient.get (rate limiter, circuit
+breaker and retries included), then checks the breaker: it opens after
+repeated 500s, one half-open probe closes it again, and a probe that never
+reports back (shed by the limiter, cancelled, or failing with an unexpected
+error) does not leave it stuck half-open
+
+Usage: python benchmarks/bench_opensea_client.py [requests] [concurrency]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+logging.disable(logging.INFO)
+
+from benchmarks.fake_opensea import FakeOpenSeaServer
+from utils.opensea_client import OpenSeaClient, OpenSeaUnavailable
+from utils.rate_limiter import CircuitBreaker
+
+STATS = "/collections/azuki/stats"
+
+
+def cool_down(client):
+    """Open the breaker with its reset timeout already elapsed: the next request is the probe"""
+    client.breaker.state = CircuitBreaker.OPEN
+    client.breaker.opened_at = time.monotonic() - client.breaker.reset_timeout
+
+
+async def check_breaker(fake, client):
+    fake.error_rate = 1.0
+    for _ in range(client.breaker.failure_threshold):
+        assert (await client.get(STATS)).status_code == 500
+    assert client.breaker.state == CircuitBreaker.OPEN
+    try:
+        await client.get(STATS)
+    except OpenSeaUnavailable:
+        pass
+    else:
+        raise AssertionError("expected the open breaker to shed")
+
+    fake.error_rate = 0.0
+    cool_down(client)
+    assert (await client.get(STATS)).status_code == 200
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    print("breaker:     ok (opens after 500s, sheds while open, closed by one probe)")
+
+
+async def check_stuck_probe(fake, client):
+    # Shed by the limiter before sending: the breaker is not consulted, so nothing is held
+    cool_down(client)
+    client.limiter.tokens = -client.limiter.rate * 10
+    try:
+        await client.get(STATS, timeout=0.1)
+    except OpenSeaUnavailable:
+        pass
+    else:
+        raise AssertionError("expected the limiter to shed")
+    client.limiter.tokens = client.limiter.burst
+    assert (await client.get(STATS)).status_code == 200
+
+    # Cancelled mid-request (a handler timing out, shutdown)
+    cool_down(client)
+    fake.latency = 0.5
+    probe = asyncio.create_task(client.get(STATS))
+    await asyncio.sleep(0.05)
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    probe.cancel()
+    await asyncio.gather(probe, return_exceptions=True)
+    fake.latency = 0.0
+    assert (await client.get(STATS)).status_code == 200
+
+    # An error that is neither a transport error nor a timeout (a control character in a slug)
+    cool_down(client)
+    try:
+        await client.get("/collections/azu\x00ki/stats")
+    except httpx.InvalidURL:
+        pass
+    else:
+        raise AssertionError("expected the invalid URL to raise")
+    assert (await client.get(STATS)).status_code == 200
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    print("stuck probe: ok (limiter shed, cancellation and unexpected errors free the probe)")
+
+
+async def bench(client, requests, concurrency):
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            assert (await client.get(STATS)).status_code == 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    print(f"get:         {requests / elapsed:>10,.0f} requests/sec ({concurrency} concurrent, "
+          f"{client.counters()['shed']} shed)")
+
+
+async def main(requests, concurrency):
+    fake = FakeOpenSeaServer()
+    await fake.start()
+    fake.add_collections(["azuki"])
+    client = OpenSeaClient(base_url=fake.base_url, rate_limit=100000, burst=100000, max_retries=0)
+    try:
+        await check_breaker(fake, client)
+        await check_stuck_probe(fake, client)
+        await bench(client, requests, concurrency)
+    finally:
+        await client.close()
+        await fake.stop()
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(requests, concurrency))
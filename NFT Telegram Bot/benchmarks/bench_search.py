@@ -0,0 +1,120 @@
+"""
+Collection search benchmark: trigram/prefix index vs linear scan
+Builds a synthetic registry of OpenSea-like names and times /search queries
+(exact, prefix and misspelled) against the index and the old substring scan,
+after checking that queries inside a word still find what the scan found
+
+Usage: python benchmarks/bench_search.py [collections] [queries]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.search_index import SearchIndex
+
+POPULAR = {
+    "boredapeyachtclub": "Bored Ape Yacht Club",
+    "cryptopunks": "CryptoPunks",
+    "azuki": "Azuki",
+    "doodles-official": "Doodles",
+    "moonbirds": "Moonbirds",
+    "clonex": "CloneX",
+    "murakami-flowers": "Murakami Flowers",
+    "proof-moonbirds": "Proof Moonbirds",
+    "wassies": "Wassies",
+    "goblintown": "GoblinTown",
+    "mutant-ape-yacht-club": "Mutant Ape Yacht Club",
+    "otherdeed": "Otherdeed"
+}
+
+WORDS = (
+    "ape bored yacht club punk crypto pixel moon bird cat dog frog dragon cyber world genesis pass "
+    "kid doodle azuki clone goblin town wassie flower otherdeed mutant bear bull robot alien ghost "
+    "samurai ninja wizard pepe lizard shark whale meta verse land deed key chain block art gallery"
+).split()
+
+
+def make_collections(count, rng):
+    syllables = ["ka", "zu", "mo", "ri", "to", "shi", "ne", "po", "la", "vi", "xo", "qu", "be", "da"]
+    vocabulary = WORDS + ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(5000)]
+    collections = {}
+    for i in range(count):
+        name = " ".join(rng.choice(vocabulary).capitalize() for _ in range(rng.randint(1, 4)))
+        collections[f"{name.lower().replace(' ', '-')}-{i}"] = name
+    collections.update(POPULAR)
+    return collections
+
+
+def misspell(text, rng):
+    """Drop, swap or replace one character"""
+    i = rng.randrange(len(text) - 1)
+    edit = rng.choice(("drop", "swap", "replace"))
+    if edit == "drop":
+        return text[:i] + text[i + 1:]
+    if edit == "swap":
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text[:i] + rng.choice("aeiourstn") + text[i + 1:]
+
+
+def linear_scan(collections, term, limit=8):
+    """The original /search: substring match over every name and slug"""
+    term = term.lower()
+    results = []
+    for slug, name in collections.items():
+        if term in name.lower() or term in slug.lower():
+            results.append((slug, name))
+    return results[:limit]
+
+
+def check_substrings():
+    # The old scan matched anywhere in a name, so "punk" found CryptoPunks
+    index = SearchIndex(POPULAR, POPULAR)
+    for query in ("punk", "bird", "lone", "ach", "unks", "oodle"):
+        expected = {slug for slug, _ in linear_scan(POPULAR, query)}
+        found = {slug for slug, _ in index.search(query)}
+        assert expected and expected <= found, f"{query!r}: expected {sorted(expected)}, got {sorted(found)}"
+    print("mid-word:    ok (queries inside a word find what the linear scan found)")
+
+
+def run(name, search, queries, expected):
+    started = time.perf_counter()
+    results = [search(query) for query in queries]
+    elapsed = time.perf_counter() - started
+    found = sum(1 for result, slug in zip(results, expected) if slug in [s for s, _ in result])
+    print(f"{name:12} {elapsed / len(queries) * 1e6:>9,.1f} us/query   "
+          f"target in results: {found / len(queries):>6.1%}")
+
+
+def main(count, query_count):
+    check_substrings()
+    rng = random.Random(7)
+    collections = make_collections(count, rng)
+
+    started = time.perf_counter()
+    index = SearchIndex(collections, POPULAR)
+    print(f"{len(collections):,} collections, index built in {time.perf_counter() - started:.2f}s")
+
+    targets = [rng.choice(list(POPULAR)) if rng.random() < 0.5 else rng.choice(list(collections))
+               for _ in range(query_count)]
+    names = [collections[slug].lower() for slug in targets]
+
+    mixes = {
+        "exact": names,
+        "prefix": [name[:max(4, len(name) // 2)] for name in names],
+        "misspelled": [misspell(name, rng) if len(name) > 4 else name for name in names],
+    }
+    for mix, queries in mixes.items():
+        print(f"-- {mix} ({query_count} queries)")
+        run("linear scan", lambda q: linear_scan(collections, q), queries, targets)
+        run("index", lambda q: index.search(q), queries, targets)
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    )
@@ -0,0 +1,92 @@
+"""
+Sharded deployment benchmark: one process vs a supervisor with N workers
+Feeds updates from the local fake Bot API through the supervisor's long
+polling loop to workers running a CPU-bound handler, reports updates/sec
+per worker count and checks that every chat's updates were handled in order
+
+Usage: python benchmarks/bench_sharding.py [updates] [handler_ms] [max workers]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import functools
+import multiprocessing
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from telegram.ext import ApplicationBuilder, CommandHandler
+
+from benchmarks.bench_updates import TOKEN, start_fake_telegram
+from benchmarks.fake_telegram import command_update
+from utils.sharding import serve_supervisor
+from utils.webhook import serve_webhook
+from utils.update_processor import ChatOrderedProcessor
+
+
+def run_bench_worker(base_url, handler_ms, done):
+    """Worker process: handle /start with `handler_ms` of CPU work, report (chat, update id) when done"""
+    async def handler(update, context):
+        deadline = time.perf_counter() + handler_ms / 1000
+        while time.perf_counter() < deadline:  # stand-in for formatting and chart rendering
+            pass
+        await update.message.reply_text("ok")
+        done.put((update.effective_chat.id, update.update_id))
+
+    app = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .base_url(base_url)
+        .concurrent_updates(ChatOrderedProcessor(64))
+        .build()
+    )
+    app.add_handler(CommandHandler("start", handler))
+    asyncio.run(serve_webhook(app))
+
+
+async def bench(workers, updates, handler_ms):
+    payloads = [command_update(i + 1, 1000 + i % 200, "start") for i in range(updates)]
+    fake, base_url = start_fake_telegram(payloads)
+    done = multiprocessing.get_context("spawn").Queue()
+    target = functools.partial(run_bench_worker, base_url, handler_ms, done)
+
+    stop_event = asyncio.Event()
+    supervisor = asyncio.create_task(
+        serve_supervisor(target, TOKEN, 'polling', base_url, workers=workers, stop_event=stop_event)
+    )
+
+    # The clock starts at the first handled update, so worker start-up isn't measured
+    loop = asyncio.get_running_loop()
+    handled = [await loop.run_in_executor(None, done.get)]
+    started = time.perf_counter()
+    while len(handled) < updates:
+        handled.append(await loop.run_in_executor(None, done.get))
+    elapsed = time.perf_counter() - started
+
+    stop_event.set()
+    await supervisor
+    fake.terminate()
+
+    by_chat = defaultdict(list)
+    for chat_id, update_id in handled:
+        by_chat[chat_id].append(update_id)
+    assert all(ids == sorted(ids) for ids in by_chat.values()), "a chat's updates were handled out of order"
+    return (updates - 1) / elapsed
+
+
+async def main(updates, handler_ms, max_workers):
+    print(f"{updates} updates, {handler_ms}ms CPU per update, {os.cpu_count()} CPUs")
+    baseline = None
+    for workers in sorted({1, *range(2, max_workers + 1, 2), max_workers}):
+        rate = await bench(workers, updates, handler_ms)
+        baseline = baseline or rate
+        print(f"{workers:>2} workers: {rate:>8,.0f} updates/sec ({rate / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    handler_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    asyncio.run(main(updates, handler_ms, max_workers))
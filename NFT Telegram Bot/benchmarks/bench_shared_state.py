@@ -0,0 +1,133 @@
+"""
+Shared state and sharding benchmark
+Measures round trips through the in-process RESP server (single commands and
+pipelined quota counters) and checks what the sharded deployment relies on:
+RESP round trips, TTLs and the fallback when the backend is down, chat
+routing, and how Supervisor.worker_env splits the global rate limits
+
+Usage: python benchmarks/bench_shared_state.py [operations]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+logging.disable(logging.INFO)
+
+from benchmarks.fake_telegram import command_update, callback_update, user
+from utils.resp_server import RespServer
+from utils.shared_state import RedisBackend, SharedStatsCache, SharedStateUnavailable, create_backend
+from utils.sharding import Supervisor, routing_key, shard_for
+
+
+def check_routing():
+    # Messages and button taps of one chat go to the same worker
+    assert routing_key(command_update(1, 42, "floor", ["azuki"])) == 42
+    assert routing_key(callback_update(2, 42, "f:azuki")) == 42
+    inline = {"update_id": 3, "inline_query": {"id": "1", "from": user(7), "query": "ape", "offset": ""}}
+    assert routing_key(inline) == 7
+    assert routing_key({"update_id": 9}) == 9
+
+    # crc32, not hash(): pinned values, since every process (and every restart) must agree
+    assert [shard_for(chat_id, 4) for chat_id in (1, 42, -100123)] == [3, 0, 1]
+    assert [shard_for(chat_id, 7) for chat_id in (1, 42, -100123)] == [2, 3, 0]
+    assert shard_for(42, 1) == 0
+    spread = Counter(shard_for(chat_id, 4) for chat_id in range(100000, 140000))
+    assert min(spread.values()) > 0.9 * 10000, f"uneven shards: {dict(spread)}"
+    print(f"routing:     ok (40,000 chats over 4 shards: {sorted(spread.values())})")
+
+
+def check_worker_env():
+    limits = ('SEND_GLOBAL_RATE', 'SEND_GLOBAL_BURST', 'OPENSEA_RATE_LIMIT', 'OPENSEA_BURST')
+    saved = {key: os.environ.pop(key, None) for key in limits}  # check against the defaults
+    try:
+        supervisor = Supervisor(target=None, workers=3, base_port=9000, shared_url="redis://127.0.0.1:1")
+        env = [supervisor.worker_env(index) for index in range(3)]
+    finally:
+        os.environ.update({key: value for key, value in saved.items() if value is not None})
+
+    assert [e['SHARD_INDEX'] for e in env] == ['0', '1', '2']
+    assert [e['PORT'] for e in env] == ['9000', '9001', '9002']
+    assert len({e['WEBHOOK_SECRET'] for e in env}) == 1
+    # The workers' shares add up to the bot's global limits (30 msg/s to Telegram, 4 req/s to OpenSea)
+    assert abs(sum(float(e['SEND_GLOBAL_RATE']) for e in env) - 30) < 1e-9
+    assert abs(sum(float(e['OPENSEA_RATE_LIMIT']) for e in env) - 4) < 1e-9
+    assert all(int(e['OPENSEA_BURST']) >= 1 for e in env)
+    print(f"worker env:  ok (3 workers get {float(env[0]['SEND_GLOBAL_RATE']):g} msg/s and "
+          f"{float(env[0]['OPENSEA_RATE_LIMIT']):.2f} req/s each)")
+
+
+async def check_round_trip(backend):
+    assert await backend.get("missing") is None
+    await backend.set("key", "value")
+    assert await backend.get("key") == b"value"
+    assert await backend.incr_many([("count", 2, 60), ("count", 3, 60), ("other", 1, None)]) == [2, 5, 1]
+    assert await backend.delete("key") and not await backend.delete("key")
+
+    await backend.set("short", "lived", ttl=0.05)
+    await asyncio.sleep(0.1)
+    assert await backend.get("short") is None
+
+    cache = SharedStatsCache(backend, ttl=60)
+    await cache.set("azuki", {"floor_price": 5.5})
+    assert await cache.get("azuki") == {"floor_price": 5.5}
+    assert await cache.get("doodles-official") is None
+    print("round trip:  ok (get/set/incr/delete, expiry, stats cache)")
+
+
+async def check_unavailable():
+    backend = RedisBackend("127.0.0.1", 1, timeout=0.2)  # nothing listens on port 1
+    try:
+        await backend.get("key")
+    except SharedStateUnavailable:
+        pass
+    else:
+        raise AssertionError("expected SharedStateUnavailable")
+
+    # Workers read through the cache, which treats an outage as a miss
+    cache = SharedStatsCache(backend, ttl=60)
+    assert await cache.get("azuki") is None and cache.errors == 1
+    print("unavailable: ok (errors surface as SharedStateUnavailable, cache falls back)")
+
+
+async def bench(backend, operations):
+    started = time.perf_counter()
+    for i in range(operations):
+        await backend.get(f"stats:collection-{i % 100}")
+    single = operations / (time.perf_counter() - started)
+
+    # What monetization.charge sends per query: the day and hour counters in one round trip
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        backend.incr_many([(f"quota:{i}:day", 1, 172800), (f"quota:{i}:hour", 1, 7200)])
+        for i in range(operations)
+    ])
+    pipelined = operations / (time.perf_counter() - started)
+    print(f"get:         {single:>10,.0f} ops/sec (sequential)")
+    print(f"quota charge:{pipelined:>10,.0f} ops/sec (concurrent, {backend.pool_size} connections)")
+
+
+async def main(operations):
+    check_routing()
+    check_worker_env()
+
+    server = RespServer(port=0)
+    await server.start()
+    backend = create_backend(server.url)
+    try:
+        await check_round_trip(backend)
+        await check_unavailable()
+        await bench(backend, operations)
+    finally:
+        await backend.close()
+        await server.stop()
+
+
+if __name__ == '__main__':
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    asyncio.run(main(operations))
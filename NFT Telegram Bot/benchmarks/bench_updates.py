@@ -0,0 +1,136 @@
+"""
+Update intake benchmark: long polling vs webhook mode
+Runs a real python-telegram-bot Application against the local fake Bot
+API and reports updates/sec for both intake modes. The fake API and the
+update poster run in their own processes so they don't share the bot's
+event loop
+
+Usage: python benchmarks/bench_updates.py [updates] [handler_ms] [concurrent_updates] [posters]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from telegram.ext import ApplicationBuilder, CommandHandler
+
+from benchmarks.fake_telegram import FakeTelegramServer, command_update, post_updates
+from utils.webhook import WebhookServer
+
+TOKEN = "123456:bench"
+
+
+def serve_fake_telegram(ready, updates):
+    """Child process: run the fake Bot API with `updates` queued for getUpdates"""
+    async def main():
+        fake = FakeTelegramServer(TOKEN)
+        await fake.start()
+        fake.push(updates)
+        ready.put(fake.server.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def run_poster(port, payloads, posters):
+    """Child process: post updates to the webhook like Telegram does"""
+    asyncio.run(post_updates("127.0.0.1", port, "/telegram", payloads, posters, secret_token="bench"))
+
+
+def start_fake_telegram(updates=()):
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    process = context.Process(target=serve_fake_telegram, args=(ready, list(updates)), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{ready.get()}/bot"
+
+
+def build_app(base_url, handler_ms, concurrent_updates, total, done):
+    processed = 0
+
+    async def handler(update, context):
+        nonlocal processed
+        await asyncio.sleep(handler_ms / 1000)  # stand-in for handler work (cache lookup, formatting)
+        await update.message.reply_text("ok")
+        processed += 1
+        if processed == total:
+            done.set()
+
+    app = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .base_url(base_url)
+        .concurrent_updates(concurrent_updates)
+        .connection_pool_size(256)
+        .build()
+    )
+    app.add_handler(CommandHandler("start", handler))
+    return app
+
+
+def make_updates(updates):
+    return [command_update(i + 1, 1000 + i % 500, "start") for i in range(updates)]
+
+
+async def bench_polling(updates, handler_ms, concurrent_updates):
+    fake, base_url = start_fake_telegram(make_updates(updates))
+    done = asyncio.Event()
+    app = build_app(base_url, handler_ms, concurrent_updates, updates, done)
+
+    await app.initialize()
+    await app.start()
+    started = time.perf_counter()
+    await app.updater.start_polling(poll_interval=0, timeout=1)
+    await done.wait()
+    elapsed = time.perf_counter() - started
+
+    await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
+    fake.terminate()
+    return updates / elapsed
+
+
+async def bench_webhook(updates, handler_ms, concurrent_updates, posters):
+    fake, base_url = start_fake_telegram()
+    done = asyncio.Event()
+    app = build_app(base_url, handler_ms, concurrent_updates, updates, done)
+    server = WebhookServer(app, host="127.0.0.1", port=0, path="/telegram", secret_token="bench")
+
+    await app.initialize()
+    await app.start()
+    await server.start()
+
+    poster = multiprocessing.get_context("spawn").Process(
+        target=run_poster, args=(server.server.port, make_updates(updates), posters), daemon=True
+    )
+    started = time.perf_counter()
+    poster.start()
+    await done.wait()
+    elapsed = time.perf_counter() - started
+
+    poster.join()
+    await server.stop()
+    await app.stop()
+    await app.shutdown()
+    fake.terminate()
+    return updates / elapsed
+
+
+async def main(updates, handler_ms, concurrent_updates, posters):
+    print(f"{updates} updates, {handler_ms}ms handler, concurrent_updates={concurrent_updates}, {os.cpu_count()} CPUs")
+    print(f"polling: {await bench_polling(updates, handler_ms, concurrent_updates):>10,.0f} updates/sec")
+    print(f"webhook: {await bench_webhook(updates, handler_ms, concurrent_updates, posters):>10,.0f} updates/sec "
+          f"({posters} connections)")
+
+
+if __name__ == '__main__':
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    handler_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    concurrent_updates = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+    posters = int(sys.argv[4]) if len(sys.argv) > 4 else 40
+    asyncio.run(main(updates, handler_ms, concurrent_updates, posters))
@@ -0,0 +1,167 @@
+"""
+Local stand-in for the OpenSea API
+Serves collection stats and events (newest first with keyset page cursors,
+the way the real endpoint pages), builds realistic sale/listing payloads,
+and can add latency, server errors and 429s to every response
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.http_server import HTTPServer, Response, json_response
+
+API_PREFIX = "/api/v2"
+
+
+def sale_event(seq, ts, token_id, price_wei):
+    return {
+        "event_type": "sale",
+        "event_timestamp": ts,
+        "transaction": f"0x{seq:064x}",
+        "order_hash": f"0x{seq:064x}",
+        "nft": {"identifier": str(token_id), "contract": "0x" + "ab" * 20},
+        "payment": {"quantity": str(price_wei), "decimals": 18, "symbol": "ETH"},
+        "seller": "0x" + "11" * 20,
+        "buyer": "0x" + "22" * 20,
+    }
+
+
+def listing_event(seq, ts, token_id, price_wei):
+    return {
+        "event_type": "order",
+        "order_type": "listing",
+        "event_timestamp": ts,
+        "order_hash": f"0x{seq:064x}",
+        "asset": {"identifier": str(token_id), "contract": "0x" + "ab" * 20},
+        "payment": {"quantity": str(price_wei), "decimals": 18, "symbol": "ETH"},
+        "maker": "0x" + "11" * 20,
+    }
+
+
+def make_events(count, start_seq=0, newest_ts=None, spacing=1.0):
+    """Build `count` alternating-ish sales and listings, one every `spacing` seconds up to newest_ts"""
+    newest_ts = int(newest_ts or time.time())
+    events = []
+    for i in range(count):
+        seq = start_seq + i
+        ts = newest_ts - int((count - 1 - i) * spacing)
+        build = sale_event if random.random() < 0.4 else listing_event
+        events.append(build(seq, ts, random.randrange(10000), random.randrange(10 ** 17, 10 ** 19)))
+    return events
+
+
+def collection_stats(seed):
+    """A `total` stats block with plausible magnitudes, stable for a seed"""
+    rng = random.Random(seed)
+    floor = round(rng.uniform(0.01, 40), 4)
+    sales = rng.randrange(100, 200000)
+    supply = rng.choice([1000, 3333, 5000, 8888, 10000])
+    return {
+        "volume": round(floor * sales * rng.uniform(0.8, 3), 2),
+        "sales": sales,
+        "average_price": round(floor * rng.uniform(1, 2), 4),
+        "num_owners": rng.randrange(supply // 4, supply),
+        "market_cap": round(floor * supply, 2),
+        "floor_price": floor,
+        "floor_price_symbol": "ETH",
+        "total_supply": supply,
+    }
+
+
+class FakeOpenSeaServer:
+    """Fake API; `latency` (seconds, +/- `jitter` as a fraction) delays every response, and
+    `error_rate` / `throttle_rate` are the shares answered with a 500 or a 429 + Retry-After"""
+
+    def __init__(self, host="127.0.0.1", port=0, max_page=50, latency=0.0, jitter=0.5,
+                 error_rate=0.0, throttle_rate=0.0, retry_after=1):
+        self.server = HTTPServer(host, port)
+        self.max_page = max_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.events = {}  # slug -> [event], oldest first
+        self.stats = {}  # slug -> total stats block
+        self.calls = Counter()
+        self.server.route("GET", "/calls", self._calls_handler)
+
+    @property
+    def base_url(self):
+        return f"http://{self.server.host}:{self.server.port}{API_PREFIX}"
+
+    async def start(self):
+        await self.server.start()
+
+    async def stop(self):
+        await self.server.stop()
+
+    def add_collections(self, slugs):
+        """Serve stats for these collections; other slugs get a 404 like unknown ones do"""
+        for slug in slugs:
+            if slug not in self.stats:
+                self.server.route("GET", f"{API_PREFIX}/collections/{slug}/stats", self._stats_handler(slug))
+            self.stats[slug] = collection_stats(slug)
+
+    def add_events(self, slug, events):
+        """Publish events for a collection (routes are exact paths, so each slug gets its own)"""
+        if slug not in self.events:
+            self.events[slug] = []
+            self.server.route("GET", f"{API_PREFIX}/events/collection/{slug}", self._events_handler(slug))
+        self.events[slug].extend(events)
+        # Same order OpenSea keeps: by time, then by arrival
+        self.events[slug].sort(key=lambda event: event["event_timestamp"])
+
+    async def _fault(self, endpoint):
+        """Apply the configured latency; returns the error response to send instead, if any"""
+        self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+        roll = random.random()
+        if roll < self.throttle_rate:
+            self.calls[f"{endpoint}_429"] += 1
+            return json_response({"detail": "Request was throttled."}, 429, {"Retry-After": str(self.retry_after)})
+        if roll < self.throttle_rate + self.error_rate:
+            self.calls[f"{endpoint}_500"] += 1
+            return Response(500, "Internal Server Error")
+        return None
+
+    async def _calls_handler(self, request):
+        return json_response(dict(self.calls))
+
+    def _stats_handler(self, slug):
+        async def handler(request):
+            return await self._fault("stats") or json_response({"total": self.stats[slug], "intervals": []})
+        return handler
+
+    def _events_handler(self, slug):
+        async def handler(request):
+            failure = await self._fault("events")
+            if failure:
+                return failure
+            limit = min(int(request.query.get("limit", self.max_page)), self.max_page)
+            after = int(request.query.get("after", 0))
+            events = self.events[slug]
+
+            # Keyset cursor: the position of the next (older) event, stable while new events arrive
+            end = len(events)
+            cursor = request.query.get("next")
+            if cursor:
+                try:
+                    end = int(cursor)
+                except ValueError:
+                    return json_response({"errors": ["invalid cursor"]}, 400)
+
+            start = end
+            while start > 0 and end - start < limit and events[start - 1]["event_timestamp"] > after:
+                start -= 1
+            page = events[start:end][::-1]
+            more = start > 0 and events[start - 1]["event_timestamp"] > after
+            return json_response({"asset_events": page, "next": str(start) if more else None})
+        return handler
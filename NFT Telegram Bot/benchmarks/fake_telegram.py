@@ -0,0 +1,189 @@
+"""
+Local stand-in for the Telegram Bot API
+Answers the methods the bot uses, serves queued updates to getUpdates
+and builds realistic update payloads for benchmarks
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+from collections import Counter, deque
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.http_server import HTTPServer, json_response
+
+BOT_USER = {"id": 100000, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+
+def user(user_id):
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+
+def command_update(update_id, chat_id, command, args=()):
+    """Build a private-chat message update for `/command args...`"""
+    text = " ".join([f"/{command}", *args])
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": user(chat_id),
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command) + 1}],
+        },
+    }
+
+
+def callback_update(update_id, chat_id, data, message_id=1):
+    """Build a callback query update for a button on one of the bot's messages"""
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": user(chat_id),
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": "menu",
+            },
+        },
+    }
+
+
+async def post_updates(host, port, path, payloads, connections=40, secret_token=None):
+    """Fake Telegram update poster: deliver payloads over keep-alive connections in parallel
+
+    Like Telegram, each connection waits for the response before posting its
+    next update. Returns the HTTP status codes received.
+    """
+    extra = f"X-Telegram-Bot-Api-Secret-Token: {secret_token}\r\n" if secret_token else ""
+    statuses = []
+
+    async def deliver(chunk):
+        reader, writer = await asyncio.open_connection(host, port)
+        for payload in chunk:
+            body = json.dumps(payload).encode()
+            writer.write(
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"{extra}Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            statuses.append(status)
+        writer.close()
+
+    await asyncio.gather(*[deliver(payloads[i::connections]) for i in range(connections)])
+    return statuses
+
+
+class FakeTelegramServer:
+    def __init__(self, token="123456:bench", host="127.0.0.1", port=0):
+        self.token = token
+        self.server = HTTPServer(host, port)
+        self.pending = deque()
+        self._new_updates = asyncio.Event()
+        self._message_id = 0
+        self.calls = Counter()
+
+        methods = {
+            "getMe": self.get_me,
+            "getUpdates": self.get_updates,
+            "setWebhook": self.ok,
+            "deleteWebhook": self.ok,
+            "answerCallbackQuery": self.ok,
+            "sendMessage": self.send_message,
+            "editMessageText": self.send_message,
+        }
+        for name, handler in methods.items():
+            self.server.route("POST", f"/bot{token}/{name}", self._counted(name, handler))
+        self.server.route("GET", "/calls", self._calls_handler)
+
+    @property
+    def base_url(self):
+        return f"http://{self.server.host}:{self.server.port}/bot"
+
+    async def start(self):
+        await self.server.start()
+
+    async def stop(self):
+        await self.server.stop()
+
+    def push(self, updates):
+        """Queue updates for getUpdates"""
+        self.pending.extend(updates)
+        self._new_updates.set()
+
+    def _counted(self, name, handler):
+        async def wrapper(request):
+            self.calls[name] += 1
+            return await handler(request, self._params(request))
+        return wrapper
+
+    @staticmethod
+    def _params(request):
+        if request.headers.get("content-type", "").startswith("application/json"):
+            return request.json() or {}
+        params = {}
+        for key, values in parse_qs(request.body.decode()).items():
+            try:
+                params[key] = json.loads(values[-1])
+            except ValueError:
+                params[key] = values[-1]
+        return params
+
+    async def _calls_handler(self, request):
+        return json_response(dict(self.calls))
+
+    async def ok(self, request, params):
+        return json_response({"ok": True, "result": True})
+
+    async def get_me(self, request, params):
+        return json_response({"ok": True, "result": BOT_USER})
+
+    async def send_message(self, request, params):
+        self._message_id += 1
+        message = {
+            "message_id": params.get("message_id", self._message_id),
+            "date": int(time.time()),
+            "chat": {"id": params.get("chat_id", 0), "type": "private"},
+            "from": BOT_USER,
+            "text": str(params.get("text", "")),
+        }
+        return json_response({"ok": True, "result": message})
+
+    async def get_updates(self, request, params):
+        offset = int(params.get("offset", 0) or 0)
+        limit = int(params.get("limit", 100) or 100)
+        timeout = float(params.get("timeout", 0) or 0)
+
+        while self.pending and self.pending[0]["update_id"] < offset:
+            self.pending.popleft()
+
+        if not self.pending and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        batch = [self.pending[i] for i in range(min(limit, len(self.pending)))]
+        return json_response({"ok": True, "result": batch})
@@ -4,6 +4,8 @@ import logging
 from telegram.ext import Application
 from protection.license_manager import LicenseValidator
 from protection.tamper_detection import TamperDetector
+from railway_protection import BotProtection
+from utils.webhook import run_webhook
 
 class SecureBot:
     def __init__(self):
@@ -93,7 +95,10 @@ class SecureBot:
         heartbeat_thread.start()
         
         # Start bot
-        self.app.run_polling()
+        if os.getenv('BOT_MODE', 'polling').lower() == 'webhook':
+            run_webhook(self.app, BotProtection().check_health)
+        else:
+            self.app.run_polling()
     
     def license_heartbeat(self):
         """Regular license check"""
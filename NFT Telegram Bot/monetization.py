@@ -2,12 +2,41 @@
 Simple Monetization System for NFT Analytics Bot
 """
 
+import os
+import time
+
+from utils.shared_state import SharedStateUnavailable
+
+
+class QuotaState:
+    """Compact per-user quota state: a daily counter plus an hourly token bucket"""
+    __slots__ = ('day', 'daily_used', 'tokens', 'updated')
+    
+    def __init__(self, day, daily_used, tokens, updated):
+        self.day = day
+        self.daily_used = daily_used
+        self.tokens = tokens
+        self.updated = updated
+
+
 class NFTBotMonetization:
     def __init__(self):
         self.free_limits = {
             'daily_queries': 10,
             'collections': 12,  # Free users get 12 collections
-            'api_calls_per_hour': 30
+            'api_calls_per_hour': 30,
+            'alerts': 3,
+            'portfolio_items': 400,
+            # Each collection priced is an OpenSea call, and a wallet can hold hundreds
+            'portfolio_collections': int(os.getenv('PORTFOLIO_FREE_COLLECTIONS', '50')),
+            'watchlist': 5
+        }
+        
+        self.premium_limits = {
+            'alerts': 100,
+            'portfolio_items': 20000,
+            'portfolio_collections': None,
+            'watchlist': 100
         }
         
         self.premium_features = {
@@ -23,14 +52,184 @@ class NFTBotMonetization:
                 'Priority support'
             ]
         }
+        
+        # Paid tiers by user id, loaded from storage so tier checks stay in memory
+        self.user_tiers = {}
+        self.db = None
+        
+        # Free-tier quota state by user id; changed users are flushed to storage periodically
+        self.quotas = {}
+        self._dirty_quotas = set()
+        self.quota_rejections = 0
+        
+        # Counters shared by the workers of a sharded deployment (None when running alone)
+        self.shared = None
+    
+    async def attach_storage(self, db):
+        """Load paid tiers and today's quotas from storage and persist future changes there"""
+        self.db = db
+        self.user_tiers = await db.load_paid_tiers()
+        
+        for user_id, day, daily_used, tokens, updated in await db.load_quotas(self._today()):
+            self.quotas[user_id] = QuotaState(day, daily_used, tokens, updated)
+    
+    def attach_shared(self, backend):
+        """Count free-tier queries in a backend shared with the other workers"""
+        self.shared = backend
+    
+    def _today(self, now=None):
+        return int((now or time.time()) // 86400)
+    
+    def consume_query(self, user_id, cost=1):
+        """Charge `cost` queries to a user in O(1)
+        
+        Returns None when allowed, or 'daily' / 'hourly' naming the exhausted limit.
+        """
+        if user_id in self.user_tiers:
+            return None
+        
+        now = time.time()
+        today = self._today(now)
+        hourly_limit = self.free_limits['api_calls_per_hour']
+        
+        state = self.quotas.get(user_id)
+        if state is None:
+            state = self.quotas[user_id] = QuotaState(today, 0, hourly_limit, now)
+        elif state.day != today:
+            state.day = today
+            state.daily_used = 0
+        
+        # Refill the hourly bucket for the time elapsed since the last query
+        state.tokens = min(hourly_limit, state.tokens + (now - state.updated) * hourly_limit / 3600)
+        state.updated = now
+        
+        if state.daily_used + cost > self.free_limits['daily_queries']:
+            self.quota_rejections += 1
+            return 'daily'
+        if state.tokens < cost:
+            self.quota_rejections += 1
+            return 'hourly'
+        
+        state.daily_used += cost
+        state.tokens -= cost
+        self._dirty_quotas.add(user_id)
+        return None
+    
+    async def charge(self, user_id, cost=1):
+        """Charge `cost` queries to a user, across all workers when a shared backend is attached
+        
+        Returns None when allowed, or 'daily' / 'hourly' naming the exhausted limit.
+        Shared counters use a fixed hourly window instead of the token bucket;
+        if the backend is unreachable this worker counts on its own.
+        """
+        if self.shared is None or user_id in self.user_tiers:
+            return self.consume_query(user_id, cost)
+        
+        now = time.time()
+        today = self._today(now)
+        counters = [
+            (f"quota:{user_id}:day:{today}", cost, 2 * 86400),
+            (f"quota:{user_id}:hour:{int(now // 3600)}", cost, 2 * 3600)
+        ]
+        try:
+            daily_used, hourly_used = await self.shared.incr_many(counters)
+            reason = None
+            if daily_used > self.free_limits['daily_queries']:
+                reason = 'daily'
+            elif hourly_used > self.free_limits['api_calls_per_hour']:
+                reason = 'hourly'
+            if reason:
+                # Give the refused queries back
+                daily_used, _ = await self.shared.incr_many([(key, -cost, ttl) for key, _, ttl in counters])
+        except SharedStateUnavailable:
+            return self.consume_query(user_id, cost)
+        
+        # Mirror the shared count, so remaining_queries() stays right on this worker
+        state = self.quotas.get(user_id)
+        if state is None:
+            state = self.quotas[user_id] = QuotaState(today, 0, self.free_limits['api_calls_per_hour'], now)
+        state.day = today
+        state.daily_used = daily_used
+        
+        if reason:
+            self.quota_rejections += 1
+        return reason
+    
+    def remaining_queries(self, user_id):
+        """Queries a free user has left today"""
+        state = self.quotas.get(user_id)
+        if state is None or state.day != self._today():
+            return self.free_limits['daily_queries']
+        return max(0, self.free_limits['daily_queries'] - state.daily_used)
+    
+    def flush_quotas(self):
+        """Write changed quota state to storage in one batch and drop expired entries"""
+        today = self._today()
+        
+        if self.db and self._dirty_quotas:
+            rows = []
+            for user_id in self._dirty_quotas:
+                state = self.quotas.get(user_id)
+                if state is not None:
+                    rows.append((user_id, state.day, state.daily_used, state.tokens, state.updated))
+            self.db.save_quotas(rows)
+        self._dirty_quotas.clear()
+        
+        # Yesterday's counters no longer matter once persisted
+        expired = [user_id for user_id, state in self.quotas.items() if state.day != today]
+        for user_id in expired:
+            del self.quotas[user_id]
+    
+    async def flush_quotas_job(self, context):
+        """Job queue callback for periodic quota flushes"""
+        self.flush_quotas()
+    
+    def alert_limit(self, user_id):
+        """Maximum number of active price alerts for a user"""
+        limits = self.premium_limits if user_id in self.user_tiers else self.free_limits
+        return limits['alerts']
+    
+    def portfolio_limit(self, user_id):
+        """Maximum number of NFTs valued in one /portfolio request"""
+        limits = self.premium_limits if user_id in self.user_tiers else self.free_limits
+        return limits['portfolio_items']
+    
+    def portfolio_collections_limit(self, user_id):
+        """Maximum number of collections priced in one /portfolio request (None for no limit)"""
+        limits = self.premium_limits if user_id in self.user_tiers else self.free_limits
+        return limits['portfolio_collections']
+    
+    def watchlist_limit(self, user_id):
+        """Maximum number of collections on a user's watchlist"""
+        limits = self.premium_limits if user_id in self.user_tiers else self.free_limits
+        return limits['watchlist']
+    
+    def create_quota_message(self, reason):
+        """Create the message shown when a free user runs out of queries"""
+        if reason == 'hourly':
+            limit_text = f"You've reached the free limit of {self.free_limits['api_calls_per_hour']} queries per hour."
+        else:
+            limit_text = f"You've used all {self.free_limits['daily_queries']} free queries for today."
+        
+        return f"⏳ {limit_text}\n\n💎 Upgrade to Premium for unlimited queries: /premium"
+    
+    def set_user_tier(self, user_id, tier, expires_at=None):
+        """Change a user's subscription tier"""
+        if tier == 'free':
+            self.user_tiers.pop(user_id, None)
+        else:
+            self.user_tiers[user_id] = tier
+        
+        if self.db:
+            self.db.set_user_tier(user_id, tier, expires_at)
     
     def check_user_tier(self, user_id):
         """Check user's subscription tier"""
-        # In production, you'd check a database
-        # For now, everyone gets free access
+        tier = self.user_tiers.get(user_id, 'free')
+        
         return {
-            'tier': 'free',
-            'remaining_queries': self.free_limits['daily_queries'],
+            'tier': tier,
+            'remaining_queries': self.remaining_queries(user_id) if tier == 'free' else 'unlimited',
             'upgrade_url': 'https://your-payment-link.com/nft-bot-premium'
         }
     
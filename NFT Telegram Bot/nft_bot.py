@@ -1,18 +1,65 @@
 import os
-import requests
+import re
+import time
+import asyncio
 import logging
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, CallbackQueryHandler
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, CallbackQueryHandler, InlineQueryHandler
+from telegram.helpers import escape_markdown
+from telegram.error import BadRequest
 
 # Load environment variables
 load_dotenv()
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 OPENSEA_API_KEY = os.getenv("OPENSEA_API_KEY")
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+COMPARE_CONCURRENCY = int(os.getenv("COMPARE_CONCURRENCY", "8"))
+MAX_COMPARE_COLLECTIONS = 10
+QUOTA_FLUSH_INTERVAL = float(os.getenv("QUOTA_FLUSH_INTERVAL", "60"))
+ALERT_INTERVAL = float(os.getenv("ALERT_INTERVAL", "30"))
+WATCHLIST_INTERVAL = float(os.getenv("WATCHLIST_INTERVAL", "300"))
+RECENT_EVENTS = int(os.getenv("RECENT_EVENTS", "10"))
+EVENTS_RECENT_PAGES = int(os.getenv("EVENTS_RECENT_PAGES", "2"))
+INLINE_RESULTS = int(os.getenv("INLINE_RESULTS", "10"))
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "30"))
+INLINE_FETCH_TIMEOUT = float(os.getenv("INLINE_FETCH_TIMEOUT", "1.5"))
+PORTFOLIO_PAGE_SIZE = int(os.getenv("PORTFOLIO_PAGE_SIZE", "200"))
+PORTFOLIO_EDIT_INTERVAL = float(os.getenv("PORTFOLIO_EDIT_INTERVAL", "2"))
+TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL")
+# Sharded deployment: WORKERS > 1 runs a supervisor; it starts each worker with its SHARD_INDEX
+WORKERS = int(os.getenv("WORKERS", "1"))
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+IS_LEADER = SHARD_INDEX == 0  # runs the jobs that must happen once per deployment
+WALLET_ADDRESS = re.compile(r"^0x[0-9a-fA-F]{40}$")
 
 # Import protection and monetization
 from railway_protection import add_protection
 from monetization import NFTBotMonetization
+from utils.opensea_client import OpenSeaClient, REQUEST_SECONDS
+from utils.stats_cache import StatsCache
+from utils.singleflight import SingleFlight
+from utils.prefetch import PrefetchScheduler
+from utils.db_manager import DatabaseManager
+from utils.timeseries import SnapshotStore, HISTORY_RANGES
+from utils.analytics import AnalyticsEngine
+from utils.alerts import AlertEngine, ABOVE, BELOW
+from utils.watchlists import WatchlistStore
+from utils.events import EventIngestor
+from utils.webhook import run_webhook, serve_webhook
+from utils.update_processor import ChatOrderedProcessor
+from utils.callback_router import CallbackRouter
+from utils.keyboard_cache import KeyboardCache
+from utils.collection_registry import CollectionRegistry
+from utils.debounce import Debouncer
+from utils.render_cache import RenderCache
+from utils.send_queue import SendQueue, BULK
+from utils.metrics import REGISTRY, LoopLagMonitor, MetricsServer
+from utils.portfolio import stream_nft_pages, value_portfolio
+from utils.shared_state import create_backend, SharedStatsCache
+from utils.sharding import shard_for, run_supervisor
 
 # Setup logging
 logging.basicConfig(
@@ -21,14 +68,51 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize protection and monetization
+# Initialize protection, monetization and storage
 protection = add_protection()
 monetization = NFTBotMonetization()
+db = DatabaseManager()
+snapshots = SnapshotStore(db)
+analytics = AnalyticsEngine(snapshots)
+alert_engine = AlertEngine(id_offset=SHARD_INDEX, id_step=SHARD_COUNT)
+watchlists = WatchlistStore()
 
-headers = {
-    "Accept": "application/json",
-    "X-API-KEY": OPENSEA_API_KEY
-}
+# Shared async OpenSea client (one pooled keep-alive session for all handlers)
+opensea = OpenSeaClient(OPENSEA_API_KEY)
+
+# Stats cache shared by the floor/stats/volume/sales views of a collection
+stats_cache = StatsCache()
+
+# Concurrent lookups of one slug share a single in-flight OpenSea call
+stats_flight = SingleFlight()
+
+# Stats and quota counters shared with the other workers of a sharded deployment
+shared_backend = create_backend() if os.getenv("SHARED_CACHE_URL") else None
+shared_stats = SharedStatsCache(shared_backend) if shared_backend else None
+
+# Updates from different chats are handled concurrently, each chat's in order
+update_processor = ChatOrderedProcessor()
+
+# Inline button payloads -> handlers (routes are registered with the handlers below)
+router = CallbackRouter()
+
+# Inline keyboards are immutable, so built ones are shared across messages
+keyboards = KeyboardCache()
+
+# Every outgoing message is throttled per chat and globally; replies go before bulk sends
+outbox = SendQueue()
+
+# Rendered stats messages, reused until the cached stats they show change
+render_cache = RenderCache()
+
+# Each keystroke of an inline query supersedes the user's previous lookup
+inline_debouncer = Debouncer()
+
+# Handler latency and failures, event loop lag, and a local /metrics endpoint
+HANDLER_SECONDS = REGISTRY.histogram('nft_handler_seconds', 'Time spent handling one update', labels=('kind', 'name'))
+HANDLER_ERRORS = REGISTRY.counter('nft_handler_errors_total', 'Updates whose handler raised', labels=('kind', 'name'))
+loop_lag = LoopLagMonitor()
+metrics_server = MetricsServer()
 
 # Popular collections for quick access
 POPULAR_COLLECTIONS = {
@@ -46,30 +130,92 @@ POPULAR_COLLECTIONS = {
     "otherdeed": "Otherdeed"
 }
 
+# Every known collection (snapshot file + background refresh), searchable by name
+registry = CollectionRegistry(POPULAR_COLLECTIONS, opensea)
+registry.add_listener(keyboards.invalidate)
+registry.add_listener(render_cache.invalidate)
+registry.add_listener(router.register_slugs)
+
 # -------------------------------
 # FETCH FUNCTIONS
 # -------------------------------
 
-def fetch_collection_stats(collection: str):
-    """Fetch collection statistics from OpenSea API."""
-    url = f"https://api.opensea.io/api/v2/collections/{collection}/stats"
+async def fetch_from_opensea(collection: str):
+    """Fetch collection statistics from OpenSea and persist them."""
+    stats = await opensea.fetch_collection_stats(collection)
+    if stats is not None:
+        db.save_cached_stats(collection, stats)
+        snapshots.record(collection, stats)
+    return stats
+
+
+async def fetch_shared_or_opensea(collection: str):
+    """Fetch collection statistics another worker already has, else from OpenSea."""
+    if shared_stats is None:
+        return await fetch_from_opensea(collection)
     
-    try:
-        r = requests.get(url, headers=headers, timeout=10)
-        
-        if r.status_code != 200:
-            return None
-        
-        data = r.json()
-        
-        if "total" not in data:
-            return None
-        
-        return data["total"]
-        
-    except Exception as e:
-        logger.error(f"Error fetching {collection}: {e}")
-        return None
+    stats = await shared_stats.get(collection)
+    if stats is None:
+        stats = await fetch_from_opensea(collection)
+        if stats is not None:
+            await shared_stats.set(collection, stats)
+    return stats
+
+
+async def load_collection_stats(collection: str):
+    """Fetch collection statistics from OpenSea, coalescing concurrent lookups."""
+    return await stats_flight.do(collection, lambda: fetch_shared_or_opensea(collection))
+
+
+async def fetch_collection_stats(collection: str):
+    """Fetch collection statistics, served from the stats cache when possible."""
+    return await stats_cache.get(collection, load_collection_stats)
+
+
+async def fetch_many_stats(collections):
+    """Fetch stats for several collections concurrently, with bounded fan-out."""
+    semaphore = asyncio.Semaphore(COMPARE_CONCURRENCY)
+    
+    async def fetch_one(collection):
+        async with semaphore:
+            return await fetch_collection_stats(collection)
+    
+    results = await asyncio.gather(*[fetch_one(collection) for collection in collections])
+    return dict(zip(collections, results))
+
+
+# Keeps the popular collections warm so menu taps are answered from memory
+prefetcher = PrefetchScheduler(POPULAR_COLLECTIONS, load_collection_stats, stats_cache)
+prefetcher.add_listener(analytics.refresh)
+
+# Sales and listings of every collection someone follows, read incrementally into storage
+events_ingestor = EventIngestor(
+    opensea, db,
+    lambda: [*(POPULAR_COLLECTIONS if IS_LEADER else ()), *watchlists.slugs(), *alert_engine.slugs()]
+)
+
+# Component counters, exported alongside the histograms
+for prefix, component in (
+    ("nft_stats_cache", stats_cache),
+    ("nft_singleflight", stats_flight),
+    ("nft_opensea", opensea),
+    ("nft_prefetch", prefetcher),
+    ("nft_events", events_ingestor),
+    ("nft_db", db),
+    ("nft_alerts", alert_engine),
+    ("nft_watchlists", watchlists),
+    ("nft_updates", update_processor),
+    ("nft_callbacks", router),
+    ("nft_keyboard_cache", keyboards),
+    ("nft_render_cache", render_cache),
+    ("nft_send_queue", outbox),
+    ("nft_inline_debounce", inline_debouncer),
+    ("nft_registry", registry),
+):
+    REGISTRY.collect(prefix, component.counters)
+REGISTRY.collect("nft_quota", lambda: {'rejections_total': monetization.quota_rejections})
+if shared_stats:
+    REGISTRY.collect("nft_shared_cache", shared_stats.counters)
 
 
 def format_number(num):
@@ -90,31 +236,194 @@ def format_number(num):
         return str(num)
 
 
+def format_compact(num):
+    """Format a number in a short form (1.2K, 3.4M) for tables."""
+    if num is None:
+        return "N/A"
+    try:
+        num_float = float(num)
+    except (TypeError, ValueError):
+        return str(num)
+    for divisor, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(num_float) >= divisor:
+            return f"{num_float / divisor:.1f}{suffix}"
+    return format_number(num_float)
+
+
+def format_stats_table(stats_by_slug):
+    """Render stats for several collections as one monospace table."""
+    lines = [f"{'Collection':<14} {'Floor':>7} {'Volume':>7} {'Sales':>6}"]
+    
+    for slug, stats in stats_by_slug.items():
+        name = registry.name(slug)
+        name = name[:13] + "…" if len(name) > 14 else name
+        if not stats:
+            lines.append(f"{name:<14} {'unavailable':>22}")
+            continue
+        lines.append(
+            f"{name:<14} "
+            f"{format_compact(stats.get('floor_price')):>7} "
+            f"{format_compact(stats.get('volume')):>7} "
+            f"{format_compact(stats.get('sales')):>6}"
+        )
+    
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def sparkline(values):
+    """Render a list of numbers as a one-line unicode chart."""
+    values = [v for v in values if v is not None]
+    if not values:
+        return ""
+    bars = "▁▂▃▄▅▆▇█"
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return "".join(bars[int((v - low) / span * (len(bars) - 1))] for v in values)
+
+
+def format_seconds(seconds):
+    """Format a duration in seconds as milliseconds."""
+    if seconds is None:
+        return "N/A"
+    return f"{seconds * 1000:.0f}ms"
+
+
+def format_change(old, new):
+    """Format the percentage change between two values."""
+    if not old or new is None:
+        return "N/A"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def format_collection_stats(collection_slug, metric_type, stats):
+    """Render one metric view of a collection's stats as Markdown."""
+    display_name = registry.name(collection_slug)
+    
+    if metric_type == "floor":
+        floor_price = stats.get('floor_price', 'N/A')
+        text = (
+            f"🏷 *{display_name}*\n"
+            f"Floor Price: *{format_number(floor_price)} ETH*\n\n"
+            f"📊 Quick Stats:\n"
+            f"• Volume: {format_number(stats.get('volume'))} ETH\n"
+            f"• Sales: {format_number(stats.get('sales'))}\n"
+            f"• Owners: {format_number(stats.get('num_owners'))}\n\n"
+            f"🔗 [View on OpenSea](https://opensea.io/collection/{collection_slug})"
+        )
+    
+    elif metric_type == "stats":
+        text = (
+            f"📊 *{display_name} - Complete Stats*\n\n"
+            f"• Floor Price: {format_number(stats.get('floor_price'))} ETH\n"
+            f"• Total Volume: {format_number(stats.get('volume'))} ETH\n"
+            f"• Total Sales: {format_number(stats.get('sales'))}\n"
+            f"• Average Price: {format_number(stats.get('average_price'))} ETH\n"
+            f"• Market Cap: {format_number(stats.get('market_cap'))} ETH\n"
+            f"• Num Owners: {format_number(stats.get('num_owners'))}\n"
+            f"• Total Supply: {format_number(stats.get('total_supply'))}\n\n"
+            f"🔗 [View on OpenSea](https://opensea.io/collection/{collection_slug})"
+        )
+    
+    elif metric_type == "volume":
+        volume_eth = stats.get('volume', 0)
+        text = (
+            f"📦 *{display_name}*\n"
+            f"Total Volume: *{format_number(volume_eth)} ETH*\n\n"
+            f"📈 Other Metrics:\n"
+            f"• Floor: {format_number(stats.get('floor_price'))} ETH\n"
+            f"• Sales: {format_number(stats.get('sales'))}\n"
+            f"• Avg Price: {format_number(stats.get('average_price'))} ETH\n\n"
+            f"🔗 [View on OpenSea](https://opensea.io/collection/{collection_slug})"
+        )
+    
+    elif metric_type == "sales":
+        sales_count = stats.get('sales', 0)
+        text = (
+            f"🧾 *{display_name}*\n"
+            f"Total Sales: *{format_number(sales_count)}*\n\n"
+            f"💰 Trading Stats:\n"
+            f"• Volume: {format_number(stats.get('volume'))} ETH\n"
+            f"• Avg Price: {format_number(stats.get('average_price'))} ETH\n"
+            f"• Floor: {format_number(stats.get('floor_price'))} ETH\n\n"
+            f"🔗 [View on OpenSea](https://opensea.io/collection/{collection_slug})"
+        )
+    
+    else:
+        text = f"❌ Unknown metric type: {metric_type}"
+    
+    return text
+
+
+def render_collection_stats(collection_slug, metric_type, stats):
+    """Return the metric view, re-rendered only when the cached stats change."""
+    # Stats that aren't the cached object have no version and are always rendered
+    version = stats_cache.version(collection_slug) if stats_cache.peek(collection_slug) is stats else None
+    return render_cache.get(
+        collection_slug, metric_type, version,
+        lambda: format_collection_stats(collection_slug, metric_type, stats)
+    )
+
+
 # -------------------------------
 # KEYBOARD CREATION FUNCTIONS
 # -------------------------------
 
 def create_main_keyboard():
+    """Return the main menu keyboard (built once and shared)."""
+    return keyboards.get("main", build_main_keyboard, static=True)
+
+
+def create_back_keyboard():
+    """Return the single "Back to Main Menu" keyboard (built once and shared)."""
+    return keyboards.get("back", build_back_keyboard, static=True)
+
+
+def create_collections_keyboard():
+    """Return the popular collections keyboard (built once per registry version)."""
+    return keyboards.get("collections", build_collections_keyboard, static=True)
+
+
+def create_collection_options_keyboard(collection_slug):
+    """Return the options keyboard for a collection, memoized per slug."""
+    return keyboards.get(("options", collection_slug), lambda: build_collection_options_keyboard(collection_slug))
+
+
+def precompute_keyboards():
+    """Build the menus for the static collection set ahead of the first tap."""
+    create_main_keyboard()
+    create_back_keyboard()
+    create_collections_keyboard()
+    for slug in POPULAR_COLLECTIONS:
+        create_collection_options_keyboard(slug)
+
+
+def build_main_keyboard():
     """Create the main menu keyboard with premium option."""
     keyboard = [
-        [InlineKeyboardButton("🏆 Popular Collections", callback_data="show_collections")],
+        [InlineKeyboardButton("🏆 Popular Collections", callback_data=router.encode("collections"))],
+        [InlineKeyboardButton("📈 Top Collections Dashboard", callback_data=router.encode("dashboard"))],
         [
-            InlineKeyboardButton("🏷 Get Floor", callback_data="ask_floor"),
-            InlineKeyboardButton("📊 Get Stats", callback_data="ask_stats")
+            InlineKeyboardButton("🏷 Get Floor", callback_data=router.encode("ask_floor")),
+            InlineKeyboardButton("📊 Get Stats", callback_data=router.encode("ask_stats"))
         ],
         [
-            InlineKeyboardButton("📦 Get Volume", callback_data="ask_volume"),
-            InlineKeyboardButton("🧾 Get Sales", callback_data="ask_sales")
+            InlineKeyboardButton("📦 Get Volume", callback_data=router.encode("ask_volume")),
+            InlineKeyboardButton("🧾 Get Sales", callback_data=router.encode("ask_sales"))
         ],
         [
-            InlineKeyboardButton("💎 Premium Features", callback_data="premium"),
-            InlineKeyboardButton("ℹ️ Bot Info", callback_data="bot_info")
+            InlineKeyboardButton("💎 Premium Features", callback_data=router.encode("premium")),
+            InlineKeyboardButton("ℹ️ Bot Info", callback_data=router.encode("bot_info"))
         ]
     ]
     return InlineKeyboardMarkup(keyboard)
 
 
-def create_collections_keyboard():
+def build_back_keyboard():
+    """Create a keyboard with just the back button."""
+    return InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Back to Main Menu", callback_data=router.encode("main"))]])
+
+
+def build_collections_keyboard():
     """Create keyboard with popular collections."""
     keyboard = []
     row = []
@@ -122,7 +431,7 @@ def create_collections_keyboard():
     for i, (slug, name) in enumerate(POPULAR_COLLECTIONS.items()):
         # Truncate long names
         display_name = name[:15] + "..." if len(name) > 15 else name
-        row.append(InlineKeyboardButton(display_name, callback_data=f"collection_{slug}"))
+        row.append(InlineKeyboardButton(display_name, callback_data=router.encode("collection", slug)))
         
         # Create new row every 2 buttons
         if len(row) == 2:
@@ -134,27 +443,27 @@ def create_collections_keyboard():
         keyboard.append(row)
     
     # Add back button
-    keyboard.append([InlineKeyboardButton("🔙 Back to Main Menu", callback_data="back_to_main")])
+    keyboard.append([InlineKeyboardButton("🔙 Back to Main Menu", callback_data=router.encode("main"))])
     
     return InlineKeyboardMarkup(keyboard)
 
 
-def create_collection_options_keyboard(collection_slug):
+def build_collection_options_keyboard(collection_slug):
     """Create keyboard with options for a specific collection."""
-    collection_name = POPULAR_COLLECTIONS.get(collection_slug, collection_slug)
+    collection_name = registry.name(collection_slug)
     display_name = collection_name[:20] + "..." if len(collection_name) > 20 else collection_name
     
     keyboard = [
         [
-            InlineKeyboardButton(f"🏷 {display_name} Floor", callback_data=f"floor_{collection_slug}"),
-            InlineKeyboardButton(f"📊 {display_name} Stats", callback_data=f"stats_{collection_slug}")
+            InlineKeyboardButton(f"🏷 {display_name} Floor", callback_data=router.encode("floor", collection_slug)),
+            InlineKeyboardButton(f"📊 {display_name} Stats", callback_data=router.encode("stats", collection_slug))
         ],
         [
-            InlineKeyboardButton(f"📦 {display_name} Volume", callback_data=f"volume_{collection_slug}"),
-            InlineKeyboardButton(f"🧾 {display_name} Sales", callback_data=f"sales_{collection_slug}")
+            InlineKeyboardButton(f"📦 {display_name} Volume", callback_data=router.encode("volume", collection_slug)),
+            InlineKeyboardButton(f"🧾 {display_name} Sales", callback_data=router.encode("sales", collection_slug))
         ],
-        [InlineKeyboardButton("🔙 Back to Collections", callback_data="show_collections")],
-        [InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
+        [InlineKeyboardButton("🔙 Back to Collections", callback_data=router.encode("collections"))],
+        [InlineKeyboardButton("🏠 Main Menu", callback_data=router.encode("main"))]
     ]
     return InlineKeyboardMarkup(keyboard)
 
@@ -163,85 +472,68 @@ def create_collection_options_keyboard(collection_slug):
 # MESSAGE FUNCTIONS
 # -------------------------------
 
+async def reply(update: Update, text: str, **kwargs):
+    """Reply to the user's message through the outbound send queue."""
+    return await outbox.send(update.effective_chat.id, lambda: update.message.reply_text(text, **kwargs))
+
+
+async def edit_message(message, text: str, **kwargs):
+    """Edit `message`, skipping the API call when it already shows this text and keyboard."""
+    reply_markup = kwargs.get('reply_markup')
+    if render_cache.is_shown(message, text, reply_markup):
+        return message
+    
+    try:
+        edited = await outbox.send(message.chat_id, lambda: message.edit_text(text, **kwargs))
+    except BadRequest as e:
+        # Edited elsewhere (or before a restart) to the same content
+        if "not modified" not in str(e).lower():
+            raise
+        edited = message
+    render_cache.mark_shown(message, text, reply_markup)
+    return edited
+
+
+async def reply_or_edit(update: Update, message, text: str, **kwargs):
+    """Edit `message` when there is one, otherwise reply to the user's command."""
+    if message is None:
+        return await reply(update, text, **kwargs)
+    return await edit_message(message, text, **kwargs)
+
+
 async def send_collection_stats(update: Update, collection_slug: str, metric_type: str):
     """Send stats for a collection based on metric type."""
     # Get display name
-    display_name = POPULAR_COLLECTIONS.get(collection_slug, collection_slug)
+    display_name = registry.name(collection_slug)
     
-    # Show loading message
-    if update.callback_query:
-        await update.callback_query.answer()
-        message = update.callback_query.message
-    else:
-        message = update.message
+    # Callbacks edit the menu message; commands reply, since the user's own message can't be edited
+    message = update.callback_query.message if update.callback_query else None
     
-    loading_text = f"🔄 Fetching {metric_type} for {display_name}..."
-    await message.edit_text(loading_text)
+    # Enforce the user's quota before doing any network I/O
+    limit = await monetization.charge(update.effective_user.id)
+    if limit:
+        keyboard = create_collection_options_keyboard(collection_slug)
+        await reply_or_edit(update, message, monetization.create_quota_message(limit), reply_markup=keyboard)
+        return
+    
+    # Show loading message only when the stats aren't already in memory
+    if stats_cache.peek(collection_slug) is None:
+        loading_text = f"🔄 Fetching {metric_type} for {display_name}..."
+        message = await reply_or_edit(update, message, loading_text)
     
     # Fetch stats
-    stats = fetch_collection_stats(collection_slug)
+    stats = await fetch_collection_stats(collection_slug)
     
     if not stats:
         error_text = f"❌ Could not fetch {metric_type} for {display_name}.\n\nPlease try another collection."
         keyboard = create_collection_options_keyboard(collection_slug)
-        await message.edit_text(error_text, reply_markup=keyboard)
+        await reply_or_edit(update, message, error_text, reply_markup=keyboard)
         return
     
-    # Format response based on metric type
-    if metric_type == "floor":
-        floor_price = stats.get('floor_price', 'N/A')
-        text = (
-            f"🏷 *{display_name}*\n"
-            f"Floor Price: *{format_number(floor_price)} ETH*\n\n"
-            f"📊 Quick Stats:\n"
-            f"• Volume: {format_number(stats.get('volume'))} ETH\n"
-            f"• Sales: {format_number(stats.get('sales'))}\n"
-            f"• Owners: {format_number(stats.get('num_owners'))}\n\n"
-            f"🔗 [View on OpenSea](https://opensea.io/collection/{collection_slug})"
-        )
-    
-    elif metric_type == "stats":
-        text = (
-            f"📊 *{display_name} - Complete Stats*\n\n"
-            f"• Floor Price: {format_number(stats.get('floor_price'))} ETH\n"
-            f"• Total Volume: {format_number(stats.get('volume'))} ETH\n"
-            f"• Total Sales: {format_number(stats.get('sales'))}\n"
-            f"• Average Price: {format_number(stats.get('average_price'))} ETH\n"
-            f"• Market Cap: {format_number(stats.get('market_cap'))} ETH\n"
-            f"• Num Owners: {format_number(stats.get('num_owners'))}\n"
-            f"• Total Supply: {format_number(stats.get('total_supply'))}\n\n"
-            f"🔗 [View on OpenSea](https://opensea.io/collection/{collection_slug})"
-        )
-    
-    elif metric_type == "volume":
-        volume_eth = stats.get('volume', 0)
-        text = (
-            f"📦 *{display_name}*\n"
-            f"Total Volume: *{format_number(volume_eth)} ETH*\n\n"
-            f"📈 Other Metrics:\n"
-            f"• Floor: {format_number(stats.get('floor_price'))} ETH\n"
-            f"• Sales: {format_number(stats.get('sales'))}\n"
-            f"• Avg Price: {format_number(stats.get('average_price'))} ETH\n\n"
-            f"🔗 [View on OpenSea](https://opensea.io/collection/{collection_slug})"
-        )
-    
-    elif metric_type == "sales":
-        sales_count = stats.get('sales', 0)
-        text = (
-            f"🧾 *{display_name}*\n"
-            f"Total Sales: *{format_number(sales_count)}*\n\n"
-            f"💰 Trading Stats:\n"
-            f"• Volume: {format_number(stats.get('volume'))} ETH\n"
-            f"• Avg Price: {format_number(stats.get('average_price'))} ETH\n"
-            f"• Floor: {format_number(stats.get('floor_price'))} ETH\n\n"
-            f"🔗 [View on OpenSea](https://opensea.io/collection/{collection_slug})"
-        )
-    
-    else:
-        text = f"❌ Unknown metric type: {metric_type}"
+    text = render_collection_stats(collection_slug, metric_type, stats)
     
     keyboard = create_collection_options_keyboard(collection_slug)
-    await message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown", disable_web_page_preview=True)
+    await reply_or_edit(update, message, text, reply_markup=keyboard, parse_mode="Markdown", disable_web_page_preview=True)
 
 
 # -------------------------------
@@ -252,6 +544,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send welcome message with interactive keyboard."""
     # Get user tier info
     user_tier = monetization.check_user_tier(update.effective_user.id)
+    db.touch_user(update.effective_user.id)
     
     text = (
         f"👋 *Welcome to NFT Analytics Bot!*\n\n"
@@ -267,7 +560,15 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"• /stats <slug> - Get all stats\n"
         f"• /volume <slug> - Get trading volume\n"
         f"• /sales <slug> - Get sales count\n"
+        f"• /compare <slug> <slug> ... - Compare collections\n"
+        f"• /history <slug> [range] - Floor & volume history\n"
+        f"• /analytics <slug> - Momentum, volatility & more\n"
+        f"• /alert <slug> above|below <price> - Floor price alert\n"
+        f"• /watch <slug> - Follow a collection's floor moves\n"
+        f"• /recent <slug> - Latest sales & listings\n"
+        f"• /portfolio <wallet> - Floor value of a wallet's NFTs\n"
         f"• /search <name> - Search for collections\n"
+        f"• @{escape_markdown(context.bot.username)} <name> - Stats in any chat\n"
         f"• /premium - Upgrade to premium\n\n"
         f"🔐 *Protected by enterprise-grade security*"
     )
@@ -275,9 +576,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = create_main_keyboard()
     
     if update.message:
-        await update.message.reply_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await reply(update, text, reply_markup=keyboard, parse_mode="Markdown")
     elif update.callback_query:
-        await update.callback_query.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await edit_message(update.callback_query.message, text, reply_markup=keyboard, parse_mode="Markdown")
 
 
 async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -290,7 +591,7 @@ async def floor(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
         text = "❌ Please provide a collection slug.\n\nExample: `/floor boredapeyachtclub`\n\nOr use the interactive menu below:"
         keyboard = create_main_keyboard()
-        await update.message.reply_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await reply(update, text, reply_markup=keyboard, parse_mode="Markdown")
         return
     
     collection = context.args[0].lower()
@@ -302,7 +603,7 @@ async def stats_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
         text = "❌ Please provide a collection slug.\n\nExample: `/stats cryptopunks`\n\nOr use the interactive menu below:"
         keyboard = create_main_keyboard()
-        await update.message.reply_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await reply(update, text, reply_markup=keyboard, parse_mode="Markdown")
         return
     
     collection = context.args[0].lower()
@@ -314,7 +615,7 @@ async def volume(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
         text = "❌ Please provide a collection slug.\n\nExample: `/volume azuki`\n\nOr use the interactive menu below:"
         keyboard = create_main_keyboard()
-        await update.message.reply_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await reply(update, text, reply_markup=keyboard, parse_mode="Markdown")
         return
     
     collection = context.args[0].lower()
@@ -326,7 +627,7 @@ async def sales(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
         text = "❌ Please provide a collection slug.\n\nExample: `/sales doodles-official`\n\nOr use the interactive menu below:"
         keyboard = create_main_keyboard()
-        await update.message.reply_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await reply(update, text, reply_markup=keyboard, parse_mode="Markdown")
         return
     
     collection = context.args[0].lower()
@@ -338,30 +639,25 @@ async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
         text = "🔍 *Search for Collections*\n\nUsage: `/search <collection name>`\n\nExample: `/search bored ape`"
         keyboard = create_main_keyboard()
-        await update.message.reply_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await reply(update, text, reply_markup=keyboard, parse_mode="Markdown")
         return
     
     search_term = ' '.join(context.args).lower()
-    results = []
-    
-    # Search in popular collections
-    for slug, name in POPULAR_COLLECTIONS.items():
-        if search_term in name.lower() or search_term in slug.lower():
-            results.append((slug, name))
+    results = registry.search(search_term, limit=8)
     
     if not results:
         text = f"❌ No collections found for '{search_term}'.\n\nTry these popular collections:"
         keyboard = create_collections_keyboard()
-        await update.message.reply_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await reply(update, text, reply_markup=keyboard, parse_mode="Markdown")
         return
     
     # Create keyboard with search results
     keyboard = []
     row = []
     
-    for i, (slug, name) in enumerate(results[:8]):  # Limit to 8 results
+    for i, (slug, name) in enumerate(results):
         display_name = name[:15] + "..." if len(name) > 15 else name
-        row.append(InlineKeyboardButton(display_name, callback_data=f"collection_{slug}"))
+        row.append(InlineKeyboardButton(display_name, callback_data=router.encode("collection", slug)))
         
         if len(row) == 2:
             keyboard.append(row)
@@ -370,27 +666,421 @@ async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if row:
         keyboard.append(row)
     
-    keyboard.append([InlineKeyboardButton("🔙 Back to Main Menu", callback_data="back_to_main")])
+    keyboard.append([InlineKeyboardButton("🔙 Back to Main Menu", callback_data=router.encode("main"))])
     
     text = f"🔍 *Search Results for '{search_term}':*"
-    await update.message.reply_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+    await reply(update, text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+
+
+async def compare(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Compare several collections side by side in one message."""
+    # Deduplicate while keeping the order the user gave
+    collections = list(dict.fromkeys(arg.lower() for arg in context.args))
+    
+    if len(collections) < 2:
+        text = "❌ Please provide at least two collection slugs.\n\nExample: `/compare azuki doodles-official cryptopunks`"
+        keyboard = create_main_keyboard()
+        await reply(update, text, reply_markup=keyboard, parse_mode="Markdown")
+        return
+    
+    if len(collections) > MAX_COMPARE_COLLECTIONS:
+        text = f"❌ You can compare up to {MAX_COMPARE_COLLECTIONS} collections at once."
+        await reply(update, text)
+        return
+    
+    limit = await monetization.charge(update.effective_user.id, cost=len(collections))
+    if limit:
+        await reply(update, monetization.create_quota_message(limit))
+        return
+    
+    message = await reply(update, f"🔄 Comparing {len(collections)} collections...")
+    stats_by_slug = await fetch_many_stats(collections)
+    
+    text = f"⚖️ *Collection Comparison*\n\n{format_stats_table(stats_by_slug)}\n_Floor and volume in ETH_"
+    keyboard = create_back_keyboard()
+    await edit_message(message, text, reply_markup=keyboard, parse_mode="Markdown")
+
+
+async def dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show all popular collections in one table, ranked by volume."""
+    message = update.callback_query.message
+    collections = list(POPULAR_COLLECTIONS)
+    
+    if any(stats_cache.peek(collection) is None for collection in collections):
+        await edit_message(message, "🔄 Loading dashboard...")
+    
+    stats_by_slug = await fetch_many_stats(collections)
+    ranked = dict(sorted(
+        stats_by_slug.items(),
+        key=lambda item: float((item[1] or {}).get('volume') or 0),
+        reverse=True
+    ))
+    
+    text = f"📈 *Top Collections Dashboard*\n\n{format_stats_table(ranked)}\n_Floor and volume in ETH_"
+    keyboard = [
+        [InlineKeyboardButton("🔄 Refresh", callback_data=router.encode("dashboard"))],
+        [InlineKeyboardButton("🔙 Back to Main Menu", callback_data=router.encode("main"))]
+    ]
+    await edit_message(message, text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+
+
+async def history(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show recorded floor/volume history for a collection (no OpenSea call)."""
+    ranges = ", ".join(HISTORY_RANGES)
+    if not context.args:
+        text = f"📜 *Collection History*\n\nUsage: `/history <slug> [range]`\nRanges: {ranges}\n\nExample: `/history azuki 7d`"
+        await reply(update, text, parse_mode="Markdown")
+        return
+    
+    collection = context.args[0].lower()
+    range_key = context.args[1].lower() if len(context.args) > 1 else "7d"
+    if range_key not in HISTORY_RANGES:
+        await reply(update, f"❌ Unknown range '{range_key}'. Use one of: {ranges}")
+        return
+    
+    display_name = registry.name(collection)
+    rows = await snapshots.history(collection, range_key)
+    
+    if not rows:
+        text = f"📜 No history recorded for {display_name} yet.\n\nHistory builds up as the bot tracks the collection."
+        await reply(update, text)
+        return
+    
+    floors = [row[1] for row in rows]
+    first, last = rows[0], rows[-1]
+    # Volume and sales are lifetime totals, so the range's activity is the difference
+    volume_traded = max(0, (last[2] or 0) - (first[2] or 0))
+    sales_made = max(0, (last[3] or 0) - (first[3] or 0))
+    
+    table = [f"{'Time (UTC)':<12} {'Floor':>7} {'Volume':>7}"]
+    for ts, floor_price, volume_total, _, _ in rows[-12:]:
+        label = datetime.fromtimestamp(ts, timezone.utc).strftime("%m-%d %H:%M")
+        table.append(f"{label:<12} {format_compact(floor_price):>7} {format_compact(volume_total):>7}")
+    
+    text = (
+        f"📜 *{display_name} - {range_key} History*\n\n"
+        f"Floor: {format_number(first[1])} → {format_number(last[1])} ETH ({format_change(first[1], last[1])})\n"
+        f"`{sparkline(floors)}`\n"
+        f"Volume traded: {format_number(volume_traded)} ETH\n"
+        f"Sales: {format_number(sales_made)}\n\n"
+        "```\n" + "\n".join(table) + "\n```"
+    )
+    await reply(update, text, parse_mode="Markdown")
+
+
+def format_age(seconds):
+    """Format an age in seconds as a short relative time."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit} ago"
+    return "just now"
+
+
+async def recent_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show a collection's latest sales and listings from the event store."""
+    kinds = {"sales": "sale", "listings": "listing"}
+    args = context.args
+    if not args or len(args) > 2 or (len(args) == 2 and args[1].lower() not in kinds):
+        text = "🧾 *Recent Activity*\n\nUsage: `/recent <slug> [sales|listings]`\n\nExample: `/recent azuki sales`"
+        await reply(update, text, parse_mode="Markdown")
+        return
+    
+    collection = args[0].lower()
+    event_type = kinds[args[1].lower()] if len(args) == 2 else None
+    display_name = registry.name(collection)
+    
+    # Followed collections are kept current in the background; others get their newest events read on demand
+    message = None
+    if not events_ingestor.is_fresh(collection):
+        limit = await monetization.charge(update.effective_user.id)
+        if limit:
+            await reply(update, monetization.create_quota_message(limit))
+            return
+        message = await reply(update, f"🔄 Loading recent activity for {display_name}...")
+        await events_ingestor.read_head(collection, max_pages=EVENTS_RECENT_PAGES)
+    
+    rows = await events_ingestor.recent(collection, limit=RECENT_EVENTS, event_type=event_type)
+    if not rows:
+        await reply_or_edit(update, message, f"🧾 No recent {args[1].lower() if event_type else 'activity'} for {display_name}.")
+        return
+    
+    now = time.time()
+    lines = []
+    for kind, ts, token_id, price, symbol in rows:
+        icon = "💰" if kind == "sale" else "🏷"
+        price_text = f"{format_number(price)} {symbol or 'ETH'}" if price is not None else "N/A"
+        lines.append(f"{icon} {kind.capitalize()} #{token_id or '?'} · {price_text} · {format_age(now - ts)}")
+    
+    text = f"🧾 *{display_name} - Recent Activity*\n\n" + "\n".join(lines)
+    await reply_or_edit(update, message, text, parse_mode="Markdown")
+
+
+def format_percent(value):
+    """Format a fraction as a signed percentage."""
+    return "N/A" if value is None else f"{value * 100:+.2f}%"
+
+
+async def analytics_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show moving averages, momentum, volatility and volume z-score for a collection."""
+    if not context.args:
+        text = "🧠 *Collection Analytics*\n\nUsage: `/analytics <slug>`\n\nExample: `/analytics azuki`"
+        await reply(update, text, parse_mode="Markdown")
+        return
+    
+    collection = context.args[0].lower()
+    display_name = registry.name(collection)
+    
+    # Tracked collections are recomputed every refresh cycle; others on every request
+    metrics = analytics.latest.get(collection)
+    if metrics is None:
+        metrics = (await analytics.analyze([collection]))[collection]
+    
+    if metrics['floor'] is None:
+        text = f"🧠 Not enough history for {display_name} yet.\n\nAnalytics build up as the bot tracks the collection."
+        await reply(update, text)
+        return
+    
+    zscore = metrics['volume_zscore']
+    if zscore is None:
+        activity = "N/A"
+    elif abs(zscore) >= 2:
+        activity = f"{zscore:+.2f} ⚠️ unusual"
+    else:
+        activity = f"{zscore:+.2f}"
+    
+    text = (
+        f"🧠 *{display_name} - Analytics*\n\n"
+        f"• Floor: {format_number(metrics['floor'])} ETH\n"
+        f"• 1h Moving Avg: {format_number(metrics['ma_short'])} ETH\n"
+        f"• 6h Moving Avg: {format_number(metrics['ma_long'])} ETH\n"
+        f"• 6h Momentum: {format_percent(metrics['momentum'])}\n"
+        f"• Daily Volatility: {format_percent(metrics['volatility']).lstrip('+')}\n"
+        f"• Volume Z-Score: {activity}\n\n"
+        f"_Based on the last {analytics.lookback // 3600}h of recorded snapshots_"
+    )
+    await reply(update, text, parse_mode="Markdown")
+
+
+async def alert_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Create a floor price alert."""
+    args = context.args
+    if len(args) != 3 or args[1].lower() not in (ABOVE, BELOW):
+        text = (
+            "🔔 *Price Alerts*\n\n"
+            "Usage: `/alert <slug> above|below <price>`\n\n"
+            "Example: `/alert azuki below 5.5`\n\n"
+            "See your alerts with /alerts"
+        )
+        await reply(update, text, parse_mode="Markdown")
+        return
+    
+    try:
+        price = float(args[2])
+    except ValueError:
+        price = 0
+    if price <= 0:
+        await reply(update, "❌ The price must be a positive number of ETH.")
+        return
+    
+    user_id = update.effective_user.id
+    limit = monetization.alert_limit(user_id)
+    if alert_engine.count_for_user(user_id) >= limit:
+        text = f"❌ You can have up to {limit} active alerts.\n\nRemove one with /delalert <id> or upgrade: /premium"
+        await reply(update, text)
+        return
+    
+    collection = args[0].lower()
+    direction = args[1].lower()
+    
+    # Alerted collections are checked every cycle; a typo would cost an OpenSea call each time
+    if collection not in alert_engine.slugs() and await fetch_collection_stats(collection) is None:
+        await reply(update, f"❌ Could not find collection '{collection}'.")
+        return
+    
+    alert = alert_engine.add(user_id, update.effective_chat.id, collection, direction, price)
+    
+    display_name = registry.name(collection)
+    text = f"✅ Alert #{alert.alert_id} set: *{display_name}* floor {direction} {format_number(price)} ETH"
+    await reply(update, text, parse_mode="Markdown")
+
+
+async def alerts_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """List the user's active alerts."""
+    user_alerts = alert_engine.user_alerts(update.effective_user.id)
+    
+    if not user_alerts:
+        await reply(update, "🔔 You have no active alerts.\n\nCreate one with /alert <slug> above|below <price>")
+        return
+    
+    lines = [
+        f"#{alert.alert_id} {registry.name(alert.slug)} {alert.direction} {format_number(alert.price)} ETH"
+        for alert in user_alerts
+    ]
+    text = "🔔 Your Alerts\n\n" + "\n".join(lines) + "\n\nRemove one with /delalert <id>"
+    await reply(update, text)
+
+
+async def delalert_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Remove one of the user's alerts."""
+    alert_id = context.args[0].lstrip("#") if context.args else ""
+    
+    if alert_id.isdigit() and alert_engine.remove(int(alert_id), user_id=update.effective_user.id):
+        await reply(update, f"🗑 Alert #{alert_id} removed.")
+    else:
+        await reply(update, "❌ Alert not found. See your alerts with /alerts")
+
+
+async def watch_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Add a collection to the user's watchlist."""
+    if len(context.args) != 1:
+        text = (
+            "👀 *Watchlist*\n\n"
+            "Usage: `/watch <slug>`\n\n"
+            "You get a message when a watched floor moves by "
+            f"{watchlists.change_threshold * 100:.0f}% or more.\n"
+            "See your watchlist with /watchlist"
+        )
+        await reply(update, text, parse_mode="Markdown")
+        return
+    
+    user_id = update.effective_user.id
+    collection = context.args[0].lower()
+    limit = monetization.watchlist_limit(user_id)
+    if collection not in watchlists.user_slugs(user_id) and watchlists.count_for_user(user_id) >= limit:
+        text = f"❌ You can watch up to {limit} collections.\n\nRemove one with /unwatch <slug> or upgrade: /premium"
+        await reply(update, text)
+        return
+    
+    # Collections someone already watches are refreshed anyway; only new ones need checking
+    if not watchlists.watchers(collection) and await fetch_collection_stats(collection) is None:
+        await reply(update, f"❌ Could not find collection '{collection}'.")
+        return
+    
+    display_name = registry.name(collection)
+    if watchlists.add(user_id, update.effective_chat.id, collection):
+        await reply(update, f"👀 Watching *{display_name}*", parse_mode="Markdown")
+    else:
+        await reply(update, f"👀 *{display_name}* is already on your watchlist.", parse_mode="Markdown")
+
+
+async def unwatch_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Remove a collection from the user's watchlist."""
+    collection = context.args[0].lower() if context.args else ""
+    
+    if collection and watchlists.remove(update.effective_user.id, collection):
+        await reply(update, f"🗑 Stopped watching {registry.name(collection)}.")
+    else:
+        await reply(update, "❌ Not on your watchlist. See it with /watchlist")
+
+
+async def watchlist_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show current stats for every collection on the user's watchlist."""
+    user_id = update.effective_user.id
+    collections = watchlists.user_slugs(user_id)
+    
+    if not collections:
+        await reply(update, "👀 Your watchlist is empty.\n\nAdd a collection with /watch <slug>")
+        return
+    
+    # Watched collections are refreshed in the background, so this is served from the cache
+    stats_by_slug = await fetch_many_stats(collections)
+    text = (
+        f"👀 *Your Watchlist* ({len(collections)}/{monetization.watchlist_limit(user_id)})\n\n"
+        f"{format_stats_table(stats_by_slug)}\n"
+        f"_Floor and volume in ETH_\n\nRemove one with /unwatch <slug>"
+    )
+    await reply(update, text, parse_mode="Markdown")
+
+
+def format_portfolio(portfolio):
+    """Render a (possibly still loading) portfolio valuation."""
+    address = portfolio.address
+    text = (
+        f"💼 *Portfolio {address[:6]}…{address[-4:]}*\n\n"
+        f"Floor Value: *{format_number(portfolio.value)} ETH*\n"
+        f"Items: {portfolio.items:,} in {len(portfolio.holdings):,} collections "
+        f"({portfolio.priced_items:,} priced)\n\n"
+    )
+    
+    if portfolio.holdings:
+        lines = [f"{'Collection':<14} {'Held':>5} {'Floor':>7} {'Value':>7}"]
+        for slug, count, floor_price, value in portfolio.top(10):
+            name = registry.name(slug)
+            name = name[:13] + "…" if len(name) > 14 else name
+            lines.append(f"{name:<14} {count:>5} {format_compact(floor_price):>7} {format_compact(value):>7}")
+        text += "```\n" + "\n".join(lines) + "\n```\n"
+    
+    if portfolio.capped:
+        text += (f"⚠️ Priced {len(portfolio.floors):,} of {len(portfolio.holdings):,} collections"
+                 f" - /premium prices all of them\n")
+    
+    if portfolio.complete:
+        text += "✅ All items counted" if portfolio.capped else "✅ All items valued"
+    elif portfolio.truncated:
+        premium_items = monetization.premium_limits['portfolio_items']
+        text += f"⚠️ Valued the first {portfolio.items:,} items - /premium values up to {premium_items:,}"
+    elif portfolio.failed:
+        text += "⚠️ OpenSea stopped responding - partial valuation"
+    else:
+        text += f"🔄 Loading... {portfolio.pages} pages so far"
+    return text
+
+
+async def portfolio_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Value a wallet's NFTs at floor, streaming pages and updating the message as they arrive."""
+    if not context.args or not WALLET_ADDRESS.match(context.args[0]):
+        text = (
+            "💼 *Wallet Portfolio*\n\n"
+            "Usage: `/portfolio <wallet address> [chain]`\n\n"
+            "Example: `/portfolio 0x0000000000000000000000000000000000000000`"
+        )
+        await reply(update, text, parse_mode="Markdown")
+        return
+    
+    user_id = update.effective_user.id
+    limit = await monetization.charge(user_id)
+    if limit:
+        await reply(update, monetization.create_quota_message(limit))
+        return
+    
+    address = context.args[0].lower()
+    chain = context.args[1].lower() if len(context.args) > 1 else "ethereum"
+    message = await reply(update, f"🔄 Loading NFTs of {address[:6]}…{address[-4:]}...")
+    
+    pages = stream_nft_pages(opensea, address, chain=chain, page_size=PORTFOLIO_PAGE_SIZE)
+    last_edit = time.monotonic()
+    portfolio = None
+    portfolios = value_portfolio(
+        address, pages, fetch_many_stats,
+        max_items=monetization.portfolio_limit(user_id),
+        max_collections=monetization.portfolio_collections_limit(user_id)
+    )
+    async for portfolio in portfolios:
+        # Running total, at most one edit per interval; the final state is always shown
+        if time.monotonic() - last_edit >= PORTFOLIO_EDIT_INTERVAL:
+            last_edit = time.monotonic()
+            await edit_message(message, format_portfolio(portfolio), parse_mode="Markdown")
+    
+    await edit_message(message, format_portfolio(portfolio), reply_markup=create_back_keyboard(), parse_mode="Markdown")
 
 
 async def premium(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show premium features and pricing."""
     premium_text = monetization.create_upgrade_message()
-    keyboard = [[InlineKeyboardButton("🔙 Back to Main Menu", callback_data="back_to_main")]]
+    keyboard = create_back_keyboard()
     
     if update.callback_query:
-        await update.callback_query.message.edit_text(
-            premium_text, 
-            reply_markup=InlineKeyboardMarkup(keyboard),
+        await edit_message(
+            update.callback_query.message,
+            premium_text,
+            reply_markup=keyboard,
             parse_mode="Markdown"
         )
     else:
-        await update.message.reply_text(
+        await reply(
+            update,
             premium_text,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=keyboard,
             parse_mode="Markdown"
         )
 
@@ -398,13 +1088,27 @@ async def premium(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def bot_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show bot information and stats."""
     bot_stats = protection.generate_stats()
+    processing = update_processor.counters()
+    queued = processing['queued'] + context.application.update_queue.qsize()
+    sending = outbox.counters()
+    cache = stats_cache.counters()
     
     text = (
         f"🤖 *NFT Analytics Bot Information*\n\n"
         f"🔐 *Protection Status:* {'✅ Active' if bot_stats['protected'] else '❌ Inactive'}\n"
         f"⏰ *Uptime:* {bot_stats['uptime']}\n"
         f"🌐 *Environment:* {bot_stats['environment']}\n"
-        f"📊 *Collections Tracked:* {len(POPULAR_COLLECTIONS)}\n\n"
+        f"📊 *Collections Tracked:* {len(registry):,}\n"
+        f"⚙️ *Processing:* {processing['active']} active, {queued} queued, "
+        f"p95 {processing['latency_p95_ms']:.0f}ms\n"
+        f"📤 *Outbox:* {sending['queued_interactive']} replies, {sending['queued_bulk']} notifications queued\n"
+        f"⏱ *Handlers:* p95 {format_seconds(HANDLER_SECONDS.quantile(0.95))} over {HANDLER_SECONDS.count():,} updates\n"
+        f"🌊 *OpenSea:* p95 {format_seconds(REQUEST_SECONDS.quantile(0.95))}, "
+        f"{REQUEST_SECONDS.count(status='200'):,}/{REQUEST_SECONDS.count():,} OK\n"
+        f"💾 *Cache Hit Ratio:* {cache['hit_ratio']:.0%}\n"
+        f"🔁 *Event Loop Lag:* p99 {format_seconds(loop_lag.histogram.quantile(0.99))}, "
+        f"max {format_seconds(loop_lag.max_lag)}\n"
+        f"🚫 *Quota Rejections:* {monetization.quota_rejections:,}\n\n"
         f"*Features:*\n"
         f"• Real-time floor prices\n"
         f"• Volume tracking\n"
@@ -414,98 +1118,374 @@ async def bot_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"🔒 *Enterprise Protection System Active*"
     )
     
-    keyboard = [[InlineKeyboardButton("🔙 Back to Main Menu", callback_data="back_to_main")]]
+    keyboard = create_back_keyboard()
     
     if update.callback_query:
-        await update.callback_query.message.edit_text(
-            text, 
-            reply_markup=InlineKeyboardMarkup(keyboard),
+        await edit_message(
+            update.callback_query.message,
+            text,
+            reply_markup=keyboard,
             parse_mode="Markdown"
         )
     else:
-        await update.message.reply_text(
+        await reply(
+            update,
             text,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=keyboard,
             parse_mode="Markdown"
         )
 
 
 # -------------------------------
-# CALLBACK QUERY HANDLER
+# INLINE QUERIES
 # -------------------------------
 
-async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle all callback queries from inline keyboards."""
-    query = update.callback_query
-    await query.answer()  # Acknowledge the callback
+def inline_stats_card(index, slug, stats):
+    """One inline result: the full stats view, or a link while stats are still loading."""
+    name = registry.name(slug)
+    if stats:
+        text = render_collection_stats(slug, "stats", stats)
+        description = (
+            f"Floor {format_number(stats.get('floor_price'))} ETH · "
+            f"Vol {format_compact(stats.get('volume'))} ETH · "
+            f"{format_compact(stats.get('sales'))} sales"
+        )
+    else:
+        text = f"🎯 *{name}*\n\n🔗 [View on OpenSea](https://opensea.io/collection/{slug})"
+        description = "Stats loading - type again in a moment"
     
-    data = query.data
+    return InlineQueryResultArticle(
+        id=str(index),
+        title=name,
+        description=description,
+        input_message_content=InputTextMessageContent(text, parse_mode="Markdown", disable_web_page_preview=True)
+    )
+
+
+async def build_inline_results(user_id: int, search_term: str):
+    """Autocomplete from the search index; stats come from the stats cache."""
+    if search_term:
+        matches = registry.search(search_term, limit=INLINE_RESULTS)
+    else:
+        matches = list(POPULAR_COLLECTIONS.items())[:INLINE_RESULTS]
     
-    if data == "show_collections":
-        text = "🏆 *Popular NFT Collections*\n\nSelect a collection to view its stats:"
-        keyboard = create_collections_keyboard()
-        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    stats_by_slug = {slug: stats_cache.peek(slug) for slug, _ in matches}
     
-    elif data == "back_to_main":
-        await start(update, context)
+    # Only the best match may go to OpenSea, and only within the inline deadline;
+    # the fetch runs as its own task so a timeout or a newer keystroke still lets it fill the cache
+    if matches and stats_by_slug[matches[0][0]] is None and not await monetization.charge(user_id):
+        slug = matches[0][0]
+        fetch = asyncio.ensure_future(fetch_collection_stats(slug))
+        done, _ = await asyncio.wait((fetch,), timeout=INLINE_FETCH_TIMEOUT)
+        if done and not fetch.exception():
+            stats_by_slug[slug] = fetch.result()
     
-    elif data == "ask_floor":
-        text = "🏷 *Get Floor Price*\n\nSelect a collection to view its floor price:"
-        keyboard = create_collections_keyboard()
-        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    return [inline_stats_card(i, slug, stats_by_slug[slug]) for i, (slug, _) in enumerate(matches)]
+
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Answer `@bot <name>` with stats cards, debounced per user."""
+    query = update.inline_query
+    search_term = query.query.strip().lower()
     
-    elif data == "ask_stats":
-        text = "📊 *Get Collection Stats*\n\nSelect a collection to view its complete statistics:"
-        keyboard = create_collections_keyboard()
-        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    results = await inline_debouncer.run(
+        query.from_user.id,
+        lambda: build_inline_results(query.from_user.id, search_term)
+    )
+    if results is None:
+        return  # superseded by a newer keystroke, which gets the answer instead
     
-    elif data == "ask_volume":
-        text = "📦 *Get Trading Volume*\n\nSelect a collection to view its trading volume:"
-        keyboard = create_collections_keyboard()
-        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    await query.answer(results, cache_time=INLINE_CACHE_TIME)
+
+
+# -------------------------------
+# INSTRUMENTATION
+# -------------------------------
+
+def instrumented(kind: str, name: str, handler):
+    """Wrap a handler so its latency and failures are recorded per kind and name."""
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        with HANDLER_SECONDS.time(kind=kind, name=name):
+            try:
+                return await handler(update, context)
+            except Exception:
+                HANDLER_ERRORS.inc(kind=kind, name=name)
+                raise
+    return wrapper
+
+
+async def dispatch_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Route a callback query, recording its latency under the button's action."""
+    # Decoded once here; the router runs the decoded route
+    route, slug = router.decode(update.callback_query.data or "")
+    handler = instrumented(
+        "callback", route.action if route else "unknown",
+        lambda update, context: router.run(update, context, route, slug)
+    )
+    await handler(update, context)
+
+
+# -------------------------------
+# CALLBACK ROUTES
+# -------------------------------
+
+async def show_collection_menu(update: Update, prompt: str):
+    """Edit the menu message into the popular collections picker."""
+    keyboard = create_collections_keyboard()
+    await edit_message(update.callback_query.message, prompt, reply_markup=keyboard, parse_mode="Markdown")
+
+
+def collection_menu(prompt: str):
+    """Callback handler showing the collections picker under `prompt`."""
+    async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await show_collection_menu(update, prompt)
+    return handler
+
+
+def metric_view(metric_type: str):
+    """Callback handler showing one metric for the slug in the payload."""
+    async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE, collection_slug: str):
+        await send_collection_stats(update, collection_slug, metric_type)
+    return handler
+
+
+@router.route("collection", "o", with_slug=True, legacy="collection_")
+async def collection_options(update: Update, context: ContextTypes.DEFAULT_TYPE, collection_slug: str):
+    """Show the metric options for one collection."""
+    display_name = registry.name(collection_slug)
+    text = f"🎯 *{display_name}*\n\nWhat would you like to see?"
+    keyboard = create_collection_options_keyboard(collection_slug)
+    await edit_message(update.callback_query.message, text, reply_markup=keyboard, parse_mode="Markdown")
+
+
+# Every inline button payload is routed here; `legacy` keeps buttons on old messages working
+router.add("main", "m", start, legacy=("back_to_main", "help"))
+router.add("premium", "p", premium, legacy="premium")
+router.add("dashboard", "d", dashboard, legacy="dashboard")
+router.add("bot_info", "i", bot_info, legacy="bot_info")
+
+for action, code, prompt in (
+    ("collections", "c", "🏆 *Popular NFT Collections*\n\nSelect a collection to view its stats:"),
+    ("ask_floor", "af", "🏷 *Get Floor Price*\n\nSelect a collection to view its floor price:"),
+    ("ask_stats", "as", "📊 *Get Collection Stats*\n\nSelect a collection to view its complete statistics:"),
+    ("ask_volume", "av", "📦 *Get Trading Volume*\n\nSelect a collection to view its trading volume:"),
+    ("ask_sales", "an", "🧾 *Get Sales Count*\n\nSelect a collection to view its sales count:"),
+):
+    router.add(action, code, collection_menu(prompt), legacy="show_collections" if action == "collections" else action)
+
+for metric_type, code in (("floor", "f"), ("stats", "s"), ("volume", "v"), ("sales", "n")):
+    router.add(metric_type, code, metric_view(metric_type), with_slug=True, legacy=f"{metric_type}_")
+
+router.register_slugs(registry.collections)
+
+
+# -------------------------------
+# BACKGROUND JOBS
+# -------------------------------
+
+async def check_alerts(context: ContextTypes.DEFAULT_TYPE):
+    """Match every alerted collection against its latest floor and notify owners."""
+    collections = list(alert_engine.slugs())
+    if not collections:
+        return
     
-    elif data == "ask_sales":
-        text = "🧾 *Get Sales Count*\n\nSelect a collection to view its sales count:"
-        keyboard = create_collections_keyboard()
-        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    stats_by_slug = await fetch_many_stats(collections)
     
-    elif data == "premium":
-        await premium(update, context)
+    triggered = []
+    for collection, stats in stats_by_slug.items():
+        floor_price = (stats or {}).get('floor_price')
+        if floor_price is not None:
+            triggered.extend(alert_engine.match(collection, float(floor_price)))
     
-    elif data == "bot_info":
-        await bot_info(update, context)
+    if triggered:
+        await send_alert_notifications(context.bot, triggered, stats_by_slug)
+
+
+async def send_alert_notifications(bot, triggered, stats_by_slug):
+    """Send one message per chat as bulk traffic, so interactive replies go first."""
+    messages = []
+    for chat_id, alerts in AlertEngine.group_by_chat(triggered).items():
+        lines = []
+        for alert in alerts:
+            display_name = registry.name(alert.slug)
+            floor_price = stats_by_slug[alert.slug].get('floor_price')
+            icon = "📈" if alert.direction == ABOVE else "📉"
+            lines.append(
+                f"{icon} *{display_name}* floor is {format_number(floor_price)} ETH "
+                f"({alert.direction} {format_number(alert.price)})"
+            )
+        messages.append((chat_id, "🔔 *Price Alert*\n\n" + "\n".join(lines)))
     
-    elif data == "help":
-        await start(update, context)
+    def notify(chat_id, text):
+        return outbox.send(chat_id, lambda: bot.send_message(chat_id, text, parse_mode="Markdown"), BULK)
     
-    elif data.startswith("collection_"):
-        collection_slug = data.replace("collection_", "")
-        display_name = POPULAR_COLLECTIONS.get(collection_slug, collection_slug)
-        text = f"🎯 *{display_name}*\n\nWhat would you like to see?"
-        keyboard = create_collection_options_keyboard(collection_slug)
-        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    # The send queue paces these under Telegram's per-chat and global limits
+    results = await asyncio.gather(
+        *[notify(chat_id, text) for chat_id, text in messages],
+        return_exceptions=True
+    )
+    for (chat_id, _), result in zip(messages, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Alert notification to {chat_id} failed: {result}")
+
+
+async def refresh_watchlists(context: ContextTypes.DEFAULT_TYPE):
+    """Refresh every watched collection once and tell its watchers about floor moves."""
+    collections = watchlists.slugs()
+    if not collections:
+        return
     
-    elif data.startswith("floor_"):
-        collection_slug = data.replace("floor_", "")
-        await send_collection_stats(update, collection_slug, "floor")
+    # One fetch per distinct collection, however many users watch it
+    stats_by_slug = await fetch_many_stats(collections)
+    changes = watchlists.changes(stats_by_slug)
     
-    elif data.startswith("stats_"):
-        collection_slug = data.replace("stats_", "")
-        await send_collection_stats(update, collection_slug, "stats")
+    messages = []
+    for chat_id, moves in changes.items():
+        lines = [
+            f"{'📈' if new > old else '📉'} *{registry.name(slug)}* floor "
+            f"{format_number(old)} → {format_number(new)} ETH ({format_change(old, new)})"
+            for slug, old, new in moves
+        ]
+        messages.append((chat_id, "👀 *Watchlist*\n\n" + "\n".join(lines)))
     
-    elif data.startswith("volume_"):
-        collection_slug = data.replace("volume_", "")
-        await send_collection_stats(update, collection_slug, "volume")
+    def notify(chat_id, text):
+        return outbox.send(chat_id, lambda: context.bot.send_message(chat_id, text, parse_mode="Markdown"), BULK)
     
-    elif data.startswith("sales_"):
-        collection_slug = data.replace("sales_", "")
-        await send_collection_stats(update, collection_slug, "sales")
+    results = await asyncio.gather(
+        *[notify(chat_id, text) for chat_id, text in messages],
+        return_exceptions=True
+    )
+    for (chat_id, _), result in zip(messages, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Watchlist notification to {chat_id} failed: {result}")
 
 
 # -------------------------------
 # MAIN BOT LOOP
 # -------------------------------
 
+def owns_chat(chat_id):
+    """True when this worker serves the chat (always, outside a sharded deployment)."""
+    return shard_for(chat_id, SHARD_COUNT) == SHARD_INDEX
+
+
+async def init_storage(application):
+    """Open the database and restore persisted tiers and cached stats."""
+    await asyncio.to_thread(db.start)
+    await monetization.attach_storage(db)
+    if shared_backend:
+        monetization.attach_shared(shared_backend)
+    await alert_engine.attach_storage(db, owns_chat)
+    await watchlists.attach_storage(db, owns_chat)
+    await events_ingestor.load()
+    await registry.load()
+    
+    cached = await db.load_cached_stats(stats_cache.ttl + stats_cache.stale_ttl)
+    for slug, (age, stats) in cached.items():
+        stats_cache.set(slug, stats, age=age)
+    logger.info(f"💾 Restored {len(monetization.user_tiers)} paid users and {len(cached)} cached collections")
+
+
+async def start_monitoring(application):
+    """Start the event loop lag monitor and the local metrics endpoint."""
+    loop_lag.start()
+    try:
+        await metrics_server.start()
+    except OSError as e:
+        logger.error(f"❌ Metrics endpoint unavailable: {e}")
+
+
+async def post_init(application):
+    """Prepare storage and monitoring before the first update is handled."""
+    await init_storage(application)
+    await start_monitoring(application)
+
+
+async def shutdown_clients(application):
+    """Close shared network clients and flush storage when the application stops."""
+    await loop_lag.stop()
+    await metrics_server.stop()
+    await opensea.close()
+    if shared_backend:
+        await shared_backend.close()
+    monetization.flush_quotas()
+    await asyncio.to_thread(db.close)
+
+
+def build_application():
+    """Create the application with every handler and background job registered."""
+    precompute_keyboards()
+    
+    # Create application
+    builder = (
+        ApplicationBuilder()
+        .token(TELEGRAM_TOKEN)
+        .concurrent_updates(update_processor)
+        .post_init(post_init)
+        .post_shutdown(shutdown_clients)
+    )
+    if TELEGRAM_BASE_URL:
+        builder = builder.base_url(TELEGRAM_BASE_URL)
+    app = builder.build()
+    
+    # Add command handlers
+    app.add_handler(CommandHandler("start", instrumented("command", "start", start)))
+    app.add_handler(CommandHandler("help", instrumented("command", "help", help_cmd)))
+    app.add_handler(CommandHandler("floor", instrumented("command", "floor", floor)))
+    app.add_handler(CommandHandler("stats", instrumented("command", "stats", stats_cmd)))
+    app.add_handler(CommandHandler("volume", instrumented("command", "volume", volume)))
+    app.add_handler(CommandHandler("sales", instrumented("command", "sales", sales)))
+    app.add_handler(CommandHandler("search", instrumented("command", "search", search)))
+    app.add_handler(CommandHandler("compare", instrumented("command", "compare", compare)))
+    app.add_handler(CommandHandler("history", instrumented("command", "history", history)))
+    app.add_handler(CommandHandler("analytics", instrumented("command", "analytics", analytics_cmd)))
+    app.add_handler(CommandHandler("recent", instrumented("command", "recent", recent_cmd)))
+    app.add_handler(CommandHandler("alert", instrumented("command", "alert", alert_cmd)))
+    app.add_handler(CommandHandler("alerts", instrumented("command", "alerts", alerts_cmd)))
+    app.add_handler(CommandHandler("delalert", instrumented("command", "delalert", delalert_cmd)))
+    app.add_handler(CommandHandler("watch", instrumented("command", "watch", watch_cmd)))
+    app.add_handler(CommandHandler("unwatch", instrumented("command", "unwatch", unwatch_cmd)))
+    app.add_handler(CommandHandler("watchlist", instrumented("command", "watchlist", watchlist_cmd)))
+    app.add_handler(CommandHandler("portfolio", instrumented("command", "portfolio", portfolio_cmd)))
+    app.add_handler(CommandHandler("premium", instrumented("command", "premium", premium)))
+    app.add_handler(CommandHandler("info", instrumented("command", "info", bot_info)))
+    
+    # Add callback query handler
+    app.add_handler(CallbackQueryHandler(dispatch_callback))
+    
+    # Inline mode (enable it for the bot with /setinline in @BotFather)
+    app.add_handler(InlineQueryHandler(instrumented("inline", "query", inline_query)))
+    
+    # Schedule background jobs
+    prefetcher.schedule(app.job_queue)
+    registry.schedule(app.job_queue, refresh=IS_LEADER)
+    events_ingestor.schedule(app.job_queue, retention=IS_LEADER)
+    if app.job_queue:
+        app.job_queue.run_repeating(
+            monetization.flush_quotas_job,
+            interval=QUOTA_FLUSH_INTERVAL,
+            first=QUOTA_FLUSH_INTERVAL,
+            name="flush_quotas"
+        )
+        if IS_LEADER:
+            app.job_queue.run_repeating(snapshots.retention_job, interval=3600, first=60, name="history_retention")
+        app.job_queue.run_repeating(check_alerts, interval=ALERT_INTERVAL, first=ALERT_INTERVAL, name="check_alerts")
+        app.job_queue.run_repeating(
+            refresh_watchlists,
+            interval=WATCHLIST_INTERVAL,
+            first=WATCHLIST_INTERVAL,
+            name="refresh_watchlists"
+        )
+    return app
+
+
+def run_worker():
+    """Serve one shard of a sharded deployment: the supervisor forwards this worker's updates over local HTTP."""
+    app = build_application()
+    logger.info(f"👷 Worker {SHARD_INDEX + 1}/{SHARD_COUNT} ready")
+    asyncio.run(serve_webhook(app, protection.check_health))
+
+
 def main():
     """Start the bot."""
     logger.info("🤖 NFT Analytics Bot starting...")
@@ -518,22 +1498,12 @@ def main():
         logger.warning("⚠️  OPENSEA_API_KEY not found. API calls may be rate-limited.")
     
     try:
-        # Create application
-        app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
-        
-        # Add command handlers
-        app.add_handler(CommandHandler("start", start))
-        app.add_handler(CommandHandler("help", help_cmd))
-        app.add_handler(CommandHandler("floor", floor))
-        app.add_handler(CommandHandler("stats", stats_cmd))
-        app.add_handler(CommandHandler("volume", volume))
-        app.add_handler(CommandHandler("sales", sales))
-        app.add_handler(CommandHandler("search", search))
-        app.add_handler(CommandHandler("premium", premium))
-        app.add_handler(CommandHandler("info", bot_info))
+        if WORKERS > 1:
+            # Each worker is a separate process with its own Application (see run_worker)
+            run_supervisor(run_worker, TELEGRAM_TOKEN, BOT_MODE, TELEGRAM_BASE_URL)
+            return
         
-        # Add callback query handler
-        app.add_handler(CallbackQueryHandler(handle_callback_query))
+        app = build_application()
         
         logger.info("✅ Bot configured successfully!")
         logger.info("🤖 Bot is now running...")
@@ -544,7 +1514,10 @@ def main():
         logger.info(f"📊 Status: {bot_stats['status']}")
         logger.info(f"🏗 Environment: {bot_stats['environment']}")
         
-        app.run_polling()
+        if BOT_MODE == "webhook":
+            run_webhook(app, protection.check_health)
+        else:
+            app.run_polling()
         
     except Exception as e:
         logger.error(f"❌ Error starting bot: {e}")
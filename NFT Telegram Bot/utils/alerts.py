@@ -0,0 +1,171 @@
+"""
+Price alert engine for the NFT Analytics Bot
+Thresholds are kept in sorted lists per collection, so each stats refresh
+finds the triggered alerts with a bisect instead of scanning every alert
+"""
+
+import time
+import logging
+from bisect import bisect_left, bisect_right, insort
+
+logger = logging.getLogger(__name__)
+
+ABOVE = 'above'
+BELOW = 'below'
+
+
+class Alert:
+    __slots__ = ('alert_id', 'user_id', 'chat_id', 'slug', 'direction', 'price')
+
+    def __init__(self, alert_id, user_id, chat_id, slug, direction, price):
+        self.alert_id = alert_id
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.slug = slug
+        self.direction = direction
+        self.price = price
+
+
+class AlertEngine:
+    def __init__(self, id_offset=0, id_step=1):
+        self.alerts = {}  # alert_id -> Alert
+        self._above = {}  # slug -> sorted [(price, alert_id)] firing when floor >= price
+        self._below = {}  # slug -> sorted [(price, alert_id)] firing when floor <= price
+        self._by_user = {}  # user_id -> {alert_id}
+        # Workers of a sharded deployment hand out ids from disjoint residues, so they never collide
+        self.id_offset = id_offset
+        self.id_step = id_step
+        self._next_id = id_offset or id_step
+        self.db = None
+
+        self.triggered = 0
+        self.evaluations = 0
+
+    async def attach_storage(self, db, owns=None):
+        """Load active alerts from storage and persist future changes there
+
+        `owns(chat_id)` limits the load to the chats this worker serves.
+        """
+        self.db = db
+        rows = await db.fetchall("SELECT alert_id, user_id, chat_id, slug, direction, price FROM alerts")
+        for row in rows:
+            if owns is None or owns(row[2]):
+                self._index(Alert(*row), keep_sorted=False)
+
+        # Sort each book once after a bulk load instead of inserting in order
+        for books in (self._above, self._below):
+            for book in books.values():
+                book.sort()
+        if rows:
+            # The first id of this worker's residue above every stored id
+            highest = max(row[0] for row in rows)
+            self._next_id = highest + 1 + (self.id_offset - highest - 1) % self.id_step
+
+    def _book(self, slug, direction):
+        books = self._above if direction == ABOVE else self._below
+        return books.setdefault(slug, [])
+
+    def _index(self, alert, keep_sorted=True):
+        self.alerts[alert.alert_id] = alert
+        self._by_user.setdefault(alert.user_id, set()).add(alert.alert_id)
+        if keep_sorted:
+            insort(self._book(alert.slug, alert.direction), (alert.price, alert.alert_id))
+        else:
+            self._book(alert.slug, alert.direction).append((alert.price, alert.alert_id))
+
+    def _unindex(self, alert):
+        del self.alerts[alert.alert_id]
+        user_alerts = self._by_user.get(alert.user_id)
+        if user_alerts:
+            user_alerts.discard(alert.alert_id)
+            if not user_alerts:
+                del self._by_user[alert.user_id]
+
+    def add(self, user_id, chat_id, slug, direction, price):
+        """Create an alert and return it"""
+        alert = Alert(self._next_id, user_id, chat_id, slug, direction, float(price))
+        self._next_id += self.id_step
+        self._index(alert)
+
+        if self.db:
+            self.db.write(
+                "INSERT INTO alerts (alert_id, user_id, chat_id, slug, direction, price, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (alert.alert_id, user_id, chat_id, slug, direction, alert.price, time.time())
+            )
+        return alert
+
+    def remove(self, alert_id, user_id=None):
+        """Delete an alert (optionally only if it belongs to user_id); returns True if removed"""
+        alert = self.alerts.get(alert_id)
+        if alert is None or (user_id is not None and alert.user_id != user_id):
+            return False
+
+        book = self._book(alert.slug, alert.direction)
+        position = bisect_left(book, (alert.price, alert.alert_id))
+        if position < len(book) and book[position][1] == alert_id:
+            del book[position]
+        self._unindex(alert)
+
+        if self.db:
+            self.db.write("DELETE FROM alerts WHERE alert_id = ?", (alert_id,))
+        return True
+
+    def user_alerts(self, user_id):
+        """Return a user's alerts, oldest first"""
+        return [self.alerts[alert_id] for alert_id in sorted(self._by_user.get(user_id, ()))]
+
+    def count_for_user(self, user_id):
+        return len(self._by_user.get(user_id, ()))
+
+    def slugs(self):
+        """Collections that currently have at least one alert"""
+        return {slug for books in (self._above, self._below) for slug, book in books.items() if book}
+
+    def match(self, slug, floor_price):
+        """Pop and return every alert on slug triggered by floor_price (alerts are one-shot)"""
+        self.evaluations += 1
+        triggered_ids = []
+
+        above = self._above.get(slug)
+        if above:
+            # Every threshold <= floor fired: they form a prefix of the sorted list
+            cut = bisect_right(above, (floor_price, float('inf')))
+            triggered_ids.extend(alert_id for _, alert_id in above[:cut])
+            del above[:cut]
+
+        below = self._below.get(slug)
+        if below:
+            # Every threshold >= floor fired: they form a suffix
+            cut = bisect_left(below, (floor_price, -1))
+            triggered_ids.extend(alert_id for _, alert_id in below[cut:])
+            del below[cut:]
+
+        if not triggered_ids:
+            return []
+
+        triggered = [self.alerts[alert_id] for alert_id in triggered_ids]
+        for alert in triggered:
+            self._unindex(alert)
+        self.triggered += len(triggered)
+
+        if self.db:
+            self.db.write_many("DELETE FROM alerts WHERE alert_id = ?", [(alert_id,) for alert_id in triggered_ids])
+        return triggered
+
+    @staticmethod
+    def group_by_chat(alerts):
+        """Group triggered alerts into {chat_id: [alerts]} so each chat gets one message"""
+        grouped = {}
+        for alert in alerts:
+            grouped.setdefault(alert.chat_id, []).append(alert)
+        return grouped
+
+    def counters(self):
+        """Alert counters for monitoring"""
+        return {
+            'active': len(self.alerts),
+            'collections': len(self.slugs()),
+            'evaluations': self.evaluations,
+            'triggered': self.triggered
+        }
@@ -0,0 +1,184 @@
+"""
+Vectorized analytics for the NFT Analytics Bot
+Rolling means, volatility, floor momentum and volume z-scores computed with
+NumPy over aligned snapshot series (one row per collection)
+"""
+
+import os
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# ARRAY FUNCTIONS (operate along the last axis)
+# -------------------------------
+
+def forward_fill(values):
+    """Fill NaN gaps with the last seen value; leading NaNs stay NaN"""
+    positions = np.arange(values.shape[-1])
+    last_valid = np.where(np.isnan(values), 0, positions)
+    np.maximum.accumulate(last_valid, axis=-1, out=last_valid)
+    return np.take_along_axis(values, last_valid, axis=-1)
+
+
+def _window_sums(values, window):
+    """Rolling sum, sum of squares and count of non-NaN values, aligned to the window end"""
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    pad = [(0, 0)] * (values.ndim - 1) + [(1, 0)]
+
+    sums = np.pad(np.cumsum(filled, axis=-1), pad)
+    squares = np.pad(np.cumsum(filled * filled, axis=-1), pad)
+    counts = np.pad(np.cumsum(valid, axis=-1), pad)
+
+    return (
+        sums[..., window:] - sums[..., :-window],
+        squares[..., window:] - squares[..., :-window],
+        counts[..., window:] - counts[..., :-window]
+    )
+
+
+def _pad_front(result, length):
+    pad = [(0, 0)] * (result.ndim - 1) + [(length - result.shape[-1], 0)]
+    return np.pad(result, pad, constant_values=np.nan)
+
+
+def rolling_mean(values, window):
+    """Rolling mean over `window` points (NaN until half the window has data)"""
+    if values.shape[-1] < window:
+        return np.full(values.shape, np.nan)
+    sums, _, counts = _window_sums(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(counts >= max(2, window // 2), sums / counts, np.nan)
+    return _pad_front(mean, values.shape[-1])
+
+
+def rolling_std(values, window):
+    """Rolling sample standard deviation over `window` points"""
+    if values.shape[-1] < window:
+        return np.full(values.shape, np.nan)
+    sums, squares, counts = _window_sums(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (squares - sums * sums / counts) / (counts - 1)
+        std = np.where(counts >= max(2, window // 2), np.sqrt(np.clip(variance, 0, None)), np.nan)
+    return _pad_front(std, values.shape[-1])
+
+
+def log_returns(prices):
+    """Per-step log returns (first point NaN)"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.diff(np.log(np.where(prices > 0, prices, np.nan)), axis=-1)
+    return _pad_front(returns, prices.shape[-1])
+
+
+def volatility(prices, window, periods_per_day):
+    """Rolling volatility of log returns, scaled to a daily figure"""
+    return rolling_std(log_returns(prices), window) * np.sqrt(periods_per_day)
+
+
+def momentum(prices, window):
+    """Fractional price change over the last `window` steps"""
+    if prices.shape[-1] <= window:
+        return np.full(prices.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change = prices[..., window:] / prices[..., :-window] - 1
+    return _pad_front(change, prices.shape[-1])
+
+
+def zscore(values, window):
+    """How many rolling standard deviations each point is from its rolling mean"""
+    std = rolling_std(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # A flat window has no meaningful spread; report NaN rather than a huge score
+        return np.where(std > 1e-9, (values - rolling_mean(values, window)) / std, np.nan)
+
+
+def align_series(rows, slugs, since, bucket, length):
+    """Turn [(slug, ts, floor, volume)] rows into forward-filled (len(slugs), length) matrices"""
+    floors = np.full((len(slugs), length), np.nan)
+    volumes = np.full((len(slugs), length), np.nan)
+    if not rows:
+        return floors, volumes
+
+    # Map slugs to row numbers with a sorted lookup instead of a per-row dict lookup
+    table = np.array(rows, dtype=object)
+    names = np.array(slugs)
+    order = np.argsort(names)
+    row_index = order[np.searchsorted(names[order], table[:, 0].astype(str))]
+
+    data = table[:, 1:].astype(float)  # NULLs become NaN
+    columns = ((data[:, 0] - since) // bucket).astype(int)
+    keep = (columns >= 0) & (columns < length)
+
+    floors[row_index[keep], columns[keep]] = data[keep, 1]
+    volumes[row_index[keep], columns[keep]] = data[keep, 2]
+    return forward_fill(floors), forward_fill(volumes)
+
+
+# -------------------------------
+# ENGINE
+# -------------------------------
+
+class AnalyticsEngine:
+    def __init__(self, store, bucket=None, lookback_hours=None, short_window=12, long_window=72):
+        self.store = store
+        self.bucket = bucket or int(os.getenv('ANALYTICS_BUCKET', '300'))
+        self.lookback = (lookback_hours or int(os.getenv('ANALYTICS_LOOKBACK_HOURS', '48'))) * 3600
+        # Windows are in buckets: with 5-minute buckets, 12 = 1 hour and 72 = 6 hours
+        self.short_window = short_window
+        self.long_window = long_window
+
+        self.latest = {}  # slug -> metrics from the last refresh (tracked collections only)
+        self.last_refresh_ms = 0.0
+
+    async def _query(self, slugs):
+        now = int(time.time())
+        since = (now - self.lookback) // self.bucket * self.bucket
+        rows = await self.store.query_many(slugs, since, self.bucket)
+        return rows, since, now
+
+    async def refresh(self, slugs):
+        """Recompute metrics for every slug from one query and one set of array operations"""
+        slugs = list(slugs)
+        rows, since, now = await self._query(slugs)
+
+        started = time.perf_counter()
+        self.latest.update(self.compute(rows, slugs, since, now))
+        self.last_refresh_ms = (time.perf_counter() - started) * 1000
+        return self.latest
+
+    async def analyze(self, slugs):
+        """Metrics for collections outside the refresh cycle, computed now and not kept"""
+        slugs = list(slugs)
+        rows, since, now = await self._query(slugs)
+        return self.compute(rows, slugs, since, now)
+
+    def compute(self, rows, slugs, since, now):
+        """Compute the latest metrics for each slug from snapshot rows"""
+        length = (now - since) // self.bucket + 1
+        floors, volumes = align_series(rows, slugs, since, self.bucket, length)
+
+        # Volume is a lifetime total; per-bucket traded volume is its difference
+        traded = _pad_front(np.diff(volumes, axis=-1), length)
+
+        metrics = {
+            'floor': floors[:, -1],
+            'ma_short': rolling_mean(floors, self.short_window)[:, -1],
+            'ma_long': rolling_mean(floors, self.long_window)[:, -1],
+            'momentum': momentum(floors, self.long_window)[:, -1],
+            'volatility': volatility(floors, self.long_window, 86400 / self.bucket)[:, -1],
+            'volume_zscore': zscore(traded, self.long_window)[:, -1],
+        }
+
+        return {
+            slug: {name: _to_float(values[i]) for name, values in metrics.items()}
+            for i, slug in enumerate(slugs)
+        }
+
+
+def _to_float(value):
+    return None if np.isnan(value) else float(value)
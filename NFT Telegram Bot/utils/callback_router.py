@@ -0,0 +1,155 @@
+"""
+Callback query router for the NFT Analytics Bot
+Inline button payloads are parsed into (action, slug) once and dispatched
+through a dict; payloads are encoded compactly to fit Telegram's 64-byte limit
+"""
+
+import base64
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_CALLBACK_BYTES = 64
+HASH_MARKER = '~'  # OpenSea slugs never start with this
+
+
+class Route:
+    __slots__ = ('action', 'code', 'handler', 'with_slug')
+
+    def __init__(self, action, code, handler, with_slug):
+        self.action = action
+        self.code = code
+        self.handler = handler
+        self.with_slug = with_slug
+
+
+class CallbackRouter:
+    """Declarative callback_data routing
+
+    New payloads are `code` or `code:slug`, where code is a short per-action
+    string. Slugs that would push the payload past 64 bytes are replaced by a
+    short hash, resolved through a table filled whenever a payload is encoded
+    (and up front with register_slugs). Payloads from older messages are still
+    understood through each route's legacy names.
+    """
+
+    def __init__(self):
+        self.routes = {}  # action -> Route
+        self._by_code = {}  # code -> Route
+        self._legacy = {}  # old exact payload -> Route
+        self._legacy_prefixes = {}  # old payload prefix, e.g. 'floor_' -> Route
+        self._hashed = {}  # slug hash -> slug
+
+        self.dispatched = 0
+        self.unknown = 0
+
+    def add(self, action, code, handler, with_slug=False, legacy=()):
+        """Register `await handler(update, context[, slug])` for an action
+
+        legacy lists payloads older messages still carry: exact strings for plain
+        actions, prefixes (ending in '_') for actions that take a slug.
+        """
+        if code in self._by_code or ':' in code:
+            raise ValueError(f"Invalid or duplicate callback code: {code!r}")
+
+        route = Route(action, code, handler, with_slug)
+        self.routes[action] = route
+        self._by_code[code] = route
+        for payload in ([legacy] if isinstance(legacy, str) else legacy):
+            if with_slug:
+                self._legacy_prefixes[payload] = route
+            else:
+                self._legacy[payload] = route
+        return handler
+
+    def route(self, action, code, with_slug=False, legacy=()):
+        """Decorator form of add()"""
+        def decorator(handler):
+            return self.add(action, code, handler, with_slug, legacy)
+        return decorator
+
+    # -------------------------------
+    # ENCODING
+    # -------------------------------
+
+    @staticmethod
+    def _slug_hash(slug):
+        digest = hashlib.blake2b(slug.encode(), digest_size=9).digest()
+        return HASH_MARKER + base64.urlsafe_b64encode(digest).decode()
+
+    def register_slugs(self, slugs):
+        """Make hashed payloads for these slugs resolvable, e.g. after a restart"""
+        longest_code = max((len(code) for code in self._by_code), default=0)
+        for slug in slugs:
+            # Only slugs too long to send as-is are ever hashed
+            if len(slug.encode()) + longest_code + 1 > MAX_CALLBACK_BYTES:
+                self._hashed[self._slug_hash(slug)] = slug
+
+    def encode(self, action, slug=None):
+        """callback_data for an action, within Telegram's 64-byte limit"""
+        code = self.routes[action].code
+        if slug is None:
+            return code
+
+        data = f"{code}:{slug}"
+        if len(data.encode()) > MAX_CALLBACK_BYTES:
+            token = self._slug_hash(slug)
+            self._hashed[token] = slug
+            data = f"{code}:{token}"
+        return data
+
+    def decode(self, data):
+        """Parse callback_data into (route, slug); route is None if unknown"""
+        code, separator, argument = data.partition(':')
+        route = self._by_code.get(code)
+        if route is not None:
+            if not separator:
+                return route, None
+            if argument.startswith(HASH_MARKER):
+                return route, self._hashed.get(argument)
+            return route, argument
+
+        # Payloads from messages sent before compact encoding
+        route = self._legacy.get(data)
+        if route is not None:
+            return route, None
+        prefix_end = data.find('_') + 1
+        route = self._legacy_prefixes.get(data[:prefix_end]) if prefix_end else None
+        if route is not None:
+            return route, data[prefix_end:]
+        return None, None
+
+    # -------------------------------
+    # DISPATCH
+    # -------------------------------
+
+    async def dispatch(self, update, context):
+        """CallbackQueryHandler callback: decode the payload, then run its route"""
+        route, slug = self.decode(update.callback_query.data or '')
+        await self.run(update, context, route, slug)
+
+    async def run(self, update, context, route, slug):
+        """Acknowledge the query once, then run a route already decoded from its payload"""
+        query = update.callback_query
+        if route is None or (route.with_slug and not slug):
+            self.unknown += 1
+            logger.debug(f"Unroutable callback data: {query.data!r}")
+            await query.answer("This menu has expired, please open it again.")
+            return
+
+        await query.answer()
+        self.dispatched += 1
+        if route.with_slug:
+            await route.handler(update, context, slug)
+        else:
+            await route.handler(update, context)
+
+    def counters(self):
+        """Router counters for monitoring"""
+        return {
+            'routes': len(self.routes),
+            'dispatched': self.dispatched,
+            'unknown': self.unknown,
+            'hashed_slugs': len(self._hashed)
+        }
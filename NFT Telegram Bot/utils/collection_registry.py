@@ -0,0 +1,201 @@
+"""
+Collection registry for the NFT Analytics Bot
+Every known OpenSea slug and display name, loaded from a local snapshot file
+and refreshed in the background, with a fuzzy search index over them
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+
+from utils.search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionRegistry:
+    def __init__(self, popular, client, path=None, refresh_interval=None, max_pages=None):
+        self.popular = dict(popular)  # curated collections: always present and ranked first
+        self.client = client
+        self.path = path or os.getenv('COLLECTIONS_SNAPSHOT', 'collections.json')
+        self.refresh_interval = refresh_interval or float(os.getenv('REGISTRY_REFRESH_INTERVAL', '21600'))
+        self.max_pages = max_pages or int(os.getenv('REGISTRY_MAX_PAGES', '200'))
+        self.reload_interval = float(os.getenv('REGISTRY_RELOAD_INTERVAL', '300'))
+
+        self.collections = dict(self.popular)  # slug -> display name
+        self.index = SearchIndex(self.collections, self.popular)
+        self.updated_at = 0.0
+
+        # Callbacks run with the new {slug: name} mapping whenever the registry changes
+        self.listeners = []
+
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self.reloads = 0
+        self.last_index_seconds = 0.0
+
+    def __len__(self):
+        return len(self.collections)
+
+    def __contains__(self, slug):
+        return slug in self.collections
+
+    def add_listener(self, callback):
+        """Run `callback(collections)` after every change"""
+        self.listeners.append(callback)
+
+    def name(self, slug):
+        """Display name for a slug (the slug itself when unknown)"""
+        return self.collections.get(slug, slug)
+
+    def search(self, query, limit=8):
+        """Best (slug, name) matches for a free-text query"""
+        return self.index.search(query, limit)
+
+    # -------------------------------
+    # LOADING
+    # -------------------------------
+
+    async def load(self):
+        """Load the local snapshot, if there is one"""
+        snapshot = await asyncio.to_thread(self._read_snapshot)
+        if snapshot:
+            await self._install(snapshot['collections'], snapshot.get('updated_at', 0.0))
+            logger.info(f"📚 Loaded {len(self.collections)} collections from {self.path}")
+
+    def _read_snapshot(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable collection snapshot {self.path}: {e}")
+            return None
+
+    def _write_snapshot(self, collections, updated_at):
+        # Write a private temp file then rename, so neither a crash nor another
+        # process writing at the same time leaves a truncated snapshot behind
+        directory, name = os.path.split(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'updated_at': updated_at, 'collections': collections}, f, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    async def _install(self, collections, updated_at):
+        merged = {**collections, **self.popular}
+
+        # Index off the event loop; handlers keep using the old index until the swap
+        started = time.perf_counter()
+        index = await asyncio.to_thread(SearchIndex, merged, self.popular)
+        self.last_index_seconds = time.perf_counter() - started
+
+        self.collections = merged
+        self.index = index
+        self.updated_at = updated_at
+
+        for callback in self.listeners:
+            try:
+                callback(self.collections)
+            except Exception as e:
+                logger.error(f"Registry listener failed: {e}")
+
+    # -------------------------------
+    # BACKGROUND REFRESH
+    # -------------------------------
+
+    def schedule(self, job_queue, refresh=True):
+        """Register the repeating refresh job; it runs soon after startup when the snapshot is stale
+
+        With `refresh=False` (workers other than the leader of a sharded
+        deployment) the snapshot file the refreshing process writes is
+        reloaded instead.
+        """
+        if job_queue is None:
+            logger.warning("⚠️  Job queue unavailable - collection registry refresh disabled")
+            return None
+
+        if not refresh:
+            return job_queue.run_repeating(
+                self.reload_job,
+                interval=self.reload_interval,
+                first=self.reload_interval,
+                name="reload_collection_registry"
+            )
+
+        age = time.time() - self.updated_at
+        return job_queue.run_repeating(
+            self.refresh_job,
+            interval=self.refresh_interval,
+            first=max(30, self.refresh_interval - age),
+            name="refresh_collection_registry"
+        )
+
+    async def refresh_job(self, context):
+        """Job queue callback"""
+        await self.refresh()
+
+    async def reload_job(self, context):
+        """Job queue callback"""
+        await self.reload()
+
+    async def reload(self):
+        """Install the snapshot file when another process has saved a newer one"""
+        snapshot = await asyncio.to_thread(self._read_snapshot)
+        if not snapshot or snapshot.get('updated_at', 0.0) <= self.updated_at:
+            return False
+        await self._install(snapshot['collections'], snapshot['updated_at'])
+        self.reloads += 1
+        logger.info(f"📚 Collection registry reloaded: {len(self.collections)} collections")
+        return True
+
+    async def refresh(self):
+        """Page through the OpenSea collection listing and install the result"""
+        collections = {}
+        cursor = None
+        complete = True
+        for _ in range(self.max_pages):
+            page = await self.client.fetch_collections_page(cursor)
+            if page is None:
+                complete = False
+                break
+            items, cursor = page
+            collections.update(items)
+            if not cursor:
+                break
+
+        if not complete:
+            self.failed_refreshes += 1
+            if not collections:
+                return False
+            # Keep what we already knew rather than shrinking to a partial listing
+            collections = {**self.collections, **collections}
+
+        updated_at = time.time()
+        await self._install(collections, updated_at)
+        try:
+            await asyncio.to_thread(self._write_snapshot, collections, updated_at)
+        except OSError as e:
+            logger.warning(f"Could not save collection snapshot {self.path}: {e}")
+
+        self.refreshes += 1
+        logger.info(f"📚 Collection registry refreshed: {len(self.collections)} collections")
+        return True
+
+    def counters(self):
+        """Registry counters for monitoring"""
+        return {
+            'collections': len(self.collections),
+            'refreshes': self.refreshes,
+            'failed_refreshes': self.failed_refreshes,
+            'reloads': self.reloads,
+            'index_seconds': round(self.last_index_seconds, 3),
+            'age_seconds': round(time.time() - self.updated_at) if self.updated_at else None
+        }
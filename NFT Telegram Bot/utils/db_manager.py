@@ -0,0 +1,338 @@
+"""
+SQLite storage layer for the NFT Analytics Bot
+WAL mode, pooled reader threads and one dedicated writer thread that
+commits queued writes in batches, so handlers never block on disk
+"""
+
+import os
+import json
+import time
+import queue
+import sqlite3
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        tier TEXT NOT NULL DEFAULT 'free',
+        tier_expires_at REAL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS quotas (
+        user_id INTEGER PRIMARY KEY,
+        day INTEGER NOT NULL,
+        daily_used INTEGER NOT NULL,
+        hourly_tokens REAL NOT NULL,
+        hourly_updated REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS cached_stats (
+        slug TEXT PRIMARY KEY,
+        payload TEXT NOT NULL,
+        fetched_at REAL NOT NULL
+    )""",
+    # Clustered on (slug, ts) so a collection's history is one contiguous range scan
+    """CREATE TABLE IF NOT EXISTS snapshots (
+        slug TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        floor_price REAL,
+        volume REAL,
+        sales INTEGER,
+        num_owners INTEGER,
+        average_price REAL,
+        market_cap REAL,
+        PRIMARY KEY (slug, ts)
+    ) WITHOUT ROWID""",
+    # Rollup and retention work on time ranges across every collection
+    "CREATE INDEX IF NOT EXISTS snapshots_by_ts ON snapshots (ts)",
+    """CREATE TABLE IF NOT EXISTS alerts (
+        alert_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        chat_id INTEGER NOT NULL,
+        slug TEXT NOT NULL,
+        direction TEXT NOT NULL,
+        price REAL NOT NULL,
+        created_at REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS watchlists (
+        user_id INTEGER NOT NULL,
+        slug TEXT NOT NULL,
+        chat_id INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (user_id, slug)
+    )""",
+    # Sales and listings; the id makes re-ingested events no-ops
+    """CREATE TABLE IF NOT EXISTS events (
+        event_id TEXT PRIMARY KEY,
+        slug TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        token_id TEXT,
+        price REAL,
+        symbol TEXT,
+        maker TEXT,
+        taker TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS events_by_slug ON events (slug, ts)",
+    """CREATE TABLE IF NOT EXISTS event_cursors (
+        slug TEXT PRIMARY KEY,
+        after INTEGER NOT NULL,
+        cursor TEXT,
+        newest INTEGER,
+        updated_at REAL NOT NULL
+    )""",
+]
+
+_STOP = object()
+
+
+class DatabaseManager:
+    def __init__(self, path=None, readers=None, batch_size=None):
+        self.path = path or os.getenv('DATABASE_PATH', 'nft_bot.db')
+        self.readers = readers or int(os.getenv('DATABASE_READERS', '4'))
+        self.batch_size = batch_size or int(os.getenv('DATABASE_BATCH_SIZE', '500'))
+
+        self._writes = queue.SimpleQueue()
+        self._writer = None
+        self._executor = None
+        self._local = threading.local()
+
+        self.reads = 0
+        self.writes = 0
+        self.batches = 0
+
+    # -------------------------------
+    # LIFECYCLE
+    # -------------------------------
+
+    def _connect(self):
+        """Open a connection tuned for WAL mode with a large prepared statement cache"""
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def start(self):
+        """Create the schema and start the writer thread and reader pool"""
+        if self._writer is not None:
+            return
+
+        conn = self._connect()
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._writer.start()
+        self._executor = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="db-reader")
+        logger.info(f"💾 Database ready: {self.path}")
+
+    def close(self):
+        """Flush pending writes and stop all threads"""
+        if self._writer is None:
+            return
+
+        self._writes.put(_STOP)
+        self._writer.join()
+        self._writer = None
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    # -------------------------------
+    # READS (reader pool)
+    # -------------------------------
+
+    def _reader_conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _read(self, sql, params, one):
+        cursor = self._reader_conn().execute(sql, params)
+        return cursor.fetchone() if one else cursor.fetchall()
+
+    async def fetchone(self, sql, params=()):
+        """Run a read query on the reader pool and return the first row"""
+        self.reads += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._read, sql, params, True)
+
+    async def fetchall(self, sql, params=()):
+        """Run a read query on the reader pool and return all rows"""
+        self.reads += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._read, sql, params, False)
+
+    # -------------------------------
+    # WRITES (dedicated writer thread)
+    # -------------------------------
+
+    def write(self, sql, params=()):
+        """Queue a write; returns a concurrent Future resolved once it is committed"""
+        future = Future()
+        self._writes.put((sql, params, False, future))
+        return future
+
+    def write_many(self, sql, rows):
+        """Queue an executemany write; returns a Future resolved once committed"""
+        future = Future()
+        self._writes.put((sql, list(rows), True, future))
+        return future
+
+    async def flush(self):
+        """Wait until every write queued so far has been committed"""
+        await asyncio.wrap_future(self.write("SELECT 1"))
+
+    def _writer_loop(self):
+        conn = self._connect()
+        stopping = False
+
+        while not stopping:
+            item = self._writes.get()
+            if item is _STOP:
+                break
+
+            # Group-commit everything that queued up while the last batch was written
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._apply(conn, batch)
+
+        conn.close()
+
+    def _apply(self, conn, batch):
+        results = []
+        try:
+            conn.execute("BEGIN")
+            for sql, params, many, future in batch:
+                try:
+                    cursor = conn.executemany(sql, params) if many else conn.execute(sql, params)
+                    results.append((future, cursor.rowcount, None))
+                except sqlite3.Error as e:
+                    logger.error(f"Database write failed: {e}")
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.error(f"Database commit failed: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            results = [(future, None, e) for _, _, _, future in batch]
+
+        self.batches += 1
+        self.writes += len(batch)
+        for future, rowcount, error in results:
+            if error is None:
+                future.set_result(rowcount)
+            else:
+                future.set_exception(error)
+
+    # -------------------------------
+    # USERS AND TIERS
+    # -------------------------------
+
+    def touch_user(self, user_id):
+        """Record a user, creating them on the free tier if new"""
+        now = time.time()
+        return self.write(
+            "INSERT INTO users (user_id, created_at, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (user_id, now, now)
+        )
+
+    def set_user_tier(self, user_id, tier, expires_at=None):
+        """Set a user's subscription tier"""
+        now = time.time()
+        return self.write(
+            "INSERT INTO users (user_id, tier, tier_expires_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET tier = excluded.tier, "
+            "tier_expires_at = excluded.tier_expires_at, updated_at = excluded.updated_at",
+            (user_id, tier, expires_at, now, now)
+        )
+
+    async def get_user_tier(self, user_id):
+        """Return a user's active tier, or None for unknown users"""
+        row = await self.fetchone(
+            "SELECT tier, tier_expires_at FROM users WHERE user_id = ?",
+            (user_id,)
+        )
+        if row is None:
+            return None
+        tier, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return 'free'
+        return tier
+
+    async def load_paid_tiers(self):
+        """Return {user_id: tier} for every user on an active paid tier"""
+        rows = await self.fetchall(
+            "SELECT user_id, tier FROM users "
+            "WHERE tier != 'free' AND (tier_expires_at IS NULL OR tier_expires_at > ?)",
+            (time.time(),)
+        )
+        return dict(rows)
+
+    # -------------------------------
+    # QUOTAS
+    # -------------------------------
+
+    def save_quotas(self, rows):
+        """Upsert (user_id, day, daily_used, hourly_tokens, hourly_updated) rows in one batch"""
+        return self.write_many(
+            "INSERT INTO quotas (user_id, day, daily_used, hourly_tokens, hourly_updated) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET day = excluded.day, daily_used = excluded.daily_used, "
+            "hourly_tokens = excluded.hourly_tokens, hourly_updated = excluded.hourly_updated",
+            rows
+        )
+
+    async def load_quotas(self, day):
+        """Return quota rows recorded for the given day"""
+        return await self.fetchall(
+            "SELECT user_id, day, daily_used, hourly_tokens, hourly_updated FROM quotas WHERE day = ?",
+            (day,)
+        )
+
+    # -------------------------------
+    # CACHED STATS
+    # -------------------------------
+
+    def save_cached_stats(self, slug, stats):
+        """Persist the latest stats payload for a collection"""
+        return self.write(
+            "INSERT INTO cached_stats (slug, payload, fetched_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(slug) DO UPDATE SET payload = excluded.payload, fetched_at = excluded.fetched_at",
+            (slug, json.dumps(stats), time.time())
+        )
+
+    async def load_cached_stats(self, max_age):
+        """Return {slug: (age_seconds, stats)} for payloads younger than max_age"""
+        now = time.time()
+        rows = await self.fetchall(
+            "SELECT slug, payload, fetched_at FROM cached_stats WHERE fetched_at > ?",
+            (now - max_age,)
+        )
+        return {slug: (now - fetched_at, json.loads(payload)) for slug, payload, fetched_at in rows}
+
+    def counters(self):
+        """Storage counters for monitoring"""
+        return {
+            'reads': self.reads,
+            'writes': self.writes,
+            'batches': self.batches,
+            'pending_writes': self._writes.qsize()
+        }
@@ -0,0 +1,62 @@
+"""
+Per-key debouncing for the NFT Analytics Bot
+A newer call for the same key (e.g. the next keystroke of an inline query)
+cancels the older one while it is still waiting or working
+"""
+
+import os
+import asyncio
+
+
+class Debouncer:
+    def __init__(self, delay=None):
+        self.delay = delay if delay is not None else float(os.getenv('INLINE_DEBOUNCE', '0.25'))
+        self._pending = {}  # key -> task of the latest call
+
+        self.calls = 0
+        self.superseded = 0
+        self.completed = 0
+
+    async def run(self, key, fn):
+        """Wait `delay`, then return `await fn()`; None when a newer call for key arrives first
+
+        Only the caller's own work is cancelled: anything fn() hands off to other
+        tasks (single-flight fetches, cache refreshes) keeps running and still
+        warms the cache for the query that superseded it.
+        """
+        self.calls += 1
+        previous = self._pending.get(key)
+        if previous is not None and not previous.done():
+            previous.cancel()
+            self.superseded += 1
+
+        task = asyncio.ensure_future(self._delayed(fn))
+        self._pending[key] = task
+        try:
+            # asyncio.wait never raises for the task itself, so a superseded
+            # call is told apart from this caller being cancelled
+            await asyncio.wait((task,))
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            if self._pending.get(key) is task:
+                del self._pending[key]
+
+        if task.cancelled():
+            return None
+        self.completed += 1
+        return task.result()
+
+    async def _delayed(self, fn):
+        await asyncio.sleep(self.delay)
+        return await fn()
+
+    def counters(self):
+        """Debounce counters for monitoring"""
+        return {
+            'calls': self.calls,
+            'superseded': self.superseded,
+            'completed': self.completed,
+            'pending': len(self._pending)
+        }
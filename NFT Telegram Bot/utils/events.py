@@ -0,0 +1,328 @@
+"""
+Collection event ingestion for the NFT Analytics Bot
+Sales and listings are pulled from OpenSea incrementally: every collection
+resumes from a persisted checkpoint, events are deduplicated by id and
+stored through the batched writer, so a backlog is caught up page by page
+"""
+
+import os
+import time
+import asyncio
+import logging
+
+from utils.opensea_client import CursorExpired
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('sale', 'listing')
+
+INSERT_EVENTS = (
+    "INSERT OR IGNORE INTO events (event_id, slug, event_type, ts, token_id, price, symbol, maker, taker) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def parse_event(slug, event):
+    """Flatten a raw OpenSea event into an `events` row, or None if it can't be identified"""
+    kind = event.get('event_type')
+    if kind == 'order':
+        kind = event.get('order_type') or kind
+    key = event.get('transaction') or event.get('order_hash')
+    timestamp = event.get('event_timestamp')
+    if not kind or not key or timestamp is None:
+        return None
+
+    nft = event.get('nft') or event.get('asset') or {}
+    token_id = nft.get('identifier')
+    payment = event.get('payment') or {}
+    quantity = payment.get('quantity')
+    price = int(quantity) / 10 ** int(payment.get('decimals', 18)) if quantity else None
+
+    # One transaction can sell several tokens, so the token is part of the id
+    event_id = f"{kind}:{key}:{nft.get('contract', '')}:{token_id or ''}"
+    return (
+        event_id, slug, kind, int(timestamp), token_id, price, payment.get('symbol'),
+        event.get('seller') or event.get('maker'), event.get('buyer') or event.get('taker')
+    )
+
+
+class Checkpoint:
+    """Where ingestion of one collection stands"""
+
+    __slots__ = ('after', 'cursor', 'newest', 'updated_at')
+
+    def __init__(self, after, cursor=None, newest=None, updated_at=0.0):
+        self.after = after  # every event up to this timestamp is stored
+        self.cursor = cursor  # next page of the pass in progress (None between passes)
+        self.newest = newest  # newest timestamp seen by the pass in progress
+        self.updated_at = updated_at
+
+
+class EventIngestor:
+    def __init__(self, client, db, slugs, interval=None, backfill=None, overlap=None, max_pages=None,
+                 page_size=None, concurrency=None, retention_days=None):
+        self.client = client
+        self.db = db
+        self.slugs = slugs  # callable returning the collections to follow
+        self.interval = interval or float(os.getenv('EVENTS_INTERVAL', '60'))
+        # How far back a collection seen for the first time is read
+        self.backfill = backfill or float(os.getenv('EVENTS_BACKFILL', '86400'))
+        # Each pass re-reads this many seconds before the checkpoint, for events
+        # OpenSea indexes late; the overlap is dropped as duplicates
+        self.overlap = overlap if overlap is not None else float(os.getenv('EVENTS_OVERLAP', '120'))
+        self.max_pages = max_pages or int(os.getenv('EVENTS_MAX_PAGES', '40'))
+        self.page_size = page_size or int(os.getenv('EVENTS_PAGE_SIZE', '50'))
+        self.concurrency = concurrency or int(os.getenv('EVENTS_CONCURRENCY', '4'))
+        self.retention_days = retention_days or int(os.getenv('EVENTS_RETENTION_DAYS', '30'))
+
+        self.checkpoints = {}  # slug -> Checkpoint
+        self.head_reads = {}  # slug -> time of its last on-demand read (see read_head)
+        self.flight = SingleFlight()
+
+        self.pages = 0
+        self.received = 0
+        self.stored = 0
+        self.duplicates = 0
+        self.malformed = 0
+        self.failed_pages = 0
+        self.cursor_resets = 0
+        self.write_errors = 0
+        self.last_cycle_seconds = 0.0
+
+    async def load(self):
+        """Restore every collection's checkpoint from storage"""
+        rows = await self.db.fetchall("SELECT slug, after, cursor, newest, updated_at FROM event_cursors")
+        for slug, after, cursor, newest, updated_at in rows:
+            self.checkpoints[slug] = Checkpoint(after, cursor, newest, updated_at)
+
+    def is_fresh(self, slug):
+        """True when slug was ingested (or its head read) within the last interval"""
+        checkpoint = self.checkpoints.get(slug)
+        updated_at = max(checkpoint.updated_at if checkpoint else 0.0, self.head_reads.get(slug, 0.0))
+        return time.time() - updated_at < self.interval
+
+    # -------------------------------
+    # INGESTION
+    # -------------------------------
+
+    async def ingest(self, slug, max_pages=None):
+        """Read slug's new events from its checkpoint on; returns how many were new
+
+        Concurrent calls for the same collection share one pass.
+        """
+        return await self.flight.do(slug, lambda: self._ingest(slug, max_pages or self.max_pages))
+
+    async def _ingest(self, slug, max_pages):
+        checkpoint = self.checkpoints.get(slug)
+        if checkpoint is None:
+            checkpoint = self.checkpoints[slug] = Checkpoint(int(time.time() - self.backfill))
+        started_after = checkpoint.after
+
+        received = 0
+        writes = []
+        pages = 0
+        while pages < max_pages:
+            try:
+                page = await self.client.fetch_collection_events_page(
+                    slug, after=checkpoint.after - self.overlap, cursor=checkpoint.cursor,
+                    event_types=EVENT_TYPES, limit=self.page_size
+                )
+            except CursorExpired:
+                # Start the pass over; whatever it re-reads is dropped as duplicates
+                self.cursor_resets += 1
+                checkpoint.cursor = None
+                continue
+            if page is None:
+                self.failed_pages += 1
+                break
+
+            events, next_cursor = page
+            pages += 1
+            rows = self._parse_page(slug, events)
+
+            if rows:
+                received += len(rows)
+                checkpoint.newest = max(checkpoint.newest or 0, max(row[3] for row in rows))
+                # Not awaited: the next page is fetched while the writer commits this one
+                writes.append(asyncio.wrap_future(self.db.write_many(INSERT_EVENTS, rows)))
+
+            if next_cursor and events:
+                checkpoint.cursor = next_cursor
+            else:
+                # Pass complete: everything up to the newest event seen is stored
+                checkpoint.after = max(checkpoint.after, checkpoint.newest or 0)
+                checkpoint.cursor = None
+                checkpoint.newest = None
+
+            # Queued behind the page's events, so a checkpoint never gets ahead of the data
+            self._save(slug, checkpoint)
+            if checkpoint.cursor is None:
+                break
+
+        results = await asyncio.gather(*writes, return_exceptions=True)
+        stored = sum(result for result in results if not isinstance(result, BaseException))
+        if any(isinstance(result, BaseException) for result in results):
+            # Some events may be missing: read this pass's whole window again next time
+            logger.error(f"Storing events of {slug} failed; restarting its pass")
+            self.write_errors += 1
+            checkpoint.after, checkpoint.cursor, checkpoint.newest = started_after, None, None
+            self._save(slug, checkpoint)
+
+        checkpoint.updated_at = time.time()
+        self.pages += pages
+        self.received += received
+        self.stored += stored
+        self.duplicates += received - stored
+        return stored
+
+    async def read_head(self, slug, max_pages=None):
+        """Read slug's newest events down to the ones already stored; returns how many were new
+
+        For on-demand lookups: it always starts from the newest page and leaves
+        the collection's checkpoint, and any backfill cursor, to the background
+        passes. Concurrent calls for the same collection share one read.
+        """
+        return await self.flight.do(f"head:{slug}", lambda: self._read_head(slug, max_pages or self.max_pages))
+
+    async def _read_head(self, slug, max_pages):
+        after = int(time.time() - self.backfill)
+        cursor = None
+        received = 0
+        stored = 0
+        pages = 0
+        while pages < max_pages:
+            try:
+                page = await self.client.fetch_collection_events_page(
+                    slug, after=after, cursor=cursor, event_types=EVENT_TYPES, limit=self.page_size
+                )
+            except CursorExpired:
+                self.cursor_resets += 1
+                break
+            if page is None:
+                self.failed_pages += 1
+                break
+
+            events, cursor = page
+            pages += 1
+            rows = self._parse_page(slug, events)
+            new = 0
+            if rows:
+                received += len(rows)
+                try:
+                    new = await asyncio.wrap_future(self.db.write_many(INSERT_EVENTS, rows))
+                except Exception as e:
+                    logger.error(f"Storing events of {slug} failed: {e}")
+                    self.write_errors += 1
+                    break
+                stored += new
+
+            # A page holding events already stored has reached what was read before
+            if new < len(rows) or not events or not cursor:
+                break
+
+        self.head_reads[slug] = time.time()
+        self.pages += pages
+        self.received += received
+        self.stored += stored
+        self.duplicates += received - stored
+        return stored
+
+    def _parse_page(self, slug, events):
+        rows = []
+        for event in events:
+            row = parse_event(slug, event)
+            if row is None:
+                self.malformed += 1
+            else:
+                rows.append(row)
+        return rows
+
+    def _save(self, slug, checkpoint):
+        return self.db.write(
+            "INSERT OR REPLACE INTO event_cursors (slug, after, cursor, newest, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (slug, checkpoint.after, checkpoint.cursor, checkpoint.newest, time.time())
+        )
+
+    async def run_cycle(self):
+        """Ingest every followed collection once, a few at a time"""
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def ingest_one(slug):
+            async with semaphore:
+                return await self.ingest(slug)
+
+        slugs = list(dict.fromkeys(self.slugs()))
+        results = await asyncio.gather(*[ingest_one(slug) for slug in slugs], return_exceptions=True)
+        for slug, result in zip(slugs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Event ingestion for {slug} failed: {result}")
+
+        self.last_cycle_seconds = time.monotonic() - started
+        return sum(result for result in results if not isinstance(result, Exception))
+
+    # -------------------------------
+    # JOBS
+    # -------------------------------
+
+    def schedule(self, job_queue, retention=True):
+        """Register the ingestion (and unless disabled, retention) jobs on the application's job queue"""
+        if job_queue is None:
+            logger.warning("⚠️  Job queue unavailable - event ingestion disabled")
+            return None
+
+        if retention:
+            job_queue.run_repeating(self.retention_job, interval=3600, first=300, name="events_retention")
+        return job_queue.run_repeating(self.ingest_job, interval=self.interval, first=15, name="ingest_events")
+
+    async def ingest_job(self, context):
+        """Job queue callback"""
+        stored = await self.run_cycle()
+        if stored:
+            logger.info(f"🧾 Stored {stored} new events in {self.last_cycle_seconds:.1f}s")
+
+    async def retention_job(self, context):
+        """Job queue callback"""
+        cutoff = int(time.time()) - self.retention_days * 86400
+        # Collections only read on demand are forgotten once their events have expired
+        for slug in [slug for slug, read_at in self.head_reads.items() if read_at < cutoff]:
+            del self.head_reads[slug]
+        # Per collection, so every delete is a range scan of the (slug, ts) index
+        self.db.write_many(
+            "DELETE FROM events WHERE slug = ? AND ts < ?",
+            [(slug, cutoff) for slug in {*self.checkpoints, *self.head_reads}]
+        )
+
+    # -------------------------------
+    # QUERIES
+    # -------------------------------
+
+    async def recent(self, slug, limit=10, event_type=None):
+        """Return [(event_type, ts, token_id, price, symbol)] for slug's latest events"""
+        if event_type:
+            return await self.db.fetchall(
+                "SELECT event_type, ts, token_id, price, symbol FROM events "
+                "WHERE slug = ? AND event_type = ? ORDER BY ts DESC LIMIT ?",
+                (slug, event_type, limit)
+            )
+        return await self.db.fetchall(
+            "SELECT event_type, ts, token_id, price, symbol FROM events WHERE slug = ? ORDER BY ts DESC LIMIT ?",
+            (slug, limit)
+        )
+
+    def counters(self):
+        """Ingestion counters for monitoring"""
+        return {
+            'collections': len(self.checkpoints),
+            'catching_up': sum(1 for checkpoint in self.checkpoints.values() if checkpoint.cursor),
+            'pages': self.pages,
+            'received': self.received,
+            'stored': self.stored,
+            'duplicates': self.duplicates,
+            'malformed': self.malformed,
+            'failed_pages': self.failed_pages,
+            'cursor_resets': self.cursor_resets,
+            'write_errors': self.write_errors,
+            'last_cycle_seconds': self.last_cycle_seconds
+        }
@@ -0,0 +1,148 @@
+"""
+Minimal asyncio HTTP/1.1 server for the NFT Analytics Bot
+Used for the webhook receiver and health checks; every connection is
+served by its own task with keep-alive, so requests are handled concurrently
+"""
+
+import json
+import asyncio
+import logging
+from urllib.parse import urlsplit, parse_qs
+
+logger = logging.getLogger(__name__)
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class Request:
+    __slots__ = ('method', 'path', 'query', 'headers', 'body')
+
+    def __init__(self, method, target, headers, body):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body or b'null')
+
+
+class Response:
+    __slots__ = ('status', 'body', 'content_type', 'headers')
+
+    def __init__(self, status=200, body=b'', content_type='text/plain; charset=utf-8', headers=None):
+        self.status = status
+        self.body = body.encode() if isinstance(body, str) else body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+
+def json_response(data, status=200, headers=None):
+    return Response(status, json.dumps(data), 'application/json', headers)
+
+
+class HTTPServer:
+    def __init__(self, host='0.0.0.0', port=8080):
+        self.host = host
+        self.port = port
+        self.routes = {}  # (method, path) -> async handler(request) -> Response
+        self._server = None
+
+    def route(self, method, path, handler):
+        """Register `await handler(request)` for an exact method and path"""
+        self.routes[(method.upper(), path)] = handler
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        # Pick up the real port when started on port 0
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"🌐 HTTP server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+
+                response = await self._dispatch(request)
+                keep_alive = request.headers.get('connection', '').lower() != 'close'
+                await self._write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutting down with the connection mid-request
+            pass
+        except ValueError as e:
+            await self._write_response(writer, Response(400, str(e)), False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ValueError("Malformed request line")
+        method, target, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        body = await reader.readexactly(length) if length else b''
+        return Request(method.upper(), target, headers, body)
+
+    async def _dispatch(self, request):
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            known_path = any(path == request.path for _, path in self.routes)
+            return Response(405 if known_path else 404, STATUS_TEXT[405 if known_path else 404])
+
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"Error handling {request.method} {request.path}: {e}")
+            return Response(500, STATUS_TEXT[500])
+
+    async def _write_response(self, writer, response, keep_alive):
+        head = [
+            f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, 'OK')}",
+            f"Content-Type: {response.content_type}",
+            f"Content-Length: {len(response.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head.extend(f"{name}: {value}" for name, value in response.headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + response.body)
+        await writer.drain()
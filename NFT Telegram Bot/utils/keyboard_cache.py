@@ -0,0 +1,63 @@
+"""
+Inline keyboard cache for the NFT Analytics Bot
+Keyboards are immutable once built, so one instance can be shared by every
+message: static menus are kept for the process lifetime and per-collection
+keyboards in a bounded LRU
+"""
+
+import os
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class KeyboardCache:
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or int(os.getenv('KEYBOARD_CACHE_MAX_ENTRIES', '512'))
+        self._static = {}  # key -> markup, never evicted
+        self._entries = OrderedDict()  # key -> markup, least recently used first
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, build, static=False):
+        """Return the keyboard for key, building it with build() on first use"""
+        markup = self._static.get(key) if static else self._entries.get(key)
+        if markup is not None:
+            self.hits += 1
+            if not static:
+                self._entries.move_to_end(key)
+            return markup
+
+        self.misses += 1
+        markup = build()
+        if static:
+            self._static[key] = markup
+        else:
+            self._entries[key] = markup
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return markup
+
+    def invalidate(self, *args):
+        """Drop every keyboard, e.g. when the collection registry changes"""
+        self._static.clear()
+        self._entries.clear()
+        self.invalidations += 1
+
+    def counters(self):
+        """Cache counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'static': len(self._static),
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+        }
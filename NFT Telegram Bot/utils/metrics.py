@@ -0,0 +1,236 @@
+"""
+Metrics for the NFT Analytics Bot
+Counters and fixed-bucket histograms rendered in the Prometheus text
+exposition format, plus snapshot collectors for the components' counters()
+and an event-loop lag monitor
+"""
+
+import os
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from utils.http_server import HTTPServer, Response
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers cache hits (sub-millisecond) up to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}  # label values -> count
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels[name] for name in self.labels), 0)
+
+    def total(self):
+        return sum(self._values.values())
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set; observe() is a bisect and two additions"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [per-bucket counts (last is +Inf), sum]
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _merged(self, labels):
+        """Bucket counts and sum over every series matching the given labels"""
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for key, (series_counts, series_sum) in self._series.items():
+            if all(key[self.labels.index(name)] == value for name, value in labels.items()):
+                counts = [a + b for a, b in zip(counts, series_counts)]
+                total += series_sum
+        return counts, total
+
+    def count(self, **labels):
+        return sum(self._merged(labels)[0])
+
+    def quantile(self, q, **labels):
+        """Estimate a quantile by interpolating inside its bucket (None without samples)"""
+        counts, _ = self._merged(labels)
+        observed = sum(counts)
+        if not observed:
+            return None
+
+        rank = q * observed
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]  # beyond the last bound; report the bound
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def samples(self):
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', _format_labels(self.labels, key, [('le', _format_value(bound))]), cumulative
+            yield f'{self.name}_sum', _format_labels(self.labels, key), total
+            yield f'{self.name}_count', _format_labels(self.labels, key), cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}  # name -> Counter/Histogram
+        self._collectors = {}  # prefix -> callable returning {name: number}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def collect(self, prefix, snapshot):
+        """Expose every numeric value of `snapshot()` (e.g. a component's counters) as `prefix_key`"""
+        self._collectors[prefix] = snapshot
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(f'{name}{labels} {_format_value(value)}' for name, labels, value in metric.samples())
+
+        for prefix, snapshot in self._collectors.items():
+            try:
+                values = snapshot()
+            except Exception as e:
+                logger.error(f"Metrics collector {prefix} failed: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry; modules register their metrics at import time
+REGISTRY = MetricsRegistry()
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a periodic sleeper (blocking code shows up here)"""
+
+    def __init__(self, registry=REGISTRY, interval=None):
+        self.interval = interval or float(os.getenv('LOOP_LAG_INTERVAL', '0.5'))
+        self.histogram = registry.histogram(
+            'nft_event_loop_lag_seconds',
+            'Delay between a scheduled event loop wake-up and when it ran',
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+        )
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, lag)
+            self.histogram.observe(lag)
+
+
+class MetricsServer:
+    """Serves GET /metrics on a local port, separate from the public webhook port"""
+
+    def __init__(self, registry=REGISTRY, host=None, port=None):
+        self.registry = registry
+        self.server = HTTPServer(
+            host or os.getenv('METRICS_HOST', '127.0.0.1'),
+            int(port if port is not None else os.getenv('METRICS_PORT', '9100'))
+        )
+        self.server.route('GET', '/metrics', self.handle_metrics)
+
+    async def start(self):
+        await self.server.start()
+        logger.info(f"📈 Metrics at http://{self.server.host}:{self.server.port}/metrics")
+
+    async def stop(self):
+        await self.server.stop()
+
+    async def handle_metrics(self, request):
+        return Response(200, self.registry.render(), 'text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,287 @@
+"""
+Async OpenSea API client for the NFT Analytics Bot
+One pooled keep-alive HTTP session is shared by every handler
+"""
+
+import os
+import asyncio
+import logging
+from urllib.parse import quote
+
+import httpx
+
+from utils.rate_limiter import TokenBucket, CircuitBreaker, backoff_delay, parse_retry_after
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+OPENSEA_API_URL = "https://api.opensea.io/api/v2"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'nft_opensea_request_seconds',
+    'OpenSea request latency per attempt, by HTTP status (or timeout/error)',
+    labels=('status',)
+)
+
+
+class OpenSeaUnavailable(Exception):
+    """Raised when a request is shed by the rate limiter or the circuit breaker"""
+
+
+class CursorExpired(Exception):
+    """Raised when OpenSea no longer accepts a saved page cursor"""
+
+
+class OpenSeaClient:
+    def __init__(self, api_key=None, base_url=None, timeout=None, max_connections=None,
+                 rate_limit=None, burst=None, max_retries=None):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv('OPENSEA_API_URL', OPENSEA_API_URL)).rstrip('/')
+        self.timeout = timeout or float(os.getenv('OPENSEA_TIMEOUT', '10'))
+        self.max_connections = max_connections or int(os.getenv('OPENSEA_MAX_CONNECTIONS', '100'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('OPENSEA_MAX_RETRIES', '3'))
+        self._client = None
+
+        # Shared outbound limiter sized for the API key's quota
+        self.limiter = TokenBucket(
+            rate=rate_limit or float(os.getenv('OPENSEA_RATE_LIMIT', '4')),
+            burst=burst or int(os.getenv('OPENSEA_BURST', '8'))
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('OPENSEA_BREAKER_THRESHOLD', '5')),
+            reset_timeout=float(os.getenv('OPENSEA_BREAKER_RESET', '30'))
+        )
+
+        self.requests = 0
+        self.throttled = 0
+        self.retried = 0
+        self.shed = 0
+
+    def _get_client(self):
+        """Create the shared HTTP session on first use (inside the running loop)"""
+        if self._client is None or self._client.is_closed:
+            headers = {"Accept": "application/json"}
+            if self.api_key:
+                headers["X-API-KEY"] = self.api_key
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=5)
+            )
+        return self._client
+
+    async def get(self, path, params=None, timeout=None):
+        """GET a path relative to the API root
+
+        Requests pass the shared rate limiter and circuit breaker, and 429/5xx
+        responses or transport errors are retried with jittered exponential
+        backoff (honouring Retry-After), all within one overall deadline.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        attempt = 0
+
+        while True:
+            # Wait for a token first: a request shed here never takes the breaker's probe
+            waited = await self.limiter.acquire(max_wait=deadline - loop.time())
+            if waited is None:
+                self.shed += 1
+                raise OpenSeaUnavailable("rate limit wait exceeds deadline")
+            if waited > 0:
+                self.throttled += 1
+
+            if not self.breaker.allow():
+                self.shed += 1
+                raise OpenSeaUnavailable("circuit breaker open")
+            probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+
+            retry_after = None
+            self.requests += 1
+            started = loop.time()
+            try:
+                try:
+                    response = await asyncio.wait_for(
+                        self._get_client().get(path, params=params),
+                        max(deadline - loop.time(), 0.001)
+                    )
+                except (httpx.TransportError, asyncio.TimeoutError) as e:
+                    status = 'timeout' if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)) else 'error'
+                    REQUEST_SECONDS.observe(loop.time() - started, status=status)
+                    self.breaker.record_failure()
+                    response, error = None, e
+                else:
+                    REQUEST_SECONDS.observe(loop.time() - started, status=str(response.status_code))
+                    error = None
+                    if response.status_code == 429:
+                        # Throttling is not an outage: slow down instead of tripping the breaker
+                        self.throttled += 1
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        self.limiter.penalize(retry_after)
+                        self.breaker.record_success()
+                    elif response.status_code >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                        self.limiter.reward()
+
+                    if response.status_code not in RETRYABLE_STATUS:
+                        return response
+            finally:
+                # A probe that was cancelled or hit an unexpected error never reported back:
+                # free the slot, or the breaker would stay half-open and shed everything
+                if probe:
+                    self.breaker.release_probe()
+
+            attempt += 1
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if attempt > self.max_retries or loop.time() + delay >= deadline:
+                if error is not None:
+                    raise error
+                return response
+
+            self.retried += 1
+            await asyncio.sleep(delay)
+
+    async def fetch_collection_stats(self, collection: str, timeout=None):
+        """Fetch the `total` stats block for a collection, or None on failure"""
+        path = f"/collections/{quote(collection, safe='')}/stats"
+
+        try:
+            r = await self.get(path, timeout=timeout)
+
+            if r.status_code != 200:
+                return None
+
+            data = r.json()
+
+            if "total" not in data:
+                return None
+
+            return data["total"]
+
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out fetching {collection}")
+            return None
+        except OpenSeaUnavailable as e:
+            logger.debug(f"Skipped fetching {collection}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching {collection}: {e}")
+            return None
+
+    async def fetch_collections_page(self, cursor=None, limit=100, order_by='seven_day_volume', timeout=None):
+        """Fetch one page of the collection listing as ([(slug, name)], next cursor), or None on failure"""
+        params = {'limit': limit, 'order_by': order_by}
+        if cursor:
+            params['next'] = cursor
+
+        try:
+            r = await self.get("/collections", params=params, timeout=timeout)
+            if r.status_code != 200:
+                return None
+
+            data = r.json()
+            collections = [
+                (item['collection'], item.get('name') or item['collection'])
+                for item in data.get('collections', [])
+                if item.get('collection')
+            ]
+            return collections, data.get('next')
+
+        except asyncio.TimeoutError:
+            logger.warning("Timed out fetching the collection listing")
+            return None
+        except OpenSeaUnavailable as e:
+            logger.debug(f"Skipped fetching the collection listing: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching the collection listing: {e}")
+            return None
+
+    async def fetch_account_nfts_page(self, address, cursor=None, chain='ethereum', limit=200, timeout=None):
+        """Fetch one page of a wallet's NFTs as ([collection slug per NFT], next cursor), or None on failure"""
+        path = f"/chain/{quote(chain, safe='')}/account/{quote(address, safe='')}/nfts"
+        params = {'limit': limit}
+        if cursor:
+            params['next'] = cursor
+
+        try:
+            r = await self.get(path, params=params, timeout=timeout)
+            if r.status_code != 200:
+                return None
+
+            # Only the collection of each NFT is kept, so a page costs a list of short strings
+            data = r.json()
+            collections = [item['collection'] for item in data.get('nfts', []) if item.get('collection')]
+            return collections, data.get('next')
+
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out fetching NFTs of {address}")
+            return None
+        except OpenSeaUnavailable as e:
+            logger.debug(f"Skipped fetching NFTs of {address}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching NFTs of {address}: {e}")
+            return None
+
+    async def fetch_collection_events_page(self, collection, after=None, cursor=None, event_types=('sale', 'listing'),
+                                           limit=50, timeout=None):
+        """Fetch one page of a collection's events, newest first, as ([raw event], next cursor)
+
+        `after` (unix seconds) bounds how far back paging goes. Returns None on
+        failure, and raises CursorExpired when OpenSea rejects the page cursor.
+        """
+        path = f"/events/collection/{quote(collection, safe='')}"
+        params = {'limit': limit, 'event_type': list(event_types)}
+        if after:
+            params['after'] = int(after)
+        if cursor:
+            params['next'] = cursor
+
+        try:
+            r = await self.get(path, params=params, timeout=timeout)
+            if r.status_code == 400 and cursor:
+                raise CursorExpired(f"cursor rejected for {collection}")
+            if r.status_code != 200:
+                return None
+
+            data = r.json()
+            return data.get('asset_events', []), data.get('next')
+
+        except CursorExpired:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out fetching events of {collection}")
+            return None
+        except OpenSeaUnavailable as e:
+            logger.debug(f"Skipped fetching events of {collection}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching events of {collection}: {e}")
+            return None
+
+    def counters(self):
+        """Outbound request counters for monitoring"""
+        return {
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'retried': self.retried,
+            'shed': self.shed,
+            'rate_limit': self.limiter.rate,
+            'breaker_state': self.breaker.state
+        }
+
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
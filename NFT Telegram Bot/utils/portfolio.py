@@ -0,0 +1,107 @@
+"""
+Wallet portfolio valuation for the NFT Analytics Bot
+A wallet's NFTs are streamed page by page and only counted per collection,
+so memory grows with the number of distinct collections, not items; each
+page's new collections are priced in one concurrent batch
+"""
+
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioUnavailable(Exception):
+    """Raised when a page of the wallet could not be fetched"""
+
+
+class Portfolio:
+    """Running valuation of one wallet: items held and floor price per collection"""
+
+    def __init__(self, address):
+        self.address = address
+        self.holdings = Counter()  # slug -> items held
+        self.floors = {}  # slug -> floor price in ETH (None when unknown)
+        self.items = 0
+        self.pages = 0
+        self.complete = False  # every page was read
+        self.truncated = False  # stopped at the item limit
+        self.capped = False  # some collections left unpriced at the collection limit
+        self.failed = False  # OpenSea stopped answering part way
+
+    @property
+    def value(self):
+        """Floor value of every priced item, in ETH"""
+        return sum(count * self.floors[slug] for slug, count in self.holdings.items() if self.floors.get(slug))
+
+    @property
+    def priced_items(self):
+        return sum(count for slug, count in self.holdings.items() if self.floors.get(slug))
+
+    def top(self, limit=10):
+        """(slug, items held, floor, value) for the most valuable collections"""
+        rows = [
+            (slug, count, self.floors.get(slug), count * (self.floors.get(slug) or 0))
+            for slug, count in self.holdings.items()
+        ]
+        rows.sort(key=lambda row: (row[3], row[1]), reverse=True)
+        return rows[:limit]
+
+
+async def stream_nft_pages(client, address, chain='ethereum', page_size=200):
+    """Yield the collection slug of each NFT in the wallet, one page (list) at a time"""
+    cursor = None
+    while True:
+        page = await client.fetch_account_nfts_page(address, cursor, chain=chain, limit=page_size)
+        if page is None:
+            raise PortfolioUnavailable(f"could not fetch NFTs of {address}")
+
+        slugs, cursor = page
+        yield slugs
+        if not cursor:
+            return
+
+
+async def value_portfolio(address, pages, fetch_many, max_items, max_collections=None):
+    """Consume `pages` and yield the updated Portfolio after every page
+
+    `await fetch_many(slugs)` returns {slug: stats} and is called once per
+    page, for the collections not seen on earlier pages. At most
+    `max_collections` are priced; past that a page's most held collections
+    go first and the rest stay unpriced (`capped`). The last yield has
+    `complete`, `truncated` or `failed` set.
+    """
+    portfolio = Portfolio(address)
+    try:
+        async for slugs in pages:
+            taken = slugs[:max_items - portfolio.items]
+            page_counts = Counter(taken)
+            portfolio.holdings.update(page_counts)
+            portfolio.items += len(taken)
+            portfolio.pages += 1
+
+            new = [slug for slug in page_counts if slug not in portfolio.floors]
+            if max_collections is not None and len(portfolio.floors) + len(new) > max_collections:
+                new.sort(key=page_counts.get, reverse=True)
+                new = new[:max(0, max_collections - len(portfolio.floors))]
+                portfolio.capped = True
+            if new:
+                stats_by_slug = await fetch_many(new)
+                for slug in new:
+                    floor_price = (stats_by_slug.get(slug) or {}).get('floor_price')
+                    portfolio.floors[slug] = float(floor_price) if floor_price else None
+
+            if portfolio.items >= max_items:
+                portfolio.truncated = True
+                break
+            yield portfolio
+        else:
+            portfolio.complete = True
+    except PortfolioUnavailable as e:
+        logger.warning(f"Portfolio stopped after {portfolio.pages} pages: {e}")
+        portfolio.failed = True
+    finally:
+        # Stop the page stream if we left it early
+        await pages.aclose()
+
+    yield portfolio
@@ -0,0 +1,102 @@
+"""
+Background prefetch for the NFT Analytics Bot
+Keeps stats for a hot set of collections warm in the stats cache
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    def __init__(self, slugs, loader, cache, interval=None, spread=None, max_concurrency=None):
+        self.slugs = list(slugs)
+        self.loader = loader  # async loader(slug) -> stats or None
+        self.cache = cache
+        self.interval = interval or float(os.getenv('PREFETCH_INTERVAL', '45'))
+        # Fraction of the interval the fetches of one cycle are spread over
+        self.spread = spread if spread is not None else float(os.getenv('PREFETCH_SPREAD', '0.5'))
+        self.max_concurrency = max_concurrency or int(os.getenv('PREFETCH_CONCURRENCY', '2'))
+
+        # Async callbacks run with the slug list after every refresh cycle
+        self.listeners = []
+
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_cycle_seconds = 0.0
+
+    def add_listener(self, callback):
+        """Run `await callback(slugs)` after every refresh cycle"""
+        self.listeners.append(callback)
+
+    def schedule(self, job_queue):
+        """Register the repeating refresh job on the application's job queue"""
+        if job_queue is None:
+            logger.warning("⚠️  Job queue unavailable - collection prefetch disabled")
+            return None
+
+        return job_queue.run_repeating(
+            self.refresh_job,
+            interval=self.interval,
+            first=1,
+            name="prefetch_collections"
+        )
+
+    async def refresh_job(self, context):
+        """Job queue callback"""
+        await self.refresh_all()
+
+    async def refresh_all(self):
+        """Refresh every slug once, spread over part of the interval with jitter"""
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        slot = self.interval * self.spread / max(len(self.slugs), 1)
+
+        slugs = self.slugs[:]
+        random.shuffle(slugs)
+
+        await asyncio.gather(*[
+            self._refresh_one(slug, i * slot + random.uniform(0, slot), semaphore)
+            for i, slug in enumerate(slugs)
+        ])
+
+        self.cycles += 1
+        self.last_cycle_seconds = time.monotonic() - started
+
+        for listener in self.listeners:
+            try:
+                await listener(self.slugs)
+            except Exception as e:
+                logger.error(f"Refresh listener {getattr(listener, '__qualname__', listener)} failed: {e}")
+
+    async def _refresh_one(self, slug, delay, semaphore):
+        await asyncio.sleep(delay)
+
+        async with semaphore:
+            try:
+                stats = await self.loader(slug)
+            except Exception as e:
+                logger.error(f"Prefetch failed for {slug}: {e}")
+                stats = None
+
+        if stats is None:
+            self.failed += 1
+            return
+
+        self.cache.set(slug, stats)
+        self.refreshed += 1
+
+    def counters(self):
+        """Prefetch counters for monitoring"""
+        return {
+            'collections': len(self.slugs),
+            'cycles': self.cycles,
+            'refreshed': self.refreshed,
+            'failed': self.failed,
+            'last_cycle_seconds': self.last_cycle_seconds
+        }
@@ -0,0 +1,131 @@
+"""
+Outbound rate limiting for the NFT Analytics Bot
+Adaptive token bucket, retry backoff and a circuit breaker for upstream APIs
+"""
+
+import time
+import random
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Token bucket that halves its rate on throttling and creeps back on success (AIMD)"""
+
+    def __init__(self, rate, burst, min_rate=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 10
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, max_wait=None):
+        """Take one token, waiting if needed
+
+        Returns the seconds waited, or None when the wait would exceed `max_wait`
+        (the request should then be shed instead of queued).
+        """
+        self._refill()
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+
+        if max_wait is not None and wait > max_wait:
+            return None
+
+        # Reserve the token now so concurrent callers queue up behind us
+        self.tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def penalize(self, retry_after=None):
+        """Upstream throttled us: slow down, and pause everyone for `retry_after` seconds"""
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        if retry_after:
+            self.tokens = min(self.tokens, -retry_after * self.rate)
+
+    def reward(self):
+        """Upstream accepted a request: recover towards the configured rate"""
+        if self.rate < self.max_rate:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after repeated failures, probing again after a cool-down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self):
+        """Whether a request may be sent right now"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+
+        if self.state == self.HALF_OPEN:
+            # Let exactly one probe through until it reports back
+            if self._probing:
+                return False
+            self._probing = True
+
+        return True
+
+    def release_probe(self):
+        """The half-open probe ended without a verdict: let the next request probe instead"""
+        if self.state == self.HALF_OPEN:
+            self._probing = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """Exponential backoff with full jitter for the given retry attempt (1-based)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None"""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,73 @@
+"""
+Rendered message cache for the NFT Analytics Bot
+Message text per (slug, metric) is re-rendered only when the stats version
+changes, and the last text/keyboard of each edited message is remembered so
+identical edits are skipped instead of sent
+"""
+
+import os
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    def __init__(self, max_entries=None, max_messages=None):
+        self.max_entries = max_entries or int(os.getenv('RENDER_CACHE_MAX_ENTRIES', '4096'))
+        self.max_messages = max_messages or int(os.getenv('RENDER_CACHE_MAX_MESSAGES', '4096'))
+        self._entries = OrderedDict()  # (slug, metric) -> (stats version, text)
+        self._shown = OrderedDict()  # (chat id, message id) -> (text, reply markup)
+
+        self.hits = 0
+        self.renders = 0
+        self.skipped_edits = 0
+
+    def get(self, slug, metric, version, render):
+        """Return the text for (slug, metric) at this stats version, calling render() when it changed"""
+        key = (slug, metric)
+        entry = self._entries.get(key)
+        if version is not None and entry is not None and entry[0] == version:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.renders += 1
+        text = render()
+        if version is not None:
+            self._entries[key] = (version, text)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return text
+
+    def invalidate(self, *args):
+        """Drop every rendered text, e.g. when collection names change"""
+        self._entries.clear()
+
+    def is_shown(self, message, text, reply_markup=None):
+        """True when our last edit of message left exactly this text and keyboard"""
+        if self._shown.get((message.chat_id, message.message_id)) == (text, reply_markup):
+            self.skipped_edits += 1
+            return True
+        return False
+
+    def mark_shown(self, message, text, reply_markup=None):
+        """Remember what message now shows"""
+        key = (message.chat_id, message.message_id)
+        self._shown[key] = (text, reply_markup)
+        self._shown.move_to_end(key)
+        if len(self._shown) > self.max_messages:
+            self._shown.popitem(last=False)
+
+    def counters(self):
+        """Cache counters for monitoring"""
+        lookups = self.hits + self.renders
+        return {
+            'entries': len(self._entries),
+            'messages': len(self._shown),
+            'hits': self.hits,
+            'renders': self.renders,
+            'skipped_edits': self.skipped_edits,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+        }
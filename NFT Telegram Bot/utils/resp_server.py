@@ -0,0 +1,161 @@
+"""
+Minimal Redis-protocol server for the NFT Analytics Bot
+Serves a MemoryBackend over RESP with the handful of commands the shared
+state client uses; the supervisor runs one when no Redis URL is configured,
+and benchmarks/bench_shared_state.py uses it as a local stand-in for Redis
+"""
+
+import asyncio
+import logging
+
+from utils.shared_state import MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+
+def _integer(value):
+    return b':%d\r\n' % value
+
+
+def _bulk(value):
+    if value is None:
+        return b'$-1\r\n'
+    if not isinstance(value, bytes):
+        value = str(value).encode()
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _error(message):
+    return f"-ERR {message}\r\n".encode()
+
+
+OK = b'+OK\r\n'
+
+
+class RespServer:
+    def __init__(self, backend=None, host='127.0.0.1', port=6379):
+        self.backend = backend or MemoryBackend()
+        self.host = host
+        self.port = port
+        self._server = None
+        self._connections = {}  # writer -> task serving the connection
+
+        self.commands = 0
+
+        self._handlers = {
+            b'PING': self._ping,
+            b'GET': self._get,
+            b'SET': self._set,
+            b'INCR': self._incr,
+            b'INCRBY': self._incrby,
+            b'EXPIRE': self._expire,
+            b'PEXPIRE': self._pexpire,
+            b'DEL': self._delete,
+            b'SELECT': self._ok,
+            b'AUTH': self._ok,
+        }
+
+    @property
+    def url(self):
+        return f"redis://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        # Pick up the real port when started on port 0
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"🗄 Shared state server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            tasks = list(self._connections.values())
+            for writer in list(self._connections):
+                writer.close()
+            # Closing a connection ends its handler; wait so none is cancelled mid-read on shutdown
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve_connection(self, reader, writer):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                command = await self._read_command(reader)
+                if command is None:
+                    break
+                writer.write(await self._dispatch(command))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command (e.g. typed into telnet)
+            return line.split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            header = await reader.readline()
+            if not header.startswith(b'$'):
+                raise ValueError("expected a bulk string")
+            args.append((await reader.readexactly(int(header[1:-2]) + 2))[:-2])
+        return args
+
+    async def _dispatch(self, command):
+        if not command:
+            return _error("empty command")
+        self.commands += 1
+        handler = self._handlers.get(command[0].upper())
+        if handler is None:
+            return _error(f"unknown command '{command[0].decode(errors='replace')}'")
+        try:
+            return await handler(*command[1:])
+        except (TypeError, ValueError):
+            return _error(f"wrong arguments for '{command[0].decode(errors='replace')}'")
+
+    async def _ping(self, message=None):
+        return _bulk(message) if message is not None else b'+PONG\r\n'
+
+    async def _ok(self, *args):
+        return OK
+
+    async def _get(self, key):
+        return _bulk(await self.backend.get(key))
+
+    async def _set(self, key, value, *options):
+        ttl = None
+        options = [option.upper() for option in options]
+        if len(options) == 2 and options[0] in (b'EX', b'PX'):
+            ttl = int(options[1]) / (1 if options[0] == b'EX' else 1000)
+        elif options:
+            return _error("only EX and PX are supported")
+        await self.backend.set(key, value, ttl)
+        return OK
+
+    async def _incr(self, key):
+        return await self._incrby(key, b'1')
+
+    async def _incrby(self, key, amount):
+        try:
+            value, = await self.backend.incr_many([(key, int(amount), None)])
+        except ValueError:
+            return _error("value is not an integer or out of range")
+        return _integer(value)
+
+    async def _expire(self, key, seconds):
+        return _integer(await self.backend.expire(key, int(seconds)))
+
+    async def _pexpire(self, key, milliseconds):
+        return _integer(await self.backend.expire(key, int(milliseconds) / 1000))
+
+    async def _delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            deleted += await self.backend.delete(key)
+        return _integer(deleted)
@@ -0,0 +1,176 @@
+"""
+Fuzzy collection search for the NFT Analytics Bot
+A trigram inverted index (NumPy posting lists) finds typo-tolerant
+candidates, a sorted key list answers prefix matches with bisect, and the
+best candidates are re-ranked by trigram similarity
+"""
+
+import re
+import math
+import heapq
+from bisect import bisect_left
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    """Lowercase and collapse punctuation/dashes to single spaces"""
+    return _NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def trigrams(text):
+    """Trigrams of a normalized string, padded so word starts get their own grams"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Immutable search index over {slug: name}; build a new one to change it"""
+
+    def __init__(self, collections, boosted=()):
+        self.slugs = list(collections)
+        self.names = [collections[slug] for slug in self.slugs]
+        boosted = set(boosted)
+        self._boosted = [slug in boosted for slug in self.slugs]
+        self._boosted_ids = [doc_id for doc_id, slug in enumerate(self.slugs) if slug in boosted]
+
+        self._gram_ids = {}  # trigram -> gram id
+        self._postings = []  # gram id -> doc ids (int32 array once built)
+        self._doc_sizes = []  # doc id -> trigram count of the shorter of name and slug
+        self._normalized = []  # doc id -> {normalized name, normalized slug}
+        keys = []  # (key, doc id, 2 for the whole text / 1 for a later word) per word suffix
+
+        for doc_id, (slug, name) in enumerate(zip(self.slugs, self.names)):
+            texts = {normalize(name), normalize(slug)}
+            self._normalized.append(texts)
+            grams = set()
+            sizes = []
+            for text in texts:
+                text_grams = trigrams(text)
+                grams |= text_grams
+                sizes.append(len(text_grams))
+                words = text.split()
+                keys.extend((' '.join(words[i:]), doc_id, 1 if i else 2) for i in range(len(words)))
+
+            for gram in grams:
+                gram_id = self._gram_ids.get(gram)
+                if gram_id is None:
+                    gram_id = self._gram_ids[gram] = len(self._postings)
+                    self._postings.append([])
+                self._postings[gram_id].append(doc_id)
+            self._doc_sizes.append(min(sizes))
+
+        self._postings = [np.array(posting, dtype=np.int32) for posting in self._postings]
+
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._key_docs = [doc_id for _, doc_id, _ in keys]
+        self._key_weights = [weight for _, _, weight in keys]
+
+    def __len__(self):
+        return len(self.slugs)
+
+    def _prefix_matches(self, query, limit):
+        """Documents with a word (or the whole name/slug) starting with query"""
+        matches = {}
+        position = bisect_left(self._keys, query)
+        while position < len(self._keys) and len(matches) < limit and self._keys[position].startswith(query):
+            doc_id = self._key_docs[position]
+            # Whole-name prefix beats a later word starting with the query
+            matches[doc_id] = max(matches.get(doc_id, 0), self._key_weights[position])
+            position += 1
+        return matches
+
+    def _substring_matches(self, query, common, limit):
+        """Up to `limit` documents whose name or slug contains query (four characters or more)
+
+        A text containing the query holds all of its unpadded trigrams, so
+        candidates are the intersection of their posting lists: the shortest
+        list, narrowed by the shared-trigram counts, looked up in the others
+        until few are left. Every candidate is then checked for the query.
+        """
+        gram_ids = {self._gram_ids.get(query[i:i + 3]) for i in range(len(query) - 2)}
+        if None in gram_ids:
+            return set()
+        postings = sorted((self._postings[gram_id] for gram_id in gram_ids), key=len)
+
+        # The popular collections are checked first, the rest in doc id order
+        matches = {doc_id for doc_id in self._boosted_ids
+                   if any(query in text for text in self._normalized[doc_id])}
+        # Common substrings fill the limit from the head of the list; the rest is only searched if not
+        for docs in (postings[0][:limit * 8], postings[0][limit * 8:]):
+            docs = docs[common[docs] >= len(gram_ids)]
+            for posting in postings[1:]:
+                if len(docs) <= limit * 2:
+                    break
+                positions = np.minimum(np.searchsorted(posting, docs), len(posting) - 1)
+                docs = docs[posting[positions] == docs]
+
+            for doc_id in docs.tolist():
+                if len(matches) >= limit:
+                    return matches
+                if any(query in text for text in self._normalized[doc_id]):
+                    matches.add(doc_id)
+        return matches
+
+    def search(self, query, limit=8, min_coverage=0.5):
+        """Return up to `limit` (slug, name) pairs, best match first
+
+        Fuzzy matches must share at least min_coverage of the query's trigrams,
+        which tolerates a typo or two in a word. Queries of three characters or
+        more also match anywhere in a name or slug; shorter ones only match by
+        prefix.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        candidates = self._prefix_matches(query, limit * 4)
+        grams = trigrams(query)
+        common = None
+        needed = 0
+        contained = set()
+
+        if len(query) > 3:
+            postings = [self._postings[self._gram_ids[gram]] for gram in grams if gram in self._gram_ids]
+            if postings:
+                # Shared trigram count for every document in one pass over the posting lists
+                common = np.bincount(np.concatenate(postings), minlength=len(self.slugs))
+                needed = max(1, math.ceil(len(grams) * min_coverage))
+                matched = np.flatnonzero(common >= needed)
+                if len(matched) > limit * 10:
+                    matched = matched[np.argpartition(common[matched], -limit * 10)[-limit * 10:]]
+                for doc_id in matched.tolist():
+                    candidates.setdefault(doc_id, 0)
+                # Ties at the cut-off are dropped arbitrarily, so the popular collections always get a look
+                for doc_id in self._boosted_ids:
+                    candidates.setdefault(doc_id, 0)
+                # A match inside a word ("punk" in "cryptopunks") lacks the padded word-start
+                # trigrams, so it may not reach the cut-off; it is kept all the same
+                contained = self._substring_matches(query, common, limit * 2)
+        elif len(query) == 3 and len(candidates) < limit and query in self._gram_ids:
+            # Too short to match fuzzily, but this trigram's posting list is every text containing the query
+            contained = set(self._postings[self._gram_ids[query]][:limit * 10].tolist())
+
+        for doc_id in contained:
+            candidates.setdefault(doc_id, 0)
+
+        scored = []
+        for doc_id, prefix in candidates.items():
+            shared = int(common[doc_id]) if common is not None else 0
+            if shared < needed and not prefix and doc_id not in contained:
+                continue
+
+            coverage = shared / len(grams)
+            similarity = shared / max(len(grams), self._doc_sizes[doc_id])
+            score = coverage + similarity + 0.5 * prefix + (0.2 if self._boosted[doc_id] else 0.0)
+            if query in self._normalized[doc_id]:
+                score += 2
+            scored.append((score, -doc_id))
+
+        return [
+            (self.slugs[-neg_id], self.names[-neg_id])
+            for _, neg_id in heapq.nlargest(limit, scored)
+        ]
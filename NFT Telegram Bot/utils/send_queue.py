@@ -0,0 +1,190 @@
+"""
+Outbound Telegram message scheduling for the NFT Analytics Bot
+Every send and edit passes a per-chat and a global token bucket; waiting
+requests are served by priority, so interactive replies overtake bulk
+notifications, and RetryAfter (flood control) pauses instead of failing
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BULK: 'bulk'}
+
+
+class PriorityLimiter:
+    """Token bucket whose waiters are served by priority (lower first), FIFO within one"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._paused_until = {}  # priority -> monotonic time it may send again
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._timer = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _delay(self, priority):
+        """Seconds until a request of this priority could take a token"""
+        self._refill()
+        paused = self._paused_until.get(priority, 0.0) - time.monotonic()
+        return max(0.0, paused, (1 - self.tokens) / self.rate)
+
+    async def acquire(self, priority=INTERACTIVE):
+        """Take one token, waiting behind higher-priority and earlier requests"""
+        if not self._waiters and self._delay(priority) == 0:
+            self.tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        if self._waiters[0] is entry and self._timer is not None:
+            # The timer was set for a lower priority, which may be paused for much longer
+            self._timer.cancel()
+            self._timer = None
+        self._schedule()
+        await future
+
+    def _schedule(self):
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)  # cancelled while waiting
+        if self._waiters and self._timer is None:
+            delay = self._delay(self._waiters[0][0])
+            self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _release(self):
+        self._timer = None
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._delay(priority) > 0:
+                break
+            heapq.heappop(self._waiters)
+            self.tokens -= 1
+            future.set_result(None)
+        self._schedule()
+
+    def pause(self, seconds, priority=INTERACTIVE):
+        """Hold back this priority and every lower one for `seconds`"""
+        until = time.monotonic() + seconds
+        for level in PRIORITY_NAMES:
+            if level >= priority:
+                self._paused_until[level] = max(self._paused_until.get(level, 0.0), until)
+
+    def idle(self):
+        """True when nobody waits and the bucket is full and unpaused (safe to discard)"""
+        self._refill()
+        now = time.monotonic()
+        return (
+            not self._waiters
+            and self.tokens >= self.burst
+            and all(until <= now for until in self._paused_until.values())
+        )
+
+
+class SendQueue:
+    def __init__(self, global_rate=None, global_burst=None, chat_rate=None, chat_burst=None,
+                 group_rate=None, max_retries=None):
+        # Telegram allows about 30 messages per second overall, one per second
+        # in a chat (short bursts are tolerated) and 20 per minute in a group
+        self.global_rate = global_rate or float(os.getenv('SEND_GLOBAL_RATE', '30'))
+        self.global_burst = global_burst or int(os.getenv('SEND_GLOBAL_BURST', '30'))
+        self.chat_rate = chat_rate or float(os.getenv('SEND_CHAT_RATE', '1'))
+        self.chat_burst = chat_burst or int(os.getenv('SEND_CHAT_BURST', '3'))
+        self.group_rate = group_rate or float(os.getenv('SEND_GROUP_RATE', str(20 / 60)))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('SEND_MAX_RETRIES', '3'))
+
+        self._global = PriorityLimiter(self.global_rate, self.global_burst)
+        self._chats = {}  # chat id -> PriorityLimiter
+        self._sweep_at = 1024  # chat count that triggers dropping idle limiters
+
+        self.waiting = {priority: 0 for priority in PRIORITY_NAMES}
+        self.sent = 0
+        self.failed = 0
+        self.flood_waits = 0
+
+    def _chat(self, chat_id):
+        limiter = self._chats.get(chat_id)
+        if limiter is None:
+            # Group and channel ids are negative
+            if len(self._chats) >= self._sweep_at:
+                self._sweep()
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            limiter = self._chats[chat_id] = PriorityLimiter(rate, self.chat_burst)
+        return limiter
+
+    def _sweep(self):
+        """Forget chats whose buckets have refilled; amortized over the chats added since the last sweep"""
+        for chat_id in [chat_id for chat_id, limiter in self._chats.items() if limiter.idle()]:
+            del self._chats[chat_id]
+        self._sweep_at = max(1024, 2 * len(self._chats))
+
+    async def send(self, chat_id, request, priority=INTERACTIVE):
+        """Return `await request()` once the chat and global budgets allow it
+
+        `request` builds a fresh coroutine per attempt (e.g. a lambda around
+        bot.send_message), since RetryAfter answers are retried after the wait.
+        """
+        limiter = self._chat(chat_id)
+        try:
+            for attempt in range(self.max_retries + 1):
+                self.waiting[priority] += 1
+                try:
+                    await limiter.acquire(priority)
+                    await self._global.acquire(priority)
+                finally:
+                    self.waiting[priority] -= 1
+
+                try:
+                    result = await request()
+                except RetryAfter as e:
+                    self.flood_waits += 1
+                    delay = e.retry_after
+                    if hasattr(delay, 'total_seconds'):  # a timedelta in newer releases
+                        delay = delay.total_seconds()
+                    logger.warning(f"Flood control for chat {chat_id}: waiting {delay}s")
+                    # The chat waits it out; bulk traffic everywhere backs off too,
+                    # since mass sends are what trip the global limit
+                    limiter.pause(delay)
+                    self._global.pause(delay, BULK)
+                    if attempt == self.max_retries:
+                        self.failed += 1
+                        raise
+                    continue
+                except Exception:
+                    self.failed += 1
+                    raise
+
+                self.sent += 1
+                return result
+        finally:
+            if limiter.idle() and self._chats.get(chat_id) is limiter:
+                del self._chats[chat_id]
+
+    def counters(self):
+        """Queue depth and send counters for monitoring"""
+        return {
+            **{f'queued_{name}': self.waiting[priority] for priority, name in PRIORITY_NAMES.items()},
+            'chats': len(self._chats),
+            'sent': self.sent,
+            'failed': self.failed,
+            'flood_waits': self.flood_waits
+        }
@@ -0,0 +1,351 @@
+"""
+Sharded multi-process deployment for the NFT Analytics Bot
+A supervisor process receives every update (long polling or webhook) and
+forwards it to one of N worker processes picked by a hash of the chat id,
+so a chat is always handled by the same worker and its updates stay in order
+"""
+
+import os
+import zlib
+import signal
+import asyncio
+import logging
+import secrets
+import multiprocessing
+
+import httpx
+
+from utils.http_server import HTTPServer, Response, json_response
+from utils.resp_server import RespServer
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = "https://api.telegram.org/bot"
+
+
+def shard_for(key, shards):
+    """Worker index for a chat (or user) id; stable across processes and restarts"""
+    return zlib.crc32(str(key).encode()) % shards
+
+
+def routing_key(update):
+    """Chat id an update belongs to, else the sending user's id, else the update id
+
+    Matches the keys ChatOrderedProcessor orders by, so everything a worker
+    must keep in sequence reaches the same worker.
+    """
+    for field, value in update.items():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        user = value.get('from') or value.get('user')
+        if user:
+            return user['id']
+    return update.get('update_id', 0)
+
+
+class WorkerLink:
+    """Ordered forwarding of one worker's updates in batches over a keep-alive connection"""
+
+    def __init__(self, url, secret, max_queue=None, batch_size=None):
+        self.url = url
+        self.secret = secret
+        self.queue = asyncio.Queue(max_queue or int(os.getenv('SHARD_QUEUE_SIZE', '1000')))
+        self.batch_size = batch_size or int(os.getenv('SHARD_BATCH_SIZE', '100'))
+        self._task = None
+
+        self.forwarded = 0
+        self.batches = 0
+        self.retries = 0
+        self.dropped = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout=5.0):
+        """Deliver what is queued (for up to `timeout` seconds), then stop"""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.queue.qsize()} undelivered updates for {self.url}")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        headers = {'X-Telegram-Bot-Api-Secret-Token': self.secret}
+        async with httpx.AsyncClient(headers=headers, timeout=httpx.Timeout(30, connect=2)) as client:
+            while True:
+                batch = [await self.queue.get()]
+                while len(batch) < self.batch_size and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                try:
+                    await self._deliver(client, batch)
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+
+    async def _deliver(self, client, batch):
+        """Post a batch until the worker takes it; later batches wait, which keeps chats in order"""
+        attempt = 0
+        while True:
+            try:
+                response = await client.post(self.url, json=batch)
+            except httpx.HTTPError as e:
+                status, error = None, e
+            else:
+                status, error = response.status_code, None
+                if status == 200:
+                    self.forwarded += len(batch)
+                    self.batches += 1
+                    return
+                if status < 500:
+                    # Retrying a rejected batch can't succeed
+                    self.dropped += len(batch)
+                    logger.error(f"Worker at {self.url} rejected {len(batch)} updates with HTTP {status}")
+                    return
+
+            # The worker is starting or restarting
+            attempt += 1
+            self.retries += 1
+            if attempt == 1 or attempt % 20 == 0:
+                logger.warning(f"Worker at {self.url} unavailable ({error or status}); retrying")
+            await asyncio.sleep(min(0.1 * 2 ** min(attempt, 6), 5.0))
+
+    def counters(self):
+        return {
+            'queued': self.queue.qsize(),
+            'forwarded': self.forwarded,
+            'batches': self.batches,
+            'retries': self.retries,
+            'dropped': self.dropped
+        }
+
+
+class Supervisor:
+    """Runs the worker processes, restarts any that exit and routes updates to them"""
+
+    def __init__(self, target, workers=None, base_port=None, shared_url=None):
+        self.target = target  # picklable callable that serves one shard (see worker_env)
+        self.workers = workers or int(os.getenv('WORKERS', str(os.cpu_count() or 1)))
+        self.base_port = base_port or int(os.getenv('WORKER_BASE_PORT', '8100'))
+        self.shared_url = shared_url or os.getenv('SHARED_CACHE_URL')
+        self.secret = secrets.token_urlsafe(24)
+
+        self.shared_server = None
+        self.processes = [None] * self.workers
+        self.links = [
+            WorkerLink(f"http://127.0.0.1:{self.base_port + index}/updates", self.secret)
+            for index in range(self.workers)
+        ]
+        self._context = multiprocessing.get_context('spawn')
+        self._monitor = None
+
+        self.restarts = 0
+
+    def worker_env(self, index):
+        """Environment of worker `index`: its shard, a local webhook port and its share of the global limits"""
+        count = self.workers
+        return {
+            'SHARD_INDEX': str(index),
+            'SHARD_COUNT': str(count),
+            'WEBHOOK_HOST': '127.0.0.1',
+            'PORT': str(self.base_port + index),
+            'WEBHOOK_PATH': '/updates',
+            'WEBHOOK_SECRET': self.secret,
+            'SHARED_CACHE_URL': self.shared_url,
+            'METRICS_PORT': str(int(os.getenv('METRICS_PORT', '9100')) + index),
+            # Telegram and OpenSea limits apply to the bot as a whole
+            'SEND_GLOBAL_RATE': str(float(os.getenv('SEND_GLOBAL_RATE', '30')) / count),
+            'SEND_GLOBAL_BURST': str(max(1, int(os.getenv('SEND_GLOBAL_BURST', '30')) // count)),
+            'OPENSEA_RATE_LIMIT': str(float(os.getenv('OPENSEA_RATE_LIMIT', '4')) / count),
+            'OPENSEA_BURST': str(max(1, int(os.getenv('OPENSEA_BURST', '8')) // count)),
+        }
+
+    def _spawn(self, index):
+        # Spawned children copy the parent's environment at start, and read it
+        # when they import the bot module, so it is set around start()
+        env = self.worker_env(index)
+        saved = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        try:
+            process = self._context.Process(target=self.target, name=f"worker-{index}", daemon=True)
+            process.start()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        self.processes[index] = process
+        logger.info(f"👷 Worker {index} started (pid {process.pid}, port {self.base_port + index})")
+
+    async def start(self):
+        if not self.shared_url:
+            # No Redis configured: the supervisor hosts the shared state itself
+            self.shared_server = RespServer(port=0)
+            await self.shared_server.start()
+            self.shared_url = self.shared_server.url
+
+        for index in range(self.workers):
+            self._spawn(index)
+        for link in self.links:
+            link.start()
+        self._monitor = asyncio.create_task(self._watch_workers())
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+        await asyncio.gather(*[link.stop() for link in self.links])
+
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()  # SIGTERM: workers shut down cleanly and flush storage
+        for process in self.processes:
+            if process is not None:
+                await asyncio.to_thread(process.join, 30)
+                if process.is_alive():
+                    process.kill()
+
+        if self.shared_server is not None:
+            await self.shared_server.stop()
+
+    async def _watch_workers(self):
+        while True:
+            await asyncio.sleep(1)
+            for index, process in enumerate(self.processes):
+                if not process.is_alive():
+                    logger.error(f"❌ Worker {index} exited with code {process.exitcode}; restarting")
+                    self.restarts += 1
+                    self._spawn(index)
+
+    async def route(self, update):
+        """Queue an update for its chat's worker (waits while that worker is backed up)"""
+        await self.links[shard_for(routing_key(update), self.workers)].queue.put(update)
+
+    def health(self):
+        alive = sum(1 for process in self.processes if process is not None and process.is_alive())
+        return {'status': 'healthy' if alive == self.workers else 'degraded', 'workers': alive}
+
+    def counters(self):
+        """Per-worker forwarding counters for monitoring"""
+        counters = {'workers': self.workers, 'restarts': self.restarts}
+        for index, link in enumerate(self.links):
+            counters.update({f'worker{index}_{key}': value for key, value in link.counters().items()})
+        return counters
+
+
+async def poll_updates(supervisor, token, base_url, stop_event):
+    """Long-poll getUpdates and route every update (the one consumer Telegram allows)"""
+    api = f"{base_url}{token}"
+    timeout = int(os.getenv('POLL_TIMEOUT', '30'))
+    offset = None
+    failures = 0
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(timeout + 10, connect=5)) as client:
+        await client.post(f"{api}/deleteWebhook")
+        while not stop_event.is_set():
+            try:
+                response = await client.post(f"{api}/getUpdates", json={'offset': offset, 'timeout': timeout})
+                updates = response.json()['result']
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                failures += 1
+                logger.warning(f"getUpdates failed: {e!r}")
+                await asyncio.sleep(min(2 ** failures, 30))
+                continue
+
+            failures = 0
+            for update in updates:
+                await supervisor.route(update)
+                offset = update['update_id'] + 1
+
+
+async def serve_updates_webhook(supervisor, token, base_url, webhook_url, stop_event):
+    """Receive updates from Telegram over HTTP and route them"""
+    path = os.getenv('WEBHOOK_PATH', '/telegram')
+    secret_token = os.getenv('WEBHOOK_SECRET')
+    if not secret_token:
+        # Same rule as utils.webhook.serve_webhook: never accept unauthenticated updates
+        if not webhook_url:
+            raise RuntimeError("WEBHOOK_SECRET must be set when the webhook is registered outside the bot")
+        secret_token = secrets.token_urlsafe(32)
+        logger.info("🔑 WEBHOOK_SECRET not set - generated a secret for this run")
+    server = HTTPServer(os.getenv('WEBHOOK_HOST', '0.0.0.0'), int(os.getenv('PORT', '8080')))
+
+    async def handle_update(request):
+        token = request.headers.get('x-telegram-bot-api-secret-token', '').encode('latin-1')
+        if not secrets.compare_digest(token, secret_token.encode()):
+            return Response(403, 'Forbidden')
+        try:
+            update = request.json()
+            await supervisor.route(update)
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Rejected malformed update: {e}")
+            return Response(400, 'Bad Request')
+        return Response(200, 'OK')
+
+    async def handle_health(request):
+        return json_response(supervisor.health())
+
+    server.route('POST', path, handle_update)
+    server.route('GET', '/health', handle_health)
+    await server.start()
+    try:
+        if webhook_url:
+            params = {
+                'url': webhook_url.rstrip('/') + path,
+                'max_connections': int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+            }
+            params['secret_token'] = secret_token
+            async with httpx.AsyncClient() as client:
+                await client.post(f"{base_url}{token}/setWebhook", json=params)
+            logger.info(f"🪝 Webhook registered at {params['url']}")
+        await stop_event.wait()
+    finally:
+        await server.stop()
+
+
+async def serve_supervisor(target, token, mode='polling', base_url=None, webhook_url=None, workers=None,
+                           stop_event=None):
+    """Run the workers and feed them updates until stop_event is set (or SIGINT/SIGTERM)"""
+    base_url = base_url or TELEGRAM_API_URL
+    stop_event = stop_event or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    supervisor = Supervisor(target, workers)
+    await supervisor.start()
+    logger.info(f"🧩 Supervising {supervisor.workers} workers ({mode})")
+    try:
+        if mode == 'webhook':
+            await serve_updates_webhook(supervisor, token, base_url, webhook_url, stop_event)
+        else:
+            poller = asyncio.create_task(poll_updates(supervisor, token, base_url, stop_event))
+            await stop_event.wait()
+            poller.cancel()
+            try:
+                await poller
+            except asyncio.CancelledError:
+                pass
+    finally:
+        await supervisor.stop()
+
+
+def run_supervisor(target, token, mode='polling', base_url=None):
+    """Blocking entry point for the sharded deployment"""
+    webhook_url = os.getenv('WEBHOOK_URL')
+    if not webhook_url and os.getenv('RAILWAY_PUBLIC_DOMAIN'):
+        webhook_url = f"https://{os.getenv('RAILWAY_PUBLIC_DOMAIN')}"
+
+    asyncio.run(serve_supervisor(target, token, mode, base_url, webhook_url))
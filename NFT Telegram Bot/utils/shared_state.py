@@ -0,0 +1,291 @@
+"""
+Shared state backends for the NFT Analytics Bot
+Workers of a sharded deployment share OpenSea stats and quota counters
+through a small key-value interface: an in-memory backend, or any server
+speaking the Redis protocol (RESP) over a pooled set of connections
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class SharedStateUnavailable(Exception):
+    """Raised when the shared backend cannot be reached or answers with an error"""
+
+
+class MemoryBackend:
+    """Keys with optional expiry in a dict; expired keys are dropped lazily and in amortized sweeps"""
+
+    def __init__(self):
+        self._data = {}  # key -> [value, expires_at (monotonic) or None]
+        self._sweep_at = 1024  # key count that triggers dropping expired keys
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def _store(self, key, entry):
+        if key not in self._data and len(self._data) >= self._sweep_at:
+            self._sweep()
+        self._data[key] = entry
+
+    def _sweep(self):
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in self._data.items() if expires_at is not None and expires_at <= now]:
+            del self._data[key]
+        self._sweep_at = max(1024, 2 * len(self._data))
+
+    async def get(self, key):
+        entry = self._live(key)
+        return entry[0] if entry is not None else None
+
+    async def set(self, key, value, ttl=None):
+        self._store(key, [value, time.monotonic() + ttl if ttl else None])
+
+    async def incr_many(self, items):
+        """Add `amount` to each (key, amount, ttl) counter; returns the new values
+
+        A counter's expiry is set when it is created.
+        """
+        results = []
+        for key, amount, ttl in items:
+            entry = self._live(key)
+            if entry is None:
+                entry = [0, time.monotonic() + ttl if ttl else None]
+                self._store(key, entry)
+            entry[0] = int(entry[0]) + amount
+            results.append(entry[0])
+        return results
+
+    async def expire(self, key, ttl):
+        entry = self._live(key)
+        if entry is None:
+            return False
+        entry[1] = time.monotonic() + ttl
+        return True
+
+    async def delete(self, key):
+        return self._data.pop(key, None) is not None
+
+    async def close(self):
+        pass
+
+    def counters(self):
+        return {'keys': len(self._data)}
+
+
+def encode_command(*args):
+    """Encode one command as a RESP array of bulk strings"""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+class RespError(Exception):
+    """An error reply (`-ERR ...`) from a RESP server"""
+
+
+async def read_reply(reader):
+    """Read one RESP reply; error replies are returned as RespError instances"""
+    line = await reader.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError("connection closed by the shared backend")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b'+':
+        return payload
+    if kind == b'-':
+        return RespError(payload.decode(errors='replace'))
+    if kind == b':':
+        return int(payload)
+    if kind == b'$':
+        length = int(payload)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b'*':
+        length = int(payload)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"unexpected reply from the shared backend: {line[:32]!r}")
+
+
+class RedisBackend:
+    """Minimal pipelining RESP client; only the commands the bot needs, no dependency"""
+
+    def __init__(self, host='127.0.0.1', port=6379, db=0, password=None, pool_size=None, timeout=None):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.pool_size = pool_size or int(os.getenv('SHARED_CACHE_POOL', '8'))
+        self.timeout = timeout or float(os.getenv('SHARED_CACHE_TIMEOUT', '0.5'))
+
+        self._idle = []  # open (reader, writer) pairs not in use
+        self._slots = asyncio.Semaphore(self.pool_size)
+
+        self.commands = 0
+        self.errors = 0
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(('AUTH', self.password))
+        if self.db:
+            setup.append(('SELECT', self.db))
+        if setup:
+            writer.write(b''.join(encode_command(*command) for command in setup))
+            await writer.drain()
+            for _ in setup:
+                reply = await read_reply(reader)
+                if isinstance(reply, RespError):
+                    writer.close()
+                    raise reply
+        return reader, writer
+
+    async def _pipeline(self, commands):
+        """Send several commands in one write and return their replies in order"""
+        self.commands += len(commands)
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(self._connect(), self.timeout)
+                reader, writer = connection
+                writer.write(b''.join(encode_command(*command) for command in commands))
+                await writer.drain()
+                replies = await asyncio.wait_for(self._read_replies(reader, len(commands)), self.timeout)
+            except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, RespError) as e:
+                # The connection may hold half-read replies; never reuse it
+                if connection is not None:
+                    connection[1].close()
+                self.errors += 1
+                raise SharedStateUnavailable(f"{self.host}:{self.port}: {e!r}") from e
+
+            self._idle.append(connection)
+
+        for reply in replies:
+            if isinstance(reply, RespError):
+                self.errors += 1
+                raise SharedStateUnavailable(str(reply))
+        return replies
+
+    @staticmethod
+    async def _read_replies(reader, count):
+        return [await read_reply(reader) for _ in range(count)]
+
+    async def get(self, key):
+        return (await self._pipeline([('GET', key)]))[0]
+
+    async def set(self, key, value, ttl=None):
+        if ttl:
+            await self._pipeline([('SET', key, value, 'PX', int(ttl * 1000))])
+        else:
+            await self._pipeline([('SET', key, value)])
+
+    async def incr_many(self, items):
+        """Add `amount` to each (key, amount, ttl) counter in one round trip; returns the new values
+
+        The expiry is refreshed on every increment, so counters keyed by their
+        window (day, hour) must be given a ttl that outlives the window.
+        """
+        commands = []
+        for key, amount, ttl in items:
+            commands.append(('INCRBY', key, amount))
+            if ttl:
+                commands.append(('PEXPIRE', key, int(ttl * 1000)))
+        replies = iter(await self._pipeline(commands))
+        results = []
+        for _, _, ttl in items:
+            results.append(next(replies))
+            if ttl:
+                next(replies)
+        return results
+
+    async def expire(self, key, ttl):
+        return bool((await self._pipeline([('PEXPIRE', key, int(ttl * 1000))]))[0])
+
+    async def delete(self, key):
+        return bool((await self._pipeline([('DEL', key)]))[0])
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    def counters(self):
+        return {'commands': self.commands, 'errors': self.errors, 'idle_connections': len(self._idle)}
+
+
+def create_backend(url=None):
+    """Backend for a `memory://` or `redis://[:password@]host[:port][/db]` URL"""
+    url = url or os.getenv('SHARED_CACHE_URL', 'memory://')
+    parts = urlsplit(url)
+    if parts.scheme == 'memory':
+        return MemoryBackend()
+    if parts.scheme == 'redis':
+        db = parts.path.lstrip('/')
+        return RedisBackend(parts.hostname or '127.0.0.1', parts.port or 6379, int(db) if db else 0, parts.password)
+    raise ValueError(f"Unsupported shared cache URL: {url}")
+
+
+class SharedStatsCache:
+    """Collection stats every worker can read, so each collection is fetched once per TTL overall
+
+    Entries carry their fetch time; a worker caches what it reads locally for
+    its own TTL, so stats are at most about two TTLs old.
+    """
+
+    def __init__(self, backend, ttl=None):
+        self.backend = backend
+        self.ttl = ttl if ttl is not None else float(os.getenv('STATS_CACHE_TTL', '60'))
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, slug):
+        """Stats another worker fetched within the TTL, or None (also when the backend is down)"""
+        try:
+            payload = await self.backend.get(f"stats:{slug}")
+        except SharedStateUnavailable as e:
+            self.errors += 1
+            logger.debug(f"Shared stats cache unavailable: {e}")
+            return None
+
+        if payload is not None:
+            fetched_at, stats = json.loads(payload)
+            if time.time() - fetched_at < self.ttl:
+                self.hits += 1
+                return stats
+        self.misses += 1
+        return None
+
+    async def set(self, slug, stats):
+        try:
+            await self.backend.set(f"stats:{slug}", json.dumps([time.time(), stats]), ttl=self.ttl)
+        except SharedStateUnavailable as e:
+            self.errors += 1
+            logger.debug(f"Shared stats cache unavailable: {e}")
+
+    def counters(self):
+        """Shared cache counters for monitoring"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            **self.backend.counters()
+        }
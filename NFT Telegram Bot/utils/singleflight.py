@@ -0,0 +1,47 @@
+"""
+Request coalescing (single-flight) for the NFT Analytics Bot
+Concurrent callers for the same key share one in-flight upstream call
+"""
+
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}  # key -> task running the shared call
+
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """Return the result of `await fn()`, shared with concurrent callers of the same key
+
+        The call runs in its own task, so a caller being cancelled never cancels
+        the result for everyone else. Results and exceptions fan out alike.
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def counters(self):
+        """Coalescing counters for monitoring"""
+        return {
+            'calls': self.calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._inflight)
+        }
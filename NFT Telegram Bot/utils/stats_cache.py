@@ -0,0 +1,109 @@
+"""
+In-process cache for OpenSea collection stats
+TTL + LRU eviction, with stale-while-revalidate background refreshes
+"""
+
+import os
+import time
+import asyncio
+import logging
+import itertools
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class StatsCache:
+    def __init__(self, ttl=None, stale_ttl=None, max_entries=None):
+        # Entries younger than `ttl` are fresh; for a further `stale_ttl` seconds
+        # they are still served, but trigger a background refresh
+        self.ttl = ttl if ttl is not None else float(os.getenv('STATS_CACHE_TTL', '60'))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv('STATS_CACHE_STALE_TTL', '600'))
+        self.max_entries = max_entries or int(os.getenv('STATS_CACHE_MAX_ENTRIES', '1000'))
+
+        self._entries = OrderedDict()  # slug -> (stored_at, stats, version)
+        # Versions only change when the payload does and are never reused, even after eviction
+        self._versions = itertools.count(1)
+        self._refreshing = {}  # slug -> background refresh task
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, slug, loader):
+        """Return stats for slug, calling `await loader(slug)` on a miss"""
+        entry = self._entries.get(slug)
+
+        if entry is not None:
+            stored_at, stats, _ = entry
+            age = time.monotonic() - stored_at
+
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(slug)
+                self.hits += 1
+                if age >= self.ttl:
+                    self.stale_hits += 1
+                    self._revalidate(slug, loader)
+                return stats
+
+            del self._entries[slug]
+
+        self.misses += 1
+        stats = await loader(slug)
+        if stats is not None:
+            self.set(slug, stats)
+        return stats
+
+    def peek(self, slug):
+        """Return cached stats (fresh or stale) without loading or touching counters"""
+        entry = self._entries.get(slug)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl + self.stale_ttl:
+            return None
+        return entry[1]
+
+    def version(self, slug):
+        """Version of the cached stats for slug (None when not cached); equal versions mean equal stats"""
+        entry = self._entries.get(slug)
+        return entry[2] if entry is not None else None
+
+    def set(self, slug, stats, age=0.0):
+        """Store stats for slug (already `age` seconds old), evicting the least recently used entries"""
+        previous = self._entries.get(slug)
+        if previous is not None and previous[1] == stats:
+            version = previous[2]
+        else:
+            version = next(self._versions)
+        self._entries[slug] = (time.monotonic() - age, stats, version)
+        self._entries.move_to_end(slug)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _revalidate(self, slug, loader):
+        """Refresh a stale entry in the background (at most one refresh per slug)"""
+        if slug not in self._refreshing:
+            self._refreshing[slug] = asyncio.create_task(self._refresh(slug, loader))
+
+    async def _refresh(self, slug, loader):
+        try:
+            stats = await loader(slug)
+            if stats is not None:
+                self.set(slug, stats)
+        except Exception as e:
+            logger.error(f"Background refresh failed for {slug}: {e}")
+        finally:
+            self._refreshing.pop(slug, None)
+
+    def counters(self):
+        """Cache counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,106 @@
+"""
+Time-series snapshot store for the NFT Analytics Bot
+Append-only minute snapshots per collection, rolled up to hourly
+resolution after a while and dropped after the retention period
+"""
+
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('floor_price', 'volume', 'sales', 'num_owners', 'average_price', 'market_cap')
+
+# Ranges accepted by /history and the bucket size (seconds) each is shown at
+HISTORY_RANGES = {
+    '24h': (86400, 3600),
+    '7d': (7 * 86400, 6 * 3600),
+    '30d': (30 * 86400, 86400),
+    '90d': (90 * 86400, 3 * 86400),
+    '1y': (365 * 86400, 14 * 86400),
+}
+
+
+class SnapshotStore:
+    def __init__(self, db, raw_days=None, retention_days=None):
+        self.db = db
+        # Minute snapshots older than raw_days are rolled up into hourly points
+        self.raw_days = raw_days or int(os.getenv('HISTORY_RAW_DAYS', '30'))
+        self.retention_days = retention_days or int(os.getenv('HISTORY_RETENTION_DAYS', '365'))
+        # Every minute snapshot before this hour has been rolled up (None until the first run)
+        self.rolled_up_to = None
+        self.recorded = 0
+
+    def record(self, slug, stats, ts=None):
+        """Append a stats payload at minute resolution (later writes in a minute win)"""
+        ts = int(ts or time.time()) // 60 * 60
+        self.recorded += 1
+        return self.db.write(
+            "INSERT OR REPLACE INTO snapshots (slug, ts, floor_price, volume, sales, num_owners, "
+            "average_price, market_cap) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (slug, ts, *[stats.get(column) for column in COLUMNS])
+        )
+
+    async def query(self, slug, since, until=None, bucket=60):
+        """Return [(ts, floor_price, volume, sales, num_owners)] for slug, downsampled to `bucket` seconds
+
+        Floor price is averaged within a bucket; volume, sales and owners are
+        cumulative totals, so the bucket keeps their latest (largest) value.
+        """
+        return await self.db.fetchall(
+            "SELECT (ts / ?) * ? AS bucket, AVG(floor_price), MAX(volume), MAX(sales), MAX(num_owners) "
+            "FROM snapshots WHERE slug = ? AND ts >= ? AND ts <= ? "
+            "GROUP BY bucket ORDER BY bucket",
+            (bucket, bucket, slug, int(since), int(until or time.time()))
+        )
+
+    async def query_many(self, slugs, since, bucket=60):
+        """Return [(slug, ts, floor_price, volume)] for several slugs in one query, downsampled to `bucket`"""
+        slugs = list(slugs)
+        if not slugs:
+            return []
+        placeholders = ", ".join("?" * len(slugs))
+        return await self.db.fetchall(
+            "SELECT slug, (ts / ?) * ? AS bucket, AVG(floor_price), MAX(volume) "
+            f"FROM snapshots WHERE slug IN ({placeholders}) AND ts >= ? "
+            "GROUP BY slug, bucket ORDER BY slug, bucket",
+            (bucket, bucket, *slugs, int(since))
+        )
+
+    async def history(self, slug, range_key):
+        """Query one of the predefined HISTORY_RANGES"""
+        span, bucket = HISTORY_RANGES[range_key]
+        return await self.query(slug, time.time() - span, bucket=bucket)
+
+    def apply_retention(self, now=None):
+        """Roll minute snapshots that aged out since the last run up to hourly points and drop expired history
+
+        The first run after a start covers everything older, which catches up
+        on hours that aged out while the bot was down.
+        """
+        now = int(now or time.time())
+        # Whole hours only, so a bucket is never rolled up from a partial set of minutes
+        rollup_before = (now - self.raw_days * 86400) // 3600 * 3600
+        rollup_from = self.rolled_up_to or 0
+        drop_before = now - self.retention_days * 86400
+
+        if rollup_from < rollup_before:
+            self.db.write(
+                "INSERT OR REPLACE INTO snapshots (slug, ts, floor_price, volume, sales, num_owners, "
+                "average_price, market_cap) "
+                "SELECT slug, (ts / 3600) * 3600, AVG(floor_price), MAX(volume), MAX(sales), MAX(num_owners), "
+                "AVG(average_price), AVG(market_cap) "
+                "FROM snapshots WHERE ts >= ? AND ts < ? GROUP BY slug, ts / 3600",
+                (rollup_from, rollup_before)
+            )
+            self.db.write(
+                "DELETE FROM snapshots WHERE ts >= ? AND ts < ? AND ts % 3600 != 0",
+                (rollup_from, rollup_before)
+            )
+            self.rolled_up_to = rollup_before
+        return self.db.write("DELETE FROM snapshots WHERE ts < ?", (drop_before,))
+
+    async def retention_job(self, context):
+        """Job queue callback for periodic rollup and retention"""
+        self.apply_retention()
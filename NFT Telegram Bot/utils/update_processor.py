@@ -0,0 +1,114 @@
+"""
+Concurrent update processing for the NFT Analytics Bot
+Updates from different chats run in parallel up to a global cap, while
+updates from the same chat run one at a time in arrival order
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class ChatOrderedProcessor(BaseUpdateProcessor):
+    """Update processor with a global concurrency cap and per-chat FIFO ordering
+
+    The base class admits up to `max_pending` updates at a time; of those, at most
+    `concurrency` run handlers at once. A chat's queued updates wait on that chat's
+    lock without holding a running slot, so one busy chat cannot starve the others.
+    """
+
+    def __init__(self, concurrency=None, max_pending=None):
+        super().__init__(max_pending or int(os.getenv('UPDATE_MAX_PENDING', '1000')))
+        self.concurrency = concurrency or int(os.getenv('UPDATE_CONCURRENCY', '32'))
+        self._running = asyncio.Semaphore(self.concurrency)
+        self._chats = {}  # chat key -> [asyncio.Lock, updates holding or waiting for it]
+
+        self.admitted = 0
+        self.active = 0
+        self.processed = 0
+        self.latencies = deque(maxlen=1000)  # recent handler times in ms
+
+    @staticmethod
+    def _chat_key(update):
+        """Chat the update belongs to (the user for chat-less updates); None if unordered
+
+        Inline queries are answered by query id and debounced per user, so
+        they skip the ordering lock: a new keystroke must not wait behind the last.
+        """
+        if getattr(update, 'inline_query', None) is not None:
+            return None
+        chat = getattr(update, 'effective_chat', None)
+        if chat is not None:
+            return chat.id
+        user = getattr(update, 'effective_user', None)
+        return ('user', user.id) if user is not None else None
+
+    async def do_process_update(self, update, coroutine):
+        self.admitted += 1
+        try:
+            await self._process(update, coroutine)
+        finally:
+            self.admitted -= 1
+
+    async def _process(self, update, coroutine):
+        key = self._chat_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        # asyncio.Lock wakes waiters in FIFO order, which keeps a chat's updates in sequence
+        entry = self._chats.get(key)
+        if entry is None:
+            entry = self._chats[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await self._run(coroutine)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chats[key]
+
+    async def _run(self, coroutine):
+        async with self._running:
+            self.active += 1
+            started = time.perf_counter()
+            try:
+                await coroutine
+            finally:
+                self.latencies.append((time.perf_counter() - started) * 1000)
+                self.active -= 1
+                self.processed += 1
+
+    async def initialize(self):
+        logger.info(f"⚙️ Processing up to {self.concurrency} updates concurrently, in order per chat")
+
+    async def shutdown(self):
+        pass
+
+    def queue_depth(self):
+        """Admitted updates that are not yet running (waiting on their chat or a slot)"""
+        return self.admitted - self.active
+
+    def counters(self):
+        """Processing counters for monitoring"""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 1) if latencies else 0.0
+
+        return {
+            'concurrency': self.concurrency,
+            'active': self.active,
+            'queued': self.queue_depth(),
+            'chats': len(self._chats),
+            'processed': self.processed,
+            'latency_p50_ms': percentile(0.5),
+            'latency_p95_ms': percentile(0.95)
+        }
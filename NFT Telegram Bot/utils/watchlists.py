@@ -0,0 +1,128 @@
+"""
+Per-user watchlists for the NFT Analytics Bot
+A reverse index from collection to watchers lets each refresh cycle fetch
+every watched collection once and fan the result out to its subscribers
+"""
+
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WatchlistStore:
+    def __init__(self, change_threshold=None):
+        # Relative floor move since the last notification that is worth a message
+        self.change_threshold = change_threshold or float(os.getenv('WATCHLIST_CHANGE_THRESHOLD', '0.05'))
+
+        self._by_user = {}  # user_id -> {slug: None}, in the order they were watched
+        self._watchers = {}  # slug -> {user_id: chat_id}
+        self._baselines = {}  # slug -> floor price watchers were last told about
+        self.db = None
+
+        self.cycles = 0
+        self.notified = 0
+
+    async def attach_storage(self, db, owns=None):
+        """Load watchlists from storage and persist future changes there
+
+        `owns(chat_id)` limits the load to the chats this worker serves.
+        """
+        self.db = db
+        rows = await db.fetchall("SELECT user_id, chat_id, slug FROM watchlists ORDER BY created_at")
+        for user_id, chat_id, slug in rows:
+            if owns is None or owns(chat_id):
+                self._index(user_id, chat_id, slug)
+
+    def _index(self, user_id, chat_id, slug):
+        self._by_user.setdefault(user_id, {})[slug] = None
+        self._watchers.setdefault(slug, {})[user_id] = chat_id
+
+    def add(self, user_id, chat_id, slug):
+        """Watch a collection; returns False if the user already watches it"""
+        if slug in self._by_user.get(user_id, ()):
+            return False
+
+        self._index(user_id, chat_id, slug)
+        if self.db:
+            self.db.write(
+                "INSERT OR REPLACE INTO watchlists (user_id, slug, chat_id, created_at) VALUES (?, ?, ?, ?)",
+                (user_id, slug, chat_id, time.time())
+            )
+        return True
+
+    def remove(self, user_id, slug):
+        """Stop watching a collection; returns True if it was watched"""
+        user_slugs = self._by_user.get(user_id)
+        if not user_slugs or slug not in user_slugs:
+            return False
+
+        del user_slugs[slug]
+        if not user_slugs:
+            del self._by_user[user_id]
+
+        watchers = self._watchers[slug]
+        del watchers[user_id]
+        if not watchers:
+            # Nobody left to refresh it for
+            del self._watchers[slug]
+            self._baselines.pop(slug, None)
+
+        if self.db:
+            self.db.write("DELETE FROM watchlists WHERE user_id = ? AND slug = ?", (user_id, slug))
+        return True
+
+    def user_slugs(self, user_id):
+        """A user's watched collections, oldest first"""
+        return list(self._by_user.get(user_id, ()))
+
+    def count_for_user(self, user_id):
+        return len(self._by_user.get(user_id, ()))
+
+    def slugs(self):
+        """Union of every watchlist: each collection appears once however many users watch it"""
+        return list(self._watchers)
+
+    def watchers(self, slug):
+        """{user_id: chat_id} of everyone watching slug"""
+        return self._watchers.get(slug, {})
+
+    def changes(self, stats_by_slug):
+        """Fan one refresh cycle out to subscribers
+
+        Returns {chat_id: [(slug, old floor, new floor)]} for every watched
+        collection whose floor moved by at least change_threshold since
+        watchers were last told; the first floor seen only sets the baseline.
+        """
+        self.cycles += 1
+        by_chat = {}
+        for slug, stats in stats_by_slug.items():
+            floor_price = (stats or {}).get('floor_price')
+            if floor_price is None or slug not in self._watchers:
+                continue
+
+            floor_price = float(floor_price)
+            baseline = self._baselines.get(slug)
+            if baseline is None:
+                self._baselines[slug] = floor_price
+                continue
+            if not baseline or abs(floor_price - baseline) / baseline < self.change_threshold:
+                continue
+
+            self._baselines[slug] = floor_price
+            for chat_id in set(self._watchers[slug].values()):
+                by_chat.setdefault(chat_id, []).append((slug, baseline, floor_price))
+
+        self.notified += len(by_chat)
+        return by_chat
+
+    def counters(self):
+        """Watchlist counters for monitoring"""
+        return {
+            'users': len(self._by_user),
+            'collections': len(self._watchers),
+            'subscriptions': sum(len(watchers) for watchers in self._watchers.values()),
+            'cycles': self.cycles,
+            'notified': self.notified
+        }
@@ -0,0 +1,134 @@
+"""
+Webhook mode for the NFT Analytics Bot
+Receives Telegram updates over HTTP as an alternative to long polling,
+and serves the health check on the same port
+"""
+
+import os
+import signal
+import asyncio
+import logging
+import secrets
+
+from telegram import Update
+
+from utils.http_server import HTTPServer, Response, json_response
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookServer:
+    def __init__(self, application, health_check=None, host=None, port=None, path=None, secret_token=None):
+        self.application = application
+        self.health_check = health_check
+        self.path = path or os.getenv('WEBHOOK_PATH', '/telegram')
+        self.secret_token = secret_token or os.getenv('WEBHOOK_SECRET')
+
+        self.server = HTTPServer(
+            host or os.getenv('WEBHOOK_HOST', '0.0.0.0'),
+            int(port if port is not None else os.getenv('PORT', '8080'))
+        )
+        self.server.route('POST', self.path, self.handle_update)
+        self.server.route('GET', '/health', self.handle_health)
+
+        self.received = 0
+        self.rejected = 0
+
+    async def start(self):
+        await self.server.start()
+
+    async def stop(self):
+        await self.server.stop()
+
+    async def handle_update(self, request):
+        """Validate an update from Telegram and hand it to the application
+
+        A JSON array is taken as a batch of updates, in order (the supervisor of
+        a sharded deployment forwards them that way).
+        """
+        # Constant-time, and on bytes: a latin-1 header may hold characters compare_digest rejects in a str
+        token = request.headers.get('x-telegram-bot-api-secret-token', '').encode('latin-1')
+        if self.secret_token and not secrets.compare_digest(token, self.secret_token.encode()):
+            self.rejected += 1
+            return Response(403, 'Forbidden')
+
+        try:
+            payload = request.json()
+            payloads = payload if isinstance(payload, list) else [payload]
+            updates = [Update.de_json(item, self.application.bot) for item in payloads]
+        except (ValueError, TypeError, KeyError) as e:
+            self.rejected += 1
+            logger.warning(f"Rejected malformed update: {e}")
+            return Response(400, 'Bad Request')
+
+        # Acknowledge straight away; the application processes updates from its queue
+        self.received += len(updates)
+        for update in updates:
+            await self.application.update_queue.put(update)
+        return Response(200, 'OK')
+
+    async def handle_health(self, request):
+        payload = self.health_check() if self.health_check else {'status': 'healthy'}
+        return json_response(payload)
+
+
+async def serve_webhook(application, health_check=None, webhook_url=None, stop_event=None):
+    """Run the application in webhook mode until stop_event is set (or SIGINT/SIGTERM)
+
+    Updates must carry the webhook secret, or anyone who finds the URL could
+    post commands as any user. Without WEBHOOK_SECRET one is generated when
+    the bot registers the webhook itself; otherwise the server won't start.
+    """
+    server = WebhookServer(application, health_check)
+    if not server.secret_token:
+        if not webhook_url:
+            raise RuntimeError("WEBHOOK_SECRET must be set when the webhook is registered outside the bot")
+        server.secret_token = secrets.token_urlsafe(32)
+        logger.info("🔑 WEBHOOK_SECRET not set - generated a secret for this run")
+    stop_event = stop_event or asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    # Mirror run_polling's lifecycle, including the post_* hooks it calls
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    await server.start()
+
+    try:
+        if webhook_url:
+            await application.bot.set_webhook(
+                url=webhook_url.rstrip('/') + server.path,
+                secret_token=server.secret_token,
+                allowed_updates=Update.ALL_TYPES,
+                max_connections=int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+            )
+            logger.info(f"🪝 Webhook registered at {webhook_url.rstrip('/')}{server.path}")
+        await stop_event.wait()
+    finally:
+        await server.stop()
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+
+def run_webhook(application, health_check=None):
+    """Blocking entry point for webhook mode, the counterpart of run_polling"""
+    webhook_url = os.getenv('WEBHOOK_URL')
+    if not webhook_url and os.getenv('RAILWAY_PUBLIC_DOMAIN'):
+        webhook_url = f"https://{os.getenv('RAILWAY_PUBLIC_DOMAIN')}"
+
+    if not webhook_url:
+        logger.warning("⚠️  WEBHOOK_URL not set - serving without registering the webhook with Telegram "
+                       "(WEBHOOK_SECRET must match the secret_token it was registered with)")
+
+    asyncio.run(serve_webhook(application, health_check, webhook_url))